@@ -1,37 +1,100 @@
-import requests
+import os
 import secrets
 
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from uvicorn import run
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from contextlib import asynccontextmanager
 
-from domain.v1 import binance, bitget, blockfin
-from domain.v1.blockfin.router import generate_signature, set_auth_headers
-from config import symbol_obj, BLOCKFIN_BASE_URL, SYMBOL_LIST
+from core.hub import hub
+from core.clock import start_clocks, stop_clocks
+from core.transport import transport
+from core.instruments import instruments
+from core.order_book import order_books
+from core.recorder import recorder
+from core.metrics import metrics, loop_lag, MetricsMiddleware, CONTENT_TYPE
+from core.trace import tracer
+from core.logger import logs
+from core.accounts import accounts
+from core.feed import feed
+from core.bbo import bbo
+from domain.v1 import binance, bitget, blockfin, trace, market
+from domain.v1.binance.ws_api import start_ws_api, stop_ws_api
+from domain.v1.blockfin.session import close_private_sessions
+from domain.v1.blockfin.strategy import start_engine, stop_engine
+from config import BINANCE_WS_ORDER_ENTRY, MARKET_DATA_MODE, SESSION_SECRET_KEY, SESSION_SECRET_PATH
 
 
-secret_key = secrets.token_hex(32)
-session_max_age = 60 * 60 * 24 * 90
+def session_secret(shared: bool) -> str:
+    # shm 모드 워커끼리 세션 쿠키를 공유하려면 서명키가 같아야 함: 처음 뜬 워커가 파일을 만들고 나머지는 읽음
+    if SESSION_SECRET_KEY:
+        return SESSION_SECRET_KEY
+    if not shared:
+        return secrets.token_hex(32)
+    os.makedirs(os.path.dirname(SESSION_SECRET_PATH), exist_ok=True)
+    # 같은 프로세스 안의 동시 호출끼리도 임시 파일이 겹치지 않게 호출마다 이름을 따로
+    temp_path = f"{SESSION_SECRET_PATH}.{os.getpid()}.{secrets.token_hex(4)}.tmp"
+    fd = os.open(temp_path, os.O_CREAT | os.O_TRUNC | os.O_WRONLY, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(secrets.token_hex(32))
+    try:
+        # 다 쓴 임시 파일을 link 로 올림: 파일이 보이면 항상 내용이 있고, 이미 있으면 먼저 만든 값 사용
+        os.link(temp_path, SESSION_SECRET_PATH)
+    except FileExistsError:
+        with open(SESSION_SECRET_PATH) as f:
+            if not f.read().strip():
+                # 이전 버전이 쓰다 죽어서 남은 빈 파일은 교체
+                os.replace(temp_path, SESSION_SECRET_PATH)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    with open(SESSION_SECRET_PATH) as f:
+        return f.read().strip()
 
 
-def set_symbols(symbol_list: list):
-    return_obj = {}
-    for symbol in symbol_list:
-        query_params = {"instId": symbol}  # BTC-USDT
-        request_path = '/api/v1/market/instruments'
-        timestamp, nonce, query_string, signature = generate_signature(method='GET', request_path=request_path, query_params=query_params)
-        headers = set_auth_headers(signature, timestamp, nonce)
-        response_json = requests.get(url=f"{BLOCKFIN_BASE_URL}{request_path}?{query_string}", headers=headers).json()
-        return_obj[symbol] = response_json
-    return return_obj
+shared = MARKET_DATA_MODE == 'shm'
+secret_key = session_secret(shared)
+session_max_age = 60 * 60 * 24 * 90
 
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
-    symbol_obj.update(set_symbols(SYMBOL_LIST))
+    logs.start()
+    loop_lag.start()
+    if shared:
+        # 시세는 ingest 프로세스가 링으로 배포 (python -m ingest)
+        feed.attach(hub)
+        feed.start()
+    await instruments.start()
+    start_clocks()
+    if BINANCE_WS_ORDER_ENTRY:
+        start_ws_api()
+    if not shared:
+        await recorder.start()
+    tracer.start_sink()
+    accounts.start()
+    order_books.start()
+    if not shared:
+        # 전략 엔진은 프로세스 1개에서만 (shm 모드 워커에서는 /strategy/* 가 501)
+        start_engine()
     yield
+    await tracer.stop_sink()
+    if not shared:
+        await recorder.stop()
+    await stop_engine()
+    await bbo.close()
+    await order_books.close()
+    await instruments.stop()
+    await stop_ws_api()
+    await accounts.close()
+    await close_private_sessions()
+    await stop_clocks()
+    await feed.stop()
+    await hub.close()
+    await transport.close()
+    await loop_lag.stop()
+    logs.stop()
     print("=========== SERVER SHUTDOWN ===========")
 
 
@@ -40,6 +103,7 @@ app = FastAPI(
     version='0.0.1',
     lifespan=lifespan
 )
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(SessionMiddleware, secret_key=secret_key, max_age=session_max_age, same_site="strict")
 app.add_middleware(
     CORSMiddleware,
@@ -51,6 +115,14 @@ app.add_middleware(
 app.include_router(binance.router)
 app.include_router(bitget.router)
 app.include_router(blockfin.router)
+app.include_router(trace.router)
+app.include_router(market.router)
+
+
+# Prometheus 스크랩
+@app.get('/metrics', include_in_schema=False)
+async def get_metrics():
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
 
 
 
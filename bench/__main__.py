@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import subprocess
+
+from bench import env
+
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def git(*args) -> str:
+    try:
+        return subprocess.run(['git', *args], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def main():
+    """
+        python -m bench [--concurrency 1,8,32] [--requests 500] [--micro-only]
+        결과: bench/results/<시각>-<커밋>.json (python -m bench.compare 로 커밋 간 비교)
+    """
+    parser = argparse.ArgumentParser(description="주문 경로 지연시간 벤치마크 (로컬 모의 거래소)")
+    parser.add_argument('--concurrency', default='1,8,32', help="동시 주문 수 목록 (쉼표 구분)")
+    parser.add_argument('--requests', type=int, default=500, help="동시성 단계별 주문 수")
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--entry', action='append', help="실행할 진입점 (예: blockfin.future_trade), 미지정 시 전체")
+    parser.add_argument('--micro-number', type=int, default=20000, help="마이크로벤치마크 반복 수")
+    parser.add_argument('--micro-only', action='store_true')
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--latency-ms', type=float, default=0, help="모의 거래소 응답 지연")
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true', help="주문 경로 print 출력 유지")
+    parser.add_argument('--output', default=None, help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    url = env.configure(args.port, args.latency_ms, args.jitter_ms)
+
+    from bench import micro, order_path
+    from bench.stats import table
+
+    commit = git('rev-parse', '--short', 'HEAD')
+    result = {
+        'commit': commit,
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'verbose')},
+        'micro': {},
+        'order_path': {},
+    }
+
+    if not args.skip_micro:
+        result['micro'] = micro.run(args.micro_number)
+        print(table([(name, s['p50_us'], s['p99_us'], s['p999_us'], s['ops_per_sec']) for name, s in result['micro'].items()],
+                    ['micro', 'p50_us', 'p99_us', 'p999_us', 'ops/s']))
+
+    if not args.micro_only:
+        concurrency = [int(level) for level in args.concurrency.split(',')]
+        with order_path.mock_exchange(url):
+            result['order_path'] = asyncio.run(order_path.run(concurrency, args.requests, args.warmup, args.entry,
+                                                              quiet=not args.verbose))
+        rows = []
+        for name, levels in result['order_path'].items():
+            for level, summary in levels.items():
+                for stage, s in [('total', summary['total']), *summary['stages'].items()]:
+                    rows.append((name, level, stage, s['p50_us'], s['p99_us'], s['p999_us'],
+                                 summary['orders_per_sec'] if stage == 'total' else s['ops_per_sec']))
+        print(table(rows, ['entry', 'c', 'stage', 'p50_us', 'p99_us', 'p999_us', 'orders/s']))
+
+    output = args.output or os.path.join(root, 'bench', 'results', f"{time.strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"결과 저장: {output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import sys
+import json
+import argparse
+
+from bench.stats import table
+
+
+METRICS = ('p50_us', 'p99_us', 'p999_us')
+
+
+def flatten(result: dict) -> dict:
+    # (구분, 이름, 지표) -> 값
+    rows = {}
+    for name, summary in result.get('micro', {}).items():
+        for metric in METRICS:
+            rows[('micro', name, metric)] = summary[metric]
+    for name, levels in result.get('order_path', {}).items():
+        for level, summary in levels.items():
+            rows[(f"c={level}", name, 'orders_per_sec')] = summary['orders_per_sec']
+            for stage, stage_summary in [('total', summary['total']), *summary['stages'].items()]:
+                for metric in METRICS:
+                    rows[(f"c={level}", f"{name}.{stage}", metric)] = stage_summary[metric]
+    return rows
+
+
+def main():
+    """
+        python -m bench.compare <기준.json> <비교.json> [--threshold 0.1]
+        지연시간이 threshold 비율 이상 증가 (orders/sec 는 감소) 하면 regression, 종료코드 1
+    """
+    parser = argparse.ArgumentParser(description="벤치마크 결과 비교")
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    parser.add_argument('--min-us', type=float, default=1.0, help="이 값 미만의 지연시간은 비교에서 제외 (측정 노이즈)")
+    parser.add_argument('--all', action='store_true', help="변화 없는 항목도 출력")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    base_rows, head_rows = flatten(base), flatten(head)
+
+    rows, regressions = [], 0
+    for key in sorted(base_rows.keys() & head_rows.keys()):
+        before, after = base_rows[key], head_rows[key]
+        if not before or (key[2] != 'orders_per_sec' and max(before, after) < args.min_us):
+            continue
+        change = (after - before) / before
+        worse = -change if key[2] == 'orders_per_sec' else change
+        flag = ''
+        if worse >= args.threshold:
+            flag, regressions = 'REGRESSION', regressions + 1
+        elif worse <= -args.threshold:
+            flag = 'improved'
+        if flag or args.all:
+            rows.append((*key, before, after, f"{change:+.1%}", flag))
+
+    print(f"{base.get('commit')} -> {head.get('commit')}")
+    if rows:
+        print(table(rows, ['group', 'name', 'metric', 'base', 'head', 'change', '']))
+    print(f"regression: {regressions}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
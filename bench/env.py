@@ -0,0 +1,37 @@
+import os
+import socket
+import tempfile
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def configure(port: int = None, latency_ms: float = 0, jitter_ms: float = 0) -> str:
+    """
+        config import 전에 호출: 모든 거래소 URL을 로컬 모의 서버로, 키는 더미값으로 고정
+        (config.env 에 실제 키가 있어도 벤치마크가 실거래소로 나가지 않도록 덮어씀)
+    """
+    port = port or free_port()
+    url = f"http://127.0.0.1:{port}"
+    os.environ.update({
+        'MOCK_EXCHANGE_URL': url,
+        'MOCK_EXCHANGE_PORT': str(port),
+        'MOCK_LATENCY_MS': str(latency_ms),
+        'MOCK_JITTER_MS': str(jitter_ms),
+        'MOCK_ERROR_RATE': '0',
+        'MOCK_RATE_LIMIT': '0',
+        'RATE_LIMIT_ENABLED': 'false',  # 요청 예산 대기 시간이 구간 측정에 섞이지 않도록
+        'MOCK_WS_DROP_RATE': '0',
+        'BINANCE_WS_ORDER_ENTRY': 'false',
+        'RECORDER_CHANNELS': '',
+        'INSTRUMENT_SNAPSHOT_PATH': os.path.join(tempfile.mkdtemp(prefix='bench-'), 'instruments.json'),
+    })
+    for name in ('BINANCE_API_KEY', 'BINANCE_API_SECRET', 'BINANCE_WS_API_KEY',
+                 'BITGET_API_KEY', 'BITGET_API_SECRET', 'BITGET_API_PASSPHRASE',
+                 'BLOCKFIN_API_KEY', 'BLOCKFIN_API_SECRET', 'BLOCKFIN_API_PASSPHRASE'):
+        os.environ[name] = f"bench-{name.lower()}"
+    os.environ.pop('BINANCE_WS_API_PRIVATE_KEY', None)
+    return url
@@ -0,0 +1,80 @@
+import gc
+import json
+import time
+
+from importlib import import_module
+
+
+def run_sync(coro):
+    # await 지점이 없는 코루틴을 이벤트 루프 없이 실행 (루프 오버헤드 제외)
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended")
+
+
+def measure(fn, number: int, warmup: int = 100) -> list:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    append = samples.append
+    clock = time.perf_counter_ns
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(number):
+            start = clock()
+            fn()
+            append(clock() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return samples
+
+
+def cases() -> dict:
+    """
+        name -> 인자 없는 호출
+        - sign.*: 거래소별 서명 함수 (주문 1건 분량 입력)
+        - model.*: 주문 요청 모델 검증 (JSON -> 모델) / 직렬화 (모델 -> JSON)
+    """
+    from bench import payloads
+    blockfin_router = import_module('domain.v1.blockfin.router')
+    bitget_router = import_module('domain.v1.bitget.router')
+    from domain.v1.binance.ws_api import ws_api
+    from config.models.binance import BinanceFutureTrade
+    from config.models.blockfin import BlockFinTrade
+    from config.models.bitget import BitgetTrade
+    from core.accounts import accounts
+
+    account = accounts.default('blockfin').signer
+    bitget = accounts.default('bitget').signer
+    binance = ws_api['future']
+    server_time = str(int(time.time() * 1000))
+
+    result = {
+        'sign.blockfin': lambda: blockfin_router.generate_signature('POST', '/api/v1/trade/order', None, payloads.BLOCKFIN_ORDER_BODY),
+        'sign.blockfin.account': lambda: run_sync(account.generate_signature('POST', '/api/v1/trade/order', None, payloads.BLOCKFIN_ORDER_BODY)),
+        'sign.bitget': lambda: bitget_router.generate_signature(bitget.secret_key, server_time, 'POST', '/api/v2/spot/trade/place-order', None, payloads.BITGET_ORDER_BODY),
+        'sign.binance': lambda: binance.hmac_sign(payloads.BINANCE_ORDER_PARAMS),
+    }
+    for model, payload in ((BinanceFutureTrade, payloads.BINANCE_FUTURE_TRADE),
+                           (BlockFinTrade, payloads.BLOCKFIN_TRADE),
+                           (BitgetTrade, payloads.BITGET_TRADE)):
+        raw = json.dumps(payload)
+        instance = model.model_validate_json(raw)
+        result[f"model.{model.__name__}.validate_json"] = lambda model=model, raw=raw: model.model_validate_json(raw)
+        result[f"model.{model.__name__}.validate_python"] = lambda model=model, payload=payload: model.model_validate(payload)
+        result[f"model.{model.__name__}.dump_json"] = lambda instance=instance: instance.model_dump_json()
+    return result
+
+
+def run(number: int = 20000, selected: list = None) -> dict:
+    from bench.stats import summarize
+    results = {}
+    for name, fn in cases().items():
+        if selected and not any(name.startswith(prefix) for prefix in selected):
+            continue
+        results[name] = summarize(measure(fn, number))
+    return results
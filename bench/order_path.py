@@ -0,0 +1,287 @@
+import os
+import sys
+import copy
+import json
+import time
+import asyncio
+import contextlib
+import subprocess
+import urllib.request
+
+from collections import defaultdict
+from contextvars import ContextVar
+from importlib import import_module
+from types import SimpleNamespace
+
+import aiohttp
+
+from bench import payloads
+from bench.stats import summarize
+
+
+STAGES = ('validate', 'sign', 'serialize', 'network', 'parse', 'other')
+
+order_var = ContextVar('bench_order', default=None)     # 주문 1건의 구간별 누적 ns
+request_var = ContextVar('bench_request', default=None)  # HTTP 요청 1건의 시각 기록
+
+
+def add(stage: str, elapsed: int):
+    stages = order_var.get()
+    if stages is not None:
+        stages[stage] += elapsed
+
+
+def timed(stage: str, fn):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            add(stage, time.perf_counter_ns() - start)
+    return wrapper
+
+
+def timed_async(stage: str, fn):
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            add(stage, time.perf_counter_ns() - start)
+    return wrapper
+
+
+class TimedHmac:
+    # binance router 의 인라인 hmac.new(...).hexdigest() 를 sign 구간으로 계측
+    def __init__(self, module):
+        self.module = module
+
+    def new(self, *args, **kwargs):
+        start = time.perf_counter_ns()
+        digest = self.module.new(*args, **kwargs)
+        add('sign', time.perf_counter_ns() - start)
+        return SimpleNamespace(hexdigest=timed('sign', digest.hexdigest), digest=timed('sign', digest.digest))
+
+    def __getattr__(self, name):
+        return getattr(self.module, name)
+
+
+def trace_config() -> aiohttp.TraceConfig:
+    """
+        transport.request 진입 -> on_request_start: serialize (URL 처리, json body 직렬화)
+        on_request_start -> on_request_end: network (커넥션 획득, 송신, 응답 헤더 수신)
+        on_request_end -> request 반환: parse (body 수신, JSON 디코딩)
+    """
+    async def on_request_start(session, context, params):
+        call = request_var.get()
+        if call is not None:
+            call['start'] = time.perf_counter_ns()
+
+    async def on_request_end(session, context, params):
+        call = request_var.get()
+        if call is not None:
+            call['end'] = time.perf_counter_ns()
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    return config
+
+
+@contextlib.contextmanager
+def instrument():
+    """
+        주문 경로의 서명 / 검증 / HTTP 함수를 구간 계측 래퍼로 교체 (종료 시 원복)
+    """
+    from core.transport import transport
+    blockfin_router = import_module('domain.v1.blockfin.router')
+    bitget_router = import_module('domain.v1.bitget.router')
+    binance_router = import_module('domain.v1.binance.router')
+    from domain.v1.blockfin.Blockfin import BlockFin, BlockFinTrade
+
+    original_request = transport.request
+
+    async def request(*args, **kwargs):
+        call = {'entered': time.perf_counter_ns()}
+        token = request_var.set(call)
+        try:
+            return await original_request(*args, **kwargs)
+        finally:
+            done = time.perf_counter_ns()
+            request_var.reset(token)
+            if 'end' in call:
+                add('serialize', call['start'] - call['entered'])
+                add('network', call['end'] - call['start'])
+                add('parse', done - call['end'])
+            else:
+                add('network', done - call['entered'])
+
+    patches = [
+        (transport, 'request', request),
+        (blockfin_router, 'generate_signature', timed('sign', blockfin_router.generate_signature)),
+        (bitget_router, 'generate_signature', timed('sign', bitget_router.generate_signature)),
+        (binance_router, 'hmac', TimedHmac(binance_router.hmac)),
+        (BlockFin, 'generate_signature', timed_async('sign', BlockFin.generate_signature)),
+        (BlockFinTrade, 'validate_req_size', timed_async('validate', BlockFinTrade.validate_req_size)),
+    ]
+    originals = [(target, name, target.__dict__[name] if isinstance(target, type) else getattr(target, name))
+                 for target, name, _ in patches]
+    for target, name, value in patches:
+        setattr(target, name, value)
+    config = trace_config()
+    transport.trace_configs.append(config)
+    try:
+        yield
+    finally:
+        transport.trace_configs.remove(config)
+        for target, name, value in originals:
+            if target is transport:
+                delattr(transport, name)
+            else:
+                setattr(target, name, value)
+
+
+def entry_points() -> dict:
+    """
+        name -> prepare(worker) -> call
+        call() 은 주문 1건을 실행하는 코루틴 함수, validate 구간은 요청 JSON -> 모델 검증
+    """
+    from domain.v1.binance.router import future_trade as binance_future_trade
+    from domain.v1.blockfin.router import future_trade as blockfin_future_trade
+    from domain.v1.bitget.router import spot_trade as bitget_spot_trade
+    from domain.v1.blockfin.Blockfin import BlockFinTrade
+    from domain.v1.blockfin.setting import SETTINGS
+    from config.models.binance import BinanceFutureTrade
+    from config.models.blockfin import BlockFinTrade as BlockFinTradeModel
+    from config.models.bitget import BitgetTrade
+    from core.accounts import accounts
+
+    def route(handler, model, payload, **dependencies):
+        # dependencies: Depends() 로 주입되는 인자 (account 등) 를 직접 넘김
+        raw = json.dumps(payload)
+        validate = timed('validate', model.model_validate_json)
+
+        def prepare(worker: int):
+            async def call():
+                return await handler(validate(raw), **dependencies)
+            return call
+        return prepare
+
+    trader = BlockFinTrade(accounts.default('blockfin'))
+
+    def enter_position(worker: int):
+        # 워커별 설정 사본 (진입 순서 / 진행 상태 공유 방지)
+        name = f"BENCH_{worker}"
+        SETTINGS[name] = copy.deepcopy(SETTINGS['BTC_LONG'])
+
+        async def call():
+            setting = SETTINGS[name]
+            setting.update(current_order_idx=0, is_trading=False, is_stop=False)
+            return await trader.enter_position(name)
+        return call
+
+    return {
+        'binance.future_trade': route(binance_future_trade, BinanceFutureTrade, payloads.BINANCE_FUTURE_TRADE,
+                                      account=accounts.default('binance')),
+        'blockfin.future_trade': route(blockfin_future_trade, BlockFinTradeModel, payloads.BLOCKFIN_TRADE,
+                                       account=accounts.default('blockfin')),
+        'bitget.spot_trade': route(bitget_spot_trade, BitgetTrade, payloads.BITGET_TRADE,
+                                   account=accounts.default('bitget')),
+        'blockfin.enter_position': enter_position,
+    }
+
+
+async def drive(prepare, concurrency: int, requests: int, warmup: int) -> dict:
+    """
+        concurrency 개 워커가 총 requests 건을 나눠서 연속 실행 (closed loop)
+    """
+    calls = [prepare(worker) for worker in range(concurrency)]
+    for call in calls[:1] * warmup:
+        await call()
+
+    totals, stages, errors = [], defaultdict(list), []
+    remaining = requests
+
+    async def worker(call):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            measured = defaultdict(int)
+            token = order_var.set(measured)
+            start = time.perf_counter_ns()
+            try:
+                await call()
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                order_var.reset(token)
+            totals.append(elapsed)
+            for stage in STAGES[:-1]:
+                stages[stage].append(measured[stage])
+            stages['other'].append(max(0, elapsed - sum(measured.values())))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(call) for call in calls))
+    wall = time.perf_counter() - start
+    return {
+        'concurrency': concurrency,
+        'orders_per_sec': round(len(totals) / wall, 1),
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:5],
+        'total': summarize(totals),
+        'stages': {stage: summarize(stages[stage]) for stage in STAGES},
+    }
+
+
+@contextlib.contextmanager
+def mock_exchange(url: str, timeout: float = 15):
+    """
+        python -m mock_exchange 를 하위 프로세스로 실행 (환경변수는 bench.env.configure 값)
+    """
+    process = subprocess.Popen([sys.executable, '-m', 'mock_exchange'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                urllib.request.urlopen(f"{url}/mock/state", timeout=1).read()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("mock exchange did not start")
+                time.sleep(0.1)
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def run(concurrency: list, requests: int, warmup: int, selected: list = None, quiet: bool = True) -> dict:
+    """
+        앱 lifespan (심볼 레지스트리, 서버시간 동기화, 허브) 을 띄운 상태에서 라우트 함수를 직접 호출
+    """
+    from app import app
+
+    results = {}
+    sink = open(os.devnull, 'w') if quiet else None
+    # 트랜스포트 세션이 trace config 를 갖도록 lifespan 시작 전에 계측
+    with instrument():
+        async with app.router.lifespan_context(app):
+            for name, prepare in entry_points().items():
+                if selected and name not in selected:
+                    continue
+                results[name] = {}
+                for level in concurrency:
+                    with contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext():
+                        results[name][str(level)] = await drive(prepare, level, requests, warmup)
+                    summary = results[name][str(level)]
+                    print(f"{name} c={level}: {summary['orders_per_sec']} orders/s, "
+                          f"p50 {summary['total']['p50_us']}us p99 {summary['total']['p99_us']}us "
+                          f"errors {summary['errors']}", file=sys.stderr)
+    if sink is not None:
+        sink.close()
+    return results
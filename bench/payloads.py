@@ -0,0 +1,23 @@
+# 벤치마크 공통 주문 payload (API 요청 body 형태, JSON)
+BINANCE_FUTURE_TRADE = {
+    "symbol": "BTCUSDT", "leverage": "20", "margin_type": "CROSSED", "side": "BUY", "position_side": "LONG",
+    "type": "MARKET", "quantity": "0.001", "use_ws_api": False,
+}
+BLOCKFIN_TRADE = {
+    "inst_id": "BTC-USDT", "margin_mode": "cross", "position_side": "long", "side": "buy", "order_type": "market",
+    "size": 0.01, "leverage": "20", "position_mode": "long_short_mode",
+}
+BITGET_TRADE = {
+    "symbol": "BTCUSDT", "side": "buy", "order_type": "market", "size": "10",
+}
+
+# 서명 입력 (실제 주문 경로와 같은 크기)
+BLOCKFIN_ORDER_BODY = {
+    "instId": "BTC-USDT", "marginMode": "cross", "positionSide": "long", "side": "buy",
+    "orderType": "market", "price": None, "size": "10.0",
+}
+BITGET_ORDER_BODY = {"symbol": "BTCUSDT", "side": "buy", "orderType": "market", "size": "10"}
+BINANCE_ORDER_PARAMS = {
+    "symbol": "BTCUSDT", "side": "BUY", "positionSide": "LONG", "type": "MARKET",
+    "timestamp": 1700000000000, "recvWindow": 60000, "quantity": "0.001",
+}
@@ -0,0 +1,34 @@
+import math
+
+
+def percentile(ordered: list, q: float) -> float:
+    # nearest-rank
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples_ns: list) -> dict:
+    """
+        ns 샘플 -> us 단위 요약
+        ops_per_sec: 해당 구간만 직렬로 처리할 때의 초당 처리량 (count / 총 소요시간)
+    """
+    ordered = sorted(samples_ns)
+    total = sum(ordered)
+    count = len(ordered)
+    return {
+        'count': count,
+        'mean_us': round(total / count / 1000, 3) if count else 0.0,
+        'p50_us': round(percentile(ordered, 50) / 1000, 3),
+        'p99_us': round(percentile(ordered, 99) / 1000, 3),
+        'p999_us': round(percentile(ordered, 99.9) / 1000, 3),
+        'max_us': round(ordered[-1] / 1000, 3) if count else 0.0,
+        'ops_per_sec': round(count / (total / 1e9), 1) if total else 0.0,
+    }
+
+
+def table(rows: list, columns: list) -> str:
+    widths = [max(len(str(column)), *(len(str(row[i])) for row in rows)) for i, column in enumerate(columns)]
+    lines = ['  '.join(str(column).ljust(width) for column, width in zip(columns, widths))]
+    lines += ['  '.join(str(value).ljust(width) for value, width in zip(row, widths)) for row in rows]
+    return '\n'.join(lines)
@@ -7,13 +7,16 @@ file = os.path.join(root, 'config')
 
 load_dotenv(os.path.join(file, 'config.env'))
 
-symbol_obj = {}
-
 BINANCE_API_KEY = os.getenv('BINANCE_API_KEY')
 BINANCE_API_SECRET = os.getenv('BINANCE_API_SECRET')
 BINANCE_BASE_URL = os.getenv('BINANCE_BASE_URL')
 BINANCE_BASE_F_URL = os.getenv('BINANCE_BASE_F_URL')
 BINANCE_WS_API_BASE_URL = os.getenv('BINANCE_WS_API_BASE_URL')
+BINANCE_WS_F_API_BASE_URL = os.getenv('BINANCE_WS_F_API_BASE_URL', 'wss://ws-fapi.binance.com/ws-fapi/v1')
+BINANCE_WS_API_KEY = os.getenv('BINANCE_WS_API_KEY', BINANCE_API_KEY)
+BINANCE_WS_API_PRIVATE_KEY = os.getenv('BINANCE_WS_API_PRIVATE_KEY')  # Ed25519 PEM 경로 (없으면 요청마다 HMAC 서명)
+BINANCE_WS_API_TIMEOUT = float(os.getenv('BINANCE_WS_API_TIMEOUT', 10))
+BINANCE_WS_ORDER_ENTRY = os.getenv('BINANCE_WS_ORDER_ENTRY', 'false').lower() == 'true'
 BINANCE_WS_STREAM_BASE_URL = os.getenv('BINANCE_WS_STREAM_BASE_URL')
 BINANCE_WS_F_STREAM_BASE_URL = os.getenv('BINANCE_WS_F_STREAM_BASE_URL')
 BINANCE_WS_COMBINED_STREAM_BASE_URL = os.getenv('BINANCE_WS_COMBINED_STREAM_BASE_URL')
@@ -31,4 +34,122 @@ BLOCKFIN_BASE_URL = os.getenv('BLOCKFIN_BASE_URL')
 BLOCKFIN_WS_BASE_URL = os.getenv('BLOCKFIN_WS_BASE_URL')
 BLOCKFIN_WS_PRIVATE_URL = os.getenv('BLOCKFIN_WS_PRIVATE_URL')
 
+# 로컬 모의 거래소 (python -m mock_exchange), 설정하면 모든 거래소 URL을 모의 서버로 변경
+MOCK_EXCHANGE_URL = os.getenv('MOCK_EXCHANGE_URL')  # 예: http://127.0.0.1:9100
+MOCK_EXCHANGE_PORT = int(os.getenv('MOCK_EXCHANGE_PORT', 9100))
+MOCK_TICK_INTERVAL = float(os.getenv('MOCK_TICK_INTERVAL', 0.1))
+MOCK_LATENCY_MS = float(os.getenv('MOCK_LATENCY_MS', 0))
+MOCK_JITTER_MS = float(os.getenv('MOCK_JITTER_MS', 0))
+MOCK_ERROR_RATE = float(os.getenv('MOCK_ERROR_RATE', 0))
+MOCK_RATE_LIMIT = float(os.getenv('MOCK_RATE_LIMIT', 0))  # 거래소별 초당 요청 수, 0: 제한 없음
+MOCK_BINANCE_WEIGHT_LIMIT = int(os.getenv('MOCK_BINANCE_WEIGHT_LIMIT', 6000))
+MOCK_WS_DROP_RATE = float(os.getenv('MOCK_WS_DROP_RATE', 0))
+if MOCK_EXCHANGE_URL:
+    MOCK_EXCHANGE_WS_URL = 'ws' + MOCK_EXCHANGE_URL[len('http'):]
+    BINANCE_BASE_URL = BINANCE_BASE_F_URL = f"{MOCK_EXCHANGE_URL}/binance"
+    BINANCE_WS_API_BASE_URL = f"{MOCK_EXCHANGE_WS_URL}/binance/ws-api/v3"
+    BINANCE_WS_F_API_BASE_URL = f"{MOCK_EXCHANGE_WS_URL}/binance/ws-fapi/v1"
+    BINANCE_WS_STREAM_BASE_URL = f"{MOCK_EXCHANGE_WS_URL}/binance/ws"
+    BINANCE_WS_F_STREAM_BASE_URL = f"{MOCK_EXCHANGE_WS_URL}/binance/fws"
+    BINANCE_WS_COMBINED_STREAM_BASE_URL = f"{MOCK_EXCHANGE_WS_URL}/binance/stream"
+    BITGET_BASE_URL = f"{MOCK_EXCHANGE_URL}/bitget"
+    BITGET_WS_BASE_URL = f"{MOCK_EXCHANGE_WS_URL}/bitget/ws"
+    BLOCKFIN_BASE_URL = f"{MOCK_EXCHANGE_URL}/blockfin"
+    BLOCKFIN_WS_BASE_URL = f"{MOCK_EXCHANGE_WS_URL}/blockfin/ws/public"
+    BLOCKFIN_WS_PRIVATE_URL = f"{MOCK_EXCHANGE_WS_URL}/blockfin/ws/private"
+
 SYMBOL_LIST = os.getenv('SYMBOL_LIST', "").split("/")
+
+# 거래소 HTTP 공용 트랜스포트
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 10))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3))
+HTTP_POOL_SIZE_PER_HOST = int(os.getenv('HTTP_POOL_SIZE_PER_HOST', 32))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', 30))
+HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL', 300))
+
+# 거래소 서버시간 동기화
+CLOCK_SYNC_SAMPLES = int(os.getenv('CLOCK_SYNC_SAMPLES', 5))
+CLOCK_SYNC_INTERVAL = float(os.getenv('CLOCK_SYNC_INTERVAL', 300))
+CLOCK_MAX_STALENESS = float(os.getenv('CLOCK_MAX_STALENESS', 3600))
+
+# 시세 websocket 허브
+HUB_QUEUE_SIZE = int(os.getenv('HUB_QUEUE_SIZE', 256))
+HUB_RECONNECT_MAX_DELAY = float(os.getenv('HUB_RECONNECT_MAX_DELAY', 30))
+
+# 로컬 호가창 (이 시간 동안 조회가 없으면 호가창 삭제 + 구독 해제, 정리 주기)
+ORDER_BOOK_IDLE_TIMEOUT = float(os.getenv('ORDER_BOOK_IDLE_TIMEOUT', 5 * 60))
+ORDER_BOOK_EVICT_INTERVAL = float(os.getenv('ORDER_BOOK_EVICT_INTERVAL', 30))
+# 바이낸스 snapshot 조회 연속 실패 허용 횟수 (넘으면 HUB_RECONNECT_MAX_DELAY 동안 쉼), 동기화 전 버퍼링할 최대 이벤트 수
+ORDER_BOOK_SNAPSHOT_RETRIES = int(os.getenv('ORDER_BOOK_SNAPSHOT_RETRIES', 5))
+ORDER_BOOK_BUFFER_SIZE = int(os.getenv('ORDER_BOOK_BUFFER_SIZE', 1000))
+
+# 현재가 캐시 (validate 시 허용하는 최대 시세 지연)
+PRICE_MAX_AGE_MS = float(os.getenv('PRICE_MAX_AGE_MS', 1000))
+
+# 심볼(상품) 메타데이터 캐시
+INSTRUMENT_SNAPSHOT_PATH = os.getenv('INSTRUMENT_SNAPSHOT_PATH', os.path.join(root, 'data', 'instruments.json'))
+INSTRUMENT_TTL = float(os.getenv('INSTRUMENT_TTL', 60 * 60))
+# 미등록 심볼 조회로 인한 전체 재조회는 거래소별 이 간격(초)에 1번만
+INSTRUMENT_MISS_TTL = float(os.getenv('INSTRUMENT_MISS_TTL', 10))
+
+# 시세 틱 기록 (channels: "venue:channel:inst_id" 콤마 구분, 비어 있으면 기록 안 함)
+RECORDER_PATH = os.getenv('RECORDER_PATH', os.path.join(root, 'data', 'ticks'))
+RECORDER_CHANNELS = os.getenv('RECORDER_CHANNELS', '')
+RECORDER_FLUSH_INTERVAL = float(os.getenv('RECORDER_FLUSH_INTERVAL', 1))
+RECORDER_INDEX_INTERVAL_MS = int(os.getenv('RECORDER_INDEX_INTERVAL_MS', 60 * 1000))
+
+# /metrics (이벤트 루프 지연 측정 주기, 0: 측정 안 함)
+METRICS_LOOP_LAG_INTERVAL = float(os.getenv('METRICS_LOOP_LAG_INTERVAL', 0.5))
+
+# 주문 trace (ring 크기, 체결 push 대기시간, DB 저장 여부/주기)
+TRACE_RING_SIZE = int(os.getenv('TRACE_RING_SIZE', 1000))
+TRACE_FILL_TIMEOUT = float(os.getenv('TRACE_FILL_TIMEOUT', 10))
+TRACE_DB_SINK = os.getenv('TRACE_DB_SINK', 'false').lower() == 'true'
+TRACE_SINK_INTERVAL = float(os.getenv('TRACE_SINK_INTERVAL', 1))
+
+# 로깅 (큐 기반 비동기 출력, format: text / json)
+# sampling: "채널prefix=비율:초당상한" 콤마 구분 (예: stream=0.01:10 -> 시세 로그 100건 중 1건, 초당 최대 10건)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOG_SAMPLING = os.getenv('LOG_SAMPLING', 'stream=0.01:10,private=1:20')
+
+# 거래소 요청 예산 (토큰 버킷, 주문 lane 우선)
+# reserve: 조회/메타데이터 요청이 남겨둬야 하는 weight 비율, max_wait: 예산 대기 최대 시간(초)
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_RESERVE = float(os.getenv('RATE_LIMIT_RESERVE', 0.2))
+RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', 2))
+
+# public GET 응답 캐시 (최대 항목 수, 엔드포인트별 TTL 초, 0: 캐시 안 함 - 동시 요청 묶기만)
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+CACHE_TTL_ORDER_BOOK = float(os.getenv('CACHE_TTL_ORDER_BOOK', 1))
+CACHE_TTL_SYMBOLS = float(os.getenv('CACHE_TTL_SYMBOLS', 60))
+CACHE_TTL_AFFILIATES = float(os.getenv('CACHE_TTL_AFFILIATES', 30))
+
+# 멀티 계정 (DB 자격증명 암호화 키, 유휴 계정 정리, 계정당 REST 동시 요청 수, private 연결당 구독 수)
+ACCOUNT_ENCRYPTION_KEY = os.getenv('ACCOUNT_ENCRYPTION_KEY')
+ACCOUNT_IDLE_TIMEOUT = float(os.getenv('ACCOUNT_IDLE_TIMEOUT', 30 * 60))
+ACCOUNT_EVICT_INTERVAL = float(os.getenv('ACCOUNT_EVICT_INTERVAL', 60))
+ACCOUNT_HTTP_CONCURRENCY = int(os.getenv('ACCOUNT_HTTP_CONCURRENCY', 4))
+PRIVATE_WS_MAX_SUBSCRIPTIONS = int(os.getenv('PRIVATE_WS_MAX_SUBSCRIPTIONS', 50))
+
+# 멀티 워커 모드 (local: 프로세스마다 업스트림 직접 연결, shm: ingest 프로세스가 공유메모리 링으로 배포)
+# 세션 서명키는 모든 워커가 같아야 함 (미설정 시 shm 모드는 SESSION_SECRET_PATH 파일을 처음 만든 값으로 공유, local 은 프로세스마다 새로 생성)
+MARKET_DATA_MODE = os.getenv('MARKET_DATA_MODE', 'local')
+MARKET_RING_NAME = os.getenv('MARKET_RING_NAME', 'cointrading_market')
+MARKET_RING_SLOTS = int(os.getenv('MARKET_RING_SLOTS', 4096))
+MARKET_RING_SLOT_SIZE = int(os.getenv('MARKET_RING_SLOT_SIZE', 16 * 1024))
+# 링이 비어 있으면 MARKET_RING_POLL_INTERVAL 부터 두 배씩 MARKET_RING_POLL_MAX_INTERVAL 까지 늘려가며 대기 (유휴 워커 wakeup 감소)
+MARKET_RING_POLL_INTERVAL = float(os.getenv('MARKET_RING_POLL_INTERVAL', 0.001))
+MARKET_RING_POLL_MAX_INTERVAL = float(os.getenv('MARKET_RING_POLL_MAX_INTERVAL', 0.02))
+INGEST_CONTROL_HOST = os.getenv('INGEST_CONTROL_HOST', '127.0.0.1')
+INGEST_CONTROL_PORT = int(os.getenv('INGEST_CONTROL_PORT', 9101))
+SESSION_SECRET_KEY = os.getenv('SESSION_SECRET_KEY')
+SESSION_SECRET_PATH = os.getenv('SESSION_SECRET_PATH', os.path.join(root, 'data', 'session_secret'))
+
+# 거래소 통합 BBO (core/bbo.py): 대상 venue, 이 시간보다 오래된 venue 호가는 best 계산에서 제외, 구독자가 없어진 뒤 업스트림 유지 시간
+BBO_VENUES = os.getenv('BBO_VENUES', 'binance_future,bitget_future,blockfin')
+BBO_STALE_MS = float(os.getenv('BBO_STALE_MS', 5000))
+BBO_LINGER = float(os.getenv('BBO_LINGER', 30))
+# 요청 1건(REST / websocket)에 지정할 수 있는 최대 심볼 수
+BBO_MAX_SYMBOLS = int(os.getenv('BBO_MAX_SYMBOLS', 50))
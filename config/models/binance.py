@@ -13,6 +13,7 @@ class BinanceSpotTrade(BinanceSymbol):
     time_in_force: Optional[str] = Field(default=None, description="Only required for limit orders")
     price: Optional[str] = Field(default=None, description="Only required for limit orders")
     force: Optional[str] = Field(default=None, description="Only required for limit orders")
+    use_ws_api: Optional[bool] = Field(default=None, description="Send the order over the WebSocket API (default: BINANCE_WS_ORDER_ENTRY)")
 
 
 class BinanceFutureTrade(BinanceSymbol):
@@ -25,6 +26,7 @@ class BinanceFutureTrade(BinanceSymbol):
     quantity: Optional[str] = Field(default=None, description="Required for limit orders")
     price: Optional[str] = Field(default=None, description="Only required for limit orders")
     quote_order_qty: Optional[str] = Field(default=None, description="Only required for limit orders")
+    use_ws_api: Optional[bool] = Field(default=None, description="Send the order over the WebSocket API (default: BINANCE_WS_ORDER_ENTRY)")
 
 
 class BinanceWithdrawal(Base):
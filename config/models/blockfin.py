@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, List
 
 from .base import *
 
@@ -42,4 +42,7 @@ class BlockFinLeverage(Base):
     inst_id: str
     leverage: str
     margin_mode: str
-    position_side: Optional[str] = Field(default=None)
\ No newline at end of file
+    position_side: Optional[str] = Field(default=None)
+
+class StrategyControl(Base):
+    names: Optional[List[str]] = Field(default=None, description="SETTINGS key (BTC_LONG ...), 미지정 시 전체")
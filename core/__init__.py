@@ -0,0 +1,6 @@
+import os
+import sys
+
+from .transport import transport, ExchangeTransport
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
@@ -0,0 +1,77 @@
+import asyncio
+
+
+class AccountConfigCache:
+    """
+        계정/심볼별 레버리지, 마진모드, 포지션모드 현재값 캐시
+        - 값이 바뀐 설정만 거래소에 요청, 서로 독립적인 설정은 동시에 요청
+        - 설정 실패/주문 에러 시 invalidate, 계정 스트림 push로 update
+        - inst_id=None 은 계정 단위 설정(포지션모드 등)
+    """
+    def __init__(self):
+        self.state = {}
+        self.locks = {}
+
+    @staticmethod
+    def normalize(value):
+        return str(value).lower()
+
+    def get(self, account: str, inst_id: str = None) -> dict:
+        return dict(self.state.get((account, inst_id), {}))
+
+    def update(self, account: str, inst_id: str = None, **values):
+        current = self.state.setdefault((account, inst_id), {})
+        for name, value in values.items():
+            if value is not None:
+                current[name] = self.normalize(value)
+
+    def invalidate(self, account: str, inst_id: str = None, *names):
+        if not names:
+            self.state.pop((account, inst_id), None)
+            return
+        current = self.state.get((account, inst_id), {})
+        for name in names:
+            current.pop(name, None)
+
+    def forget(self, account: str):
+        # 계정 eviction 시 해당 계정의 모든 심볼 상태 제거
+        for key in [key for key in self.state if key[0] == account]:
+            self.state.pop(key, None)
+            self.locks.pop(key, None)
+
+    async def ensure(self, account: str, inst_id: str, desired: dict, setters: dict) -> dict:
+        """
+            :param desired: {설정명: 원하는 값}, None 값은 무시
+            :param setters: {설정명: async () -> (성공여부, 응답)}
+            :return: 실제로 요청한 설정의 {설정명: 응답}
+        """
+        key = (account, inst_id)
+        lock = self.locks.setdefault(key, asyncio.Lock())
+
+        async with lock:
+            current = self.state.setdefault(key, {})
+            changed = [name for name, value in desired.items()
+                       if value is not None and current.get(name) != self.normalize(value)]
+            if not changed:
+                return {}
+
+            results = await asyncio.gather(*(setters[name]() for name in changed))
+
+            responses = {}
+            for name, (is_ok, response) in zip(changed, results):
+                responses[name] = response
+                if is_ok:
+                    current[name] = self.normalize(desired[name])
+                else:
+                    current.pop(name, None)
+            return responses
+
+    def update_from_blockfin_positions(self, account: str, positions: list):
+        # 블록핀 positions 채널 push로 현재값 갱신
+        for position in positions:
+            self.update(account, None, margin_mode=position.get('marginMode'))
+            self.update(account, position.get('instId'),
+                        **{f"leverage:{position.get('positionSide')}": position.get('leverage')})
+
+
+account_config = AccountConfigCache()
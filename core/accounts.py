@@ -0,0 +1,250 @@
+import time
+import asyncio
+
+from fastapi import HTTPException
+from starlette.requests import HTTPConnection
+
+from core.cache import SingleFlight
+from core.transport import transport
+from core.rate_limit import rate_limiter
+from core.account_state import account_config
+from core.metrics import metrics, ACCOUNTS_LOADED, ACCOUNT_EVICTIONS
+from config.config import (BINANCE_API_KEY, BINANCE_API_SECRET, BITGET_API_KEY, BITGET_API_SECRET, BITGET_API_PASSPHRASE,
+                           BLOCKFIN_API_KEY, BLOCKFIN_API_SECRET, BLOCKFIN_API_PASSPHRASE,
+                           ACCOUNT_ENCRYPTION_KEY, ACCOUNT_IDLE_TIMEOUT, ACCOUNT_EVICT_INTERVAL, ACCOUNT_HTTP_CONCURRENCY)
+
+
+# config.env 키 (uid 없이 들어온 요청, 전략 엔진이 쓰는 기본 계정)
+DEFAULT_CREDENTIALS = {
+    'binance': (BINANCE_API_KEY, BINANCE_API_SECRET, None),
+    'bitget': (BITGET_API_KEY, BITGET_API_SECRET, BITGET_API_PASSPHRASE),
+    'blockfin': (BLOCKFIN_API_KEY, BLOCKFIN_API_SECRET, BLOCKFIN_API_PASSPHRASE),
+}
+
+
+class Account:
+    """
+        거래소 계정 1개
+        - signer / private session 은 처음 쓸 때 거래소별 factory 로 생성
+        - REST 는 공용 커넥션 풀을 쓰되 계정당 동시 요청 수를 http_limit 으로 제한 (한 계정이 풀을 독점하지 않도록)
+        - key: account_config, rate limiter 가 쓰는 "거래소:api_key"
+    """
+    def __init__(self, exchange: str, uid, api_key: str, secret_key: str, passphrase: str = None,
+                 http_limit: int = ACCOUNT_HTTP_CONCURRENCY, pinned: bool = False):
+        self.exchange = exchange
+        self.uid = uid
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.passphrase = passphrase
+        self.key = f"{exchange}:{api_key}"
+        self.http = asyncio.Semaphore(http_limit) if http_limit else None
+        self.in_flight = 0
+        self.pinned = pinned
+        self.last_used = time.monotonic()
+        self._signer = None
+        self._session = None
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    @property
+    def signer(self):
+        if self._signer is None:
+            self._signer = accounts.factory(self.exchange, 'signer')(self)
+        return self._signer
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = accounts.factory(self.exchange, 'session')(self)
+        return self._session
+
+    async def request(self, method: str, url: str, **kwargs):
+        self.touch()
+        self.in_flight += 1
+        try:
+            if self.http is None:
+                return await transport.request(method, url, **kwargs)
+            async with self.http:
+                return await transport.request(method, url, **kwargs)
+        finally:
+            self.in_flight -= 1
+            self.touch()
+
+    async def get(self, url: str, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    def busy(self) -> bool:
+        return bool(self.in_flight or (self._session is not None and self._session.subscribers))
+
+    async def close(self):
+        release = accounts.factories.get(self.exchange, {}).get('release')
+        if self._session is not None and release is not None:
+            await release(self)
+        self._session = None
+        self._signer = None
+
+
+class AccountRegistry:
+    """
+        (거래소, uid) -> Account
+        - DB(exchange_account) 에서 처음 요청 시 로드, 동시 로드는 SingleFlight 로 1번
+        - ACCOUNT_IDLE_TIMEOUT 동안 안 쓰고 스트림 구독도 없는 계정은 private 연결 / 캐시 상태와 함께 정리
+        - 거래소 모듈이 register() 로 signer / session factory 를 등록
+    """
+    def __init__(self, idle_timeout: float = ACCOUNT_IDLE_TIMEOUT, evict_interval: float = ACCOUNT_EVICT_INTERVAL):
+        self.idle_timeout = idle_timeout
+        self.evict_interval = evict_interval
+        self.accounts = {}
+        self.factories = {}
+        self.flights = SingleFlight()
+        self.task = None
+
+    def register(self, exchange: str, signer=None, session=None, release=None):
+        """
+            :param signer: (account) -> 서명 객체
+            :param session: (account) -> private stream 세션
+            :param release: async (account) -> 세션 정리
+        """
+        self.factories[exchange] = dict(signer=signer, session=session, release=release)
+
+    def factory(self, exchange: str, name: str):
+        factory = self.factories.get(exchange, {}).get(name)
+        if factory is None:
+            raise LookupError(f"{exchange}: no {name} factory registered")
+        return factory
+
+    def default(self, exchange: str) -> Account:
+        account = self.accounts.get((exchange, None))
+        if account is None:
+            api_key, secret_key, passphrase = DEFAULT_CREDENTIALS[exchange]
+            account = self.accounts[(exchange, None)] = Account(exchange, None, api_key, secret_key, passphrase,
+                                                                http_limit=0, pinned=True)
+        return account
+
+    def add(self, account: Account) -> Account:
+        previous = self.accounts.get((account.exchange, account.uid))
+        if previous is not None and previous.api_key == account.api_key:
+            return previous
+        self.accounts[(account.exchange, account.uid)] = account
+        if previous is not None:
+            asyncio.ensure_future(self.discard(previous))
+        return account
+
+    async def get(self, exchange: str, uid=None) -> Account:
+        """
+            :return: uid 가 없으면 기본 계정, DB 에 없으면 None
+        """
+        if uid is None:
+            account = self.default(exchange)
+        else:
+            account = self.accounts.get((exchange, uid))
+            if account is None:
+                try:
+                    account = await self.flights.do((exchange, uid), lambda: self.load(exchange, uid))
+                except Exception as e:
+                    print(f"[accounts] {exchange}:{uid} 로드 실패: {e}")
+                    return None
+        if account is not None:
+            account.touch()
+        return account
+
+    async def load(self, exchange: str, uid) -> Account:
+        from db import db
+        from db.models import ExchangeAccount
+        async with db.session_maker() as session:
+            row = (await db.select(session, ExchangeAccount,
+                                   columns=(ExchangeAccount.api_key,
+                                            db.func('pgp_sym_decrypt')(ExchangeAccount.secret_key, ACCOUNT_ENCRYPTION_KEY),
+                                            db.func('pgp_sym_decrypt')(ExchangeAccount.passphrase, ACCOUNT_ENCRYPTION_KEY)),
+                                   conditions=(ExchangeAccount.exchange == exchange, ExchangeAccount.uid == uid,
+                                               ExchangeAccount.is_active.is_(True)))).first()
+        if row is None:
+            return None
+        # 로드 중에 add() 된 계정이 있으면 그쪽 유지
+        return self.accounts.get((exchange, uid)) or self.add(Account(exchange, uid, *row))
+
+    async def save(self, account: Account):
+        from db import db
+        from db.models import User, ExchangeAccount
+        encrypt = db.func('pgp_sym_encrypt')
+        async with db.session_maker() as session:
+            await db.bulk_upsert(session, User, [dict(uid=account.uid)], index_elements=['uid'], update_columns=[],
+                                 commit=False)
+            await db.bulk_upsert(session, ExchangeAccount, [dict(
+                uid=account.uid, exchange=account.exchange, api_key=account.api_key, is_active=True,
+                secret_key=encrypt(account.secret_key, ACCOUNT_ENCRYPTION_KEY),
+                passphrase=encrypt(account.passphrase, ACCOUNT_ENCRYPTION_KEY) if account.passphrase else None,
+            )], index_elements=['exchange', 'uid'])
+
+    async def discard(self, account: Account):
+        if self.accounts.get((account.exchange, account.uid)) is account:
+            del self.accounts[(account.exchange, account.uid)]
+        await account.close()
+        account_config.forget(account.key)
+        rate_limiter.forget(account.api_key)
+
+    async def evict(self):
+        deadline = time.monotonic() - self.idle_timeout
+        idle = [account for account in self.accounts.values()
+                if not account.pinned and account.last_used < deadline and not account.busy()]
+        for account in idle:
+            await self.discard(account)
+            ACCOUNT_EVICTIONS.labels(account.exchange).inc()
+        return len(idle)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.evict_interval)
+            try:
+                await self.evict()
+            except Exception as e:
+                print(f"[accounts] 정리 실패: {e}")
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        await asyncio.gather(*(account.close() for account in self.accounts.values()), return_exceptions=True)
+        self.accounts.clear()
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            'loaded': len(self.accounts),
+            'accounts': [{'exchange': account.exchange, 'uid': account.uid, 'idle_seconds': round(now - account.last_used, 1),
+                          'in_flight': account.in_flight, 'session': account._session is not None}
+                         for account in self.accounts.values()],
+        }
+
+
+accounts = AccountRegistry()
+
+
+def account_dependency(exchange: str):
+    """
+        라우터용 Depends: /validate 로 로그인한 세션 uid 의 계정, uid 가 없으면 config 기본 계정
+    """
+    async def current_account(connection: HTTPConnection) -> Account:
+        account = await accounts.get(exchange, connection.session.get('uid'))
+        if account is None:
+            raise HTTPException(status_code=401, detail="Unknown account")
+        return account
+    return current_account
+
+
+@metrics.on_collect
+def collect_accounts():
+    counts = {}
+    for exchange, _ in tuple(accounts.accounts):
+        counts[exchange] = counts.get(exchange, 0) + 1
+    for exchange in accounts.factories.keys() | counts.keys():
+        ACCOUNTS_LOADED.labels(exchange).set(counts.get(exchange, 0))
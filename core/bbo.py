@@ -0,0 +1,264 @@
+import json
+import time
+import asyncio
+
+from core.hub import hub
+from core.instruments import instruments
+from core.metrics import metrics, BBO_TICKS, BBO_CONFLATED, BBO_SYMBOLS
+from config.config import BBO_VENUES, BBO_STALE_MS, BBO_LINGER
+
+
+QUOTES = ('USDT', 'USDC', 'FDUSD', 'BUSD', 'USD', 'BTC', 'ETH')
+# bitget v1 선물 상품 접미사 (정산 통화별)
+BITGET_SUFFIXES = {'USDT': '_UMCBL', 'USDC': '_CMCBL', 'USD': '_DMCBL'}
+
+
+def now_ms() -> float:
+    return time.time() * 1000
+
+
+def split_symbol(symbol: str) -> tuple:
+    # BTCUSDT, btcusdt, BTC-USDT, BTCUSDT_UMCBL -> ('BTC', 'USDT')
+    symbol = symbol.upper().split('_')[0]
+    if '-' in symbol:
+        base, quote = symbol.split('-')[:2]
+        return base, quote
+    for quote in QUOTES:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)], quote
+    return symbol, None
+
+
+def normalize(symbol: str) -> str:
+    base, quote = split_symbol(symbol)
+    return f"{base}-{quote}" if quote else base
+
+
+# venue -> (base, quote) -> (허브 inst_id, instruments 심볼: 상장 여부 확인용, 없으면 확인 안 함)
+VENUE_SYMBOLS = {
+    'blockfin': lambda base, quote: (f"{base}-{quote}", f"{base}-{quote}"),
+    'binance_spot': lambda base, quote: (f"{base}{quote}".lower(), f"{base}{quote}"),
+    'binance_future': lambda base, quote: (f"{base}{quote}".lower(), f"{base}{quote}"),
+    'bitget_spot': lambda base, quote: (f"{base}{quote}", None),
+    'bitget_future': lambda base, quote: (f"{base}{quote}{BITGET_SUFFIXES[quote]}", None) if quote in BITGET_SUFFIXES else None,
+}
+
+
+def first(data):
+    return data[0] if isinstance(data, list) else data
+
+
+# 채널별 메시지 -> {bid, bid_size, ask, ask_size, last}
+def blockfin_tickers(data: dict) -> dict:
+    ticker = first(data['data'])
+    return {"bid": ticker.get('bidPrice'), "bid_size": ticker.get('bidSize'), "ask": ticker.get('askPrice'),
+            "ask_size": ticker.get('askSize'), "last": ticker.get('last')}
+
+
+def binance_book_ticker(data: dict) -> dict:
+    event = data.get('data', data)
+    return {"bid": event['b'], "bid_size": event.get('B'), "ask": event['a'], "ask_size": event.get('A')}
+
+
+def binance_ticker(data: dict) -> dict:
+    return {"last": data.get('data', data)['c']}
+
+
+def bitget_ticker(data: dict) -> dict:
+    ticker = first(data['data'])
+    return {"bid": ticker.get('bidPr'), "bid_size": ticker.get('bidSz'), "ask": ticker.get('askPr'),
+            "ask_size": ticker.get('askSz'), "last": ticker.get('lastPr')}
+
+
+FEEDS = {
+    'blockfin': (('tickers', blockfin_tickers),),
+    'binance_spot': (('bookTicker', binance_book_ticker), ('ticker', binance_ticker)),
+    'binance_future': (('bookTicker', binance_book_ticker), ('ticker', binance_ticker)),
+    'bitget_spot': (('ticker', bitget_ticker),),
+    'bitget_future': (('ticker', bitget_ticker),),
+}
+
+
+class BboClient:
+    """
+        websocket 클라이언트 1개의 송신 대기열
+        - 심볼당 가장 최근 업데이트 1개만 보관 (느린 클라이언트는 중간 값을 건너뛰고 최신 값을 받음)
+    """
+    def __init__(self):
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def put(self, symbol: str, text: str):
+        if symbol in self.pending:
+            BBO_CONFLATED.labels().inc()
+        self.pending[symbol] = text
+        self.ready.set()
+
+    async def get(self) -> list:
+        await self.ready.wait()
+        self.ready.clear()
+        texts = list(self.pending.values())
+        self.pending.clear()
+        return texts
+
+
+class ConsolidatedQuote:
+    """
+        정규화 심볼 1개의 venue 별 호가 + 통합 best bid / best ask / 최종체결가
+    """
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.venues = {}
+        self.best = {}
+        self.clients = set()
+        self.subscriptions = []
+        self.refs = 0
+        self.linger = None
+        self.updated = asyncio.Event()
+
+    def apply(self, venue: str, values: dict, stale_ms: float) -> str:
+        quote = self.venues.setdefault(venue, {})
+        timestamp = now_ms()
+        for name, value in values.items():
+            if value is not None and value != '':
+                quote[name] = float(value)
+        if values.get('last') not in (None, ''):
+            quote['last_ts'] = timestamp
+        quote['ts'] = timestamp
+        self.best = self.consolidate(timestamp, stale_ms)
+        self.updated.set()
+        # 클라이언트에는 통합 값 + 이번에 갱신된 venue 호가만 전송
+        return json.dumps({"symbol": self.symbol, **self.best, "venue": venue, "quote": quote})
+
+    def consolidate(self, timestamp: float, stale_ms: float) -> dict:
+        best = {"bid": None, "bid_size": None, "bid_venue": None, "ask": None, "ask_size": None, "ask_venue": None,
+                "last": None, "last_venue": None, "ts": timestamp}
+        last_ts = 0
+        for venue, quote in self.venues.items():
+            if timestamp - quote['ts'] > stale_ms:
+                continue
+            bid, ask = quote.get('bid'), quote.get('ask')
+            if bid is not None and (best['bid'] is None or bid > best['bid']):
+                best.update(bid=bid, bid_size=quote.get('bid_size'), bid_venue=venue)
+            if ask is not None and (best['ask'] is None or ask < best['ask']):
+                best.update(ask=ask, ask_size=quote.get('ask_size'), ask_venue=venue)
+            if quote.get('last_ts', 0) > last_ts:
+                last_ts = quote['last_ts']
+                best.update(last=quote['last'], last_venue=venue)
+        return best
+
+    def snapshot(self, stale_ms: float) -> dict:
+        # 조회 시점 기준으로 stale venue 를 다시 걸러서 계산
+        return {"symbol": self.symbol, **self.consolidate(now_ms(), stale_ms),
+                "venues": {venue: dict(quote) for venue, quote in self.venues.items()}}
+
+
+class BboService:
+    """
+        거래소 통합 BBO / 최종체결가
+        - 심볼을 BTC-USDT 형태로 정규화해서 venue 별 허브 구독 (binance bookTicker+ticker, bitget ticker, blockfin tickers)
+        - venue 틱마다 통합 best 를 다시 계산하고 JSON 은 1번만 만들어 구독 클라이언트 전체에 전달
+        - 심볼별 참조 카운트, 마지막 클라이언트가 나간 뒤 linger 초 동안 업스트림 구독 유지 (REST 폴링 / 재접속 대비)
+        - stale_ms 보다 오래된 venue 호가는 best 계산에서 제외
+    """
+    def __init__(self, venues: str = BBO_VENUES, stale_ms: float = BBO_STALE_MS, linger: float = BBO_LINGER):
+        self.venues = [venue.strip() for venue in venues.split(',') if venue.strip()]
+        self.stale_ms = stale_ms
+        self.linger = linger
+        self.quotes = {}
+        self.lock = asyncio.Lock()
+
+    def venue_symbols(self, symbol: str) -> dict:
+        """
+            :return: {venue: 허브 inst_id} (instruments 에 상장 정보가 있는데 없는 심볼이면 제외)
+        """
+        base, quote = split_symbol(symbol)
+        result = {}
+        for venue in self.venues:
+            mapped = VENUE_SYMBOLS[venue](base, quote) if quote else None
+            if mapped is None:
+                continue
+            inst_id, listed = mapped
+            if listed is not None and instruments.instruments.get(venue) and instruments.get(venue, listed) is None:
+                continue
+            result[venue] = inst_id
+        return result
+
+    def listener(self, consolidated: ConsolidatedQuote, venue: str, parse):
+        def on_message(message):
+            try:
+                values = parse(message.data)
+            except (KeyError, IndexError, TypeError):
+                return
+            BBO_TICKS.labels(venue).inc()
+            text = consolidated.apply(venue, values, self.stale_ms)
+            for client in consolidated.clients:
+                client.put(consolidated.symbol, text)
+        return on_message
+
+    async def acquire(self, symbol: str) -> ConsolidatedQuote:
+        symbol = normalize(symbol)
+        async with self.lock:
+            consolidated = self.quotes.get(symbol)
+            if consolidated is None:
+                consolidated = self.quotes[symbol] = ConsolidatedQuote(symbol)
+                for venue, inst_id in self.venue_symbols(symbol).items():
+                    for channel, parse in FEEDS[venue]:
+                        consolidated.subscriptions.append(
+                            await hub.subscribe(venue, channel, inst_id, listener=self.listener(consolidated, venue, parse)))
+            if consolidated.linger is not None:
+                consolidated.linger.cancel()
+                consolidated.linger = None
+            consolidated.refs += 1
+        return consolidated
+
+    def release(self, consolidated: ConsolidatedQuote):
+        consolidated.refs -= 1
+        if consolidated.refs <= 0 and consolidated.linger is None:
+            consolidated.linger = asyncio.get_running_loop().call_later(
+                self.linger, lambda: asyncio.ensure_future(self.drop(consolidated)))
+
+    async def drop(self, consolidated: ConsolidatedQuote):
+        async with self.lock:
+            consolidated.linger = None
+            if consolidated.refs > 0 or self.quotes.get(consolidated.symbol) is not consolidated:
+                return
+            del self.quotes[consolidated.symbol]
+            for subscription in consolidated.subscriptions:
+                await hub.unsubscribe(subscription)
+
+    async def snapshot(self, symbol: str, timeout: float = 2) -> dict:
+        # 처음 보는 심볼은 구독 후 첫 틱까지 대기 (linger 동안 구독 유지)
+        consolidated = await self.acquire(symbol)
+        try:
+            if not consolidated.venues:
+                try:
+                    await asyncio.wait_for(consolidated.updated.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return consolidated.snapshot(self.stale_ms)
+        finally:
+            self.release(consolidated)
+
+    def attach(self, client: BboClient, consolidated: ConsolidatedQuote):
+        consolidated.clients.add(client)
+        if consolidated.venues:
+            client.put(consolidated.symbol, json.dumps(consolidated.snapshot(self.stale_ms)))
+
+    def detach(self, client: BboClient, consolidated: ConsolidatedQuote):
+        consolidated.clients.discard(client)
+        self.release(consolidated)
+
+    async def close(self):
+        for consolidated in tuple(self.quotes.values()):
+            if consolidated.linger is not None:
+                consolidated.linger.cancel()
+            consolidated.refs = 0
+            await self.drop(consolidated)
+
+    def collect(self):
+        BBO_SYMBOLS.labels().set(len(self.quotes))
+
+
+bbo = BboService()
+metrics.on_collect(bbo.collect)
@@ -0,0 +1,102 @@
+import json
+import time
+import asyncio
+
+from collections import OrderedDict
+
+from fastapi import Response
+
+from core.metrics import metrics, CACHE_REQUESTS, CACHE_ENTRIES
+from config.config import CACHE_MAX_ENTRIES
+
+
+class SingleFlight:
+    """
+        같은 key 로 동시에 들어온 호출은 진행 중인 1개의 결과를 같이 기다림
+        - 첫 호출자가 취소돼도 나머지가 기다리는 upstream 호출은 계속 진행 (shield)
+        - 예외도 같이 전달, 끝나면 바로 제거 (결과 보관은 ResponseCache 가 담당)
+    """
+    def __init__(self):
+        self.calls = {}
+
+    def running(self, key) -> bool:
+        return key in self.calls
+
+    async def do(self, key, loader):
+        task = self.calls.get(key)
+        if task is None:
+            task = self.calls[key] = asyncio.ensure_future(loader())
+            task.add_done_callback(lambda _: self.calls.pop(key, None))
+        return await asyncio.shield(task)
+
+
+class ResponseCache:
+    """
+        public GET 응답 캐시 (직렬화된 JSON bytes 보관)
+        - key 별 TTL, 최대 max_entries 개 LRU
+        - miss 는 SingleFlight 로 묶어서 upstream 호출 1번
+        - cacheable(result) 가 False 인 응답(거래소 에러 코드 등)은 돌려주기만 하고 저장 안 함
+    """
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (expires_at, body)
+        self.flights = SingleFlight()
+
+    @staticmethod
+    def serialize(result) -> bytes:
+        # fastapi JSONResponse 와 같은 포맷
+        return json.dumps(result, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+    def lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def store(self, key, body: bytes, ttl: float):
+        self.entries[key] = (time.monotonic() + ttl, body)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def get(self, key: tuple, ttl: float, loader, cacheable=None) -> bytes:
+        """
+            :param key: (endpoint, *params) 튜플, 첫 값은 지표 라벨로 사용
+            :param loader: upstream 조회 coroutine function (JSON 직렬화 가능한 결과 반환)
+        """
+        body = self.lookup(key)
+        if body is not None:
+            CACHE_REQUESTS.labels(key[0], 'hit').inc()
+            return body
+        CACHE_REQUESTS.labels(key[0], 'coalesced' if self.flights.running(key) else 'miss').inc()
+
+        async def load() -> bytes:
+            result = await loader()
+            body = self.serialize(result)
+            if ttl > 0 and (cacheable is None or cacheable(result)):
+                self.store(key, body, ttl)
+            return body
+
+        return await self.flights.do(key, load)
+
+    async def response(self, key: tuple, ttl: float, loader, cacheable=None) -> Response:
+        return Response(await self.get(key, ttl, loader, cacheable), media_type='application/json')
+
+    def invalidate(self, endpoint: str = None):
+        if endpoint is None:
+            self.entries.clear()
+            return
+        for key in [key for key in self.entries if key[0] == endpoint]:
+            del self.entries[key]
+
+
+response_cache = ResponseCache()
+
+
+@metrics.on_collect
+def collect_cache():
+    CACHE_ENTRIES.labels().set(len(response_cache.entries))
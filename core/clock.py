@@ -0,0 +1,142 @@
+import time
+import asyncio
+import statistics
+
+from collections import deque
+
+from core.transport import transport
+from config.config import (BINANCE_BASE_URL, BINANCE_BASE_F_URL, BITGET_BASE_URL,
+                           CLOCK_SYNC_SAMPLES, CLOCK_SYNC_INTERVAL, CLOCK_MAX_STALENESS)
+
+
+def local_ms() -> float:
+    return time.time() * 1000
+
+
+class ExchangeClock:
+    """
+        거래소 서버시간 오프셋 추정 (NTP 방식)
+        - 표본마다 offset = 서버시간 - (요청시각 + 응답시각) / 2
+        - RTT가 짧은 표본 절반의 중앙값을 오프셋으로 사용
+        - 동기화 이력으로 drift(ms/ms)를 추정해 다음 동기화까지 보정
+    """
+    def __init__(self, name: str, base_url: str, path: str, parse,
+                 samples: int = CLOCK_SYNC_SAMPLES,
+                 interval: float = CLOCK_SYNC_INTERVAL,
+                 max_staleness: float = CLOCK_MAX_STALENESS):
+        self.name = name
+        self.base_url = base_url
+        self.path = path
+        self.parse = parse
+        self.samples = samples
+        self.interval = interval
+        self.max_staleness = max_staleness
+
+        self.offset_ms = 0.0
+        self.drift = 0.0
+        self.rtt_ms = None
+        self.synced_at = None
+        self.history = deque(maxlen=16)
+        self.lock = asyncio.Lock()
+        self.task = None
+
+    async def sample(self) -> tuple:
+        sent = local_ms()
+        server_time = float(self.parse(await transport.get(f"{self.base_url}{self.path}")))
+        received = local_ms()
+        midpoint = (sent + received) / 2
+        return server_time - midpoint, received - sent, midpoint
+
+    async def sync(self, if_stale: bool = False):
+        async with self.lock:
+            # 락을 기다리는 동안 다른 호출이 이미 동기화했으면 생략
+            if if_stale and not self.is_stale():
+                return
+            # 표본끼리 간섭하지 않도록 순차 요청
+            results = [await self.sample() for _ in range(self.samples)]
+            results.sort(key=lambda result: result[1])
+            best = results[:max(1, len(results) // 2)]
+
+            offset = statistics.median(result[0] for result in best)
+            synced_at = statistics.median(result[2] for result in best)
+            self.history.append((synced_at, offset))
+
+            if len(self.history) >= 2:
+                xs = [point[0] for point in self.history]
+                ys = [point[1] for point in self.history]
+                x_mean = statistics.fmean(xs)
+                y_mean = statistics.fmean(ys)
+                denominator = sum((x - x_mean) ** 2 for x in xs)
+                if denominator:
+                    self.drift = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / denominator
+
+            self.offset_ms = offset
+            self.rtt_ms = best[0][1]
+            self.synced_at = synced_at
+
+    def staleness(self) -> float:
+        if self.synced_at is None:
+            return None
+        return (local_ms() - self.synced_at) / 1000
+
+    def is_stale(self) -> bool:
+        staleness = self.staleness()
+        return staleness is None or staleness > self.max_staleness
+
+    def now(self) -> int:
+        local = local_ms()
+        elapsed = local - self.synced_at if self.synced_at is not None else 0
+        return int(local + self.offset_ms + self.drift * elapsed)
+
+    async def timestamp(self) -> str:
+        # 첫 호출이거나 동기화가 오래됐으면 그때만 서버시간 조회
+        if self.is_stale():
+            await self.sync(if_stale=True)
+        return str(self.now())
+
+    async def run(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"[{self.name}] 서버시간 동기화 실패: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "offset_ms": self.offset_ms,
+            "drift_ppm": self.drift * 1e6,
+            "rtt_ms": self.rtt_ms,
+            "synced_at": int(self.synced_at) if self.synced_at is not None else None,
+            "staleness_sec": self.staleness(),
+        }
+
+
+clocks = {
+    'binance_spot': ExchangeClock('binance_spot', BINANCE_BASE_URL, '/api/v3/time',
+                                  parse=lambda response: response['serverTime']),
+    'binance_future': ExchangeClock('binance_future', BINANCE_BASE_F_URL, '/fapi/v1/time',
+                                    parse=lambda response: response['serverTime']),
+    'bitget': ExchangeClock('bitget', BITGET_BASE_URL, '/public/time',
+                            parse=lambda response: response['data']['serverTime']),
+}
+
+
+def start_clocks():
+    for clock in clocks.values():
+        clock.start()
+
+
+async def stop_clocks():
+    await asyncio.gather(*(clock.stop() for clock in clocks.values()))
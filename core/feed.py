@@ -0,0 +1,163 @@
+import json
+import asyncio
+
+from core.hub import hub, Venue, Message
+from core.ring import RingReader
+from core.metrics import metrics, WS_MESSAGES, WS_STREAM_MESSAGES, RING_LAG, RING_DROPPED
+from config.config import (MARKET_RING_NAME, MARKET_RING_POLL_INTERVAL, MARKET_RING_POLL_MAX_INTERVAL, INGEST_CONTROL_HOST,
+                           INGEST_CONTROL_PORT, HUB_RECONNECT_MAX_DELAY)
+
+
+# ingest 프로세스가 기본 계정 private 채널(positions / orders / account)을 배포할 때 쓰는 venue
+PRIVATE_VENUE = 'blockfin_private'
+
+
+class RingUpstream:
+    """
+        shm 모드의 hub Upstream (인터페이스 동일)
+        - 구독 참조 카운트는 워커 안에서 관리, 첫 구독/마지막 해제만 ingest 에 요청
+        - 메시지는 RingFeed 가 링에서 읽어서 dispatch
+    """
+    def __init__(self, venue: Venue, feed):
+        self.venue = venue
+        self.feed = feed
+        self.subscribers = {}
+        self.connected = feed.connected
+
+    def dispatch(self, key: tuple, raw: str):
+        WS_MESSAGES.labels(self.venue.name).inc()
+        subscribers = self.subscribers.get(key)
+        if not subscribers:
+            return
+        try:
+            message = Message(raw, json.loads(raw))
+        except ValueError:
+            return
+        WS_STREAM_MESSAGES.labels(self.venue.name, *key).inc()
+        for subscription in tuple(subscribers):
+            try:
+                subscription.put(message)
+            except Exception as e:
+                print(f"[{self.venue.name}] 구독자 전달 실패: {e}")
+
+    async def add(self, subscription):
+        subscribers = self.subscribers.setdefault(subscription.key, set())
+        subscribers.add(subscription)
+        if len(subscribers) == 1:
+            await self.feed.send('subscribe', self.venue.name, subscription.key)
+
+    async def remove(self, subscription):
+        subscribers = self.subscribers.get(subscription.key)
+        if not subscribers or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self.subscribers[subscription.key]
+            await self.feed.send('unsubscribe', self.venue.name, subscription.key)
+
+    async def resubscribe(self, key: tuple):
+        if key in self.subscribers:
+            await self.feed.send('resubscribe', self.venue.name, key)
+
+    async def close(self):
+        self.subscribers = {}
+
+
+class RingFeed:
+    """
+        API 워커 쪽 시세 수신 (MARKET_DATA_MODE=shm)
+        - ingest 제어 소켓(줄 단위 JSON)으로 구독 요청, 재접속 시 현재 구독 전체 재요청
+        - 재접속할 때마다 링을 다시 attach (ingest 재시작 시 새 세그먼트)
+        - 링은 poll_interval 주기로 읽어서 hub 구독자에게 전달, 비어 있는 동안은 max_poll_interval 까지 간격을 늘림
+    """
+    def __init__(self, ring_name: str = MARKET_RING_NAME, host: str = INGEST_CONTROL_HOST, port: int = INGEST_CONTROL_PORT,
+                 poll_interval: float = MARKET_RING_POLL_INTERVAL, max_poll_interval: float = MARKET_RING_POLL_MAX_INTERVAL):
+        self.ring_name = ring_name
+        self.host = host
+        self.port = port
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(max_poll_interval, poll_interval)
+        self.ring = None
+        self.writer = None
+        self.connected = asyncio.Event()
+        self.tasks = []
+
+    def attach(self, hub):
+        # hub 가 업스트림 대신 링을 쓰도록 교체
+        hub.venues.setdefault(PRIVATE_VENUE, Venue(PRIVATE_VENUE, None, None, None, None))
+        hub.source = lambda venue: RingUpstream(venue, self)
+
+    async def send(self, op: str, venue: str, key: tuple):
+        if self.writer is None or not self.connected.is_set():
+            return  # 접속되면 현재 구독 전체를 다시 보냄
+        channel, inst_id = key
+        self.writer.write(json.dumps({"op": op, "venue": venue, "channel": channel, "inst_id": inst_id}).encode() + b'\n')
+        await self.writer.drain()
+
+    async def control(self):
+        delay = 1
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                if self.ring is not None:
+                    self.ring.close()
+                self.ring = RingReader(self.ring_name)
+                self.writer = writer
+                self.connected.set()
+                delay = 1
+                for name, upstream in tuple(hub.upstreams.items()):
+                    for key in tuple(upstream.subscribers):
+                        await self.send('subscribe', name, key)
+                # ingest 는 응답을 보내지 않음: EOF 면 연결 종료
+                await reader.read()
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ValueError) as e:
+                print(f"[feed] ingest 연결 실패: {e}")
+            finally:
+                self.connected.clear()
+                if self.writer is not None:
+                    self.writer.close()
+                    self.writer = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, HUB_RECONNECT_MAX_DELAY)
+
+    async def poll(self):
+        upstreams = hub.upstreams
+        delay = self.poll_interval
+        while True:
+            ring = self.ring
+            messages = ring.read() if ring is not None else ()
+            for venue, channel, inst_id, raw in messages:
+                upstream = upstreams.get(venue)
+                if upstream is not None:
+                    upstream.dispatch((channel, inst_id), raw)
+            # 읽을 게 남아 있으면 바로 이어서, 없으면 비어 있던 횟수만큼 대기 간격을 늘림
+            if messages:
+                delay = self.poll_interval
+                await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_poll_interval)
+
+    def start(self):
+        if not self.tasks:
+            self.tasks = [asyncio.create_task(self.control()), asyncio.create_task(self.poll())]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def collect(self):
+        if self.ring is not None:
+            RING_LAG.labels().set(self.ring.lag())
+            RING_DROPPED.labels().set(self.ring.dropped)
+
+
+feed = RingFeed()
+metrics.on_collect(feed.collect)
@@ -0,0 +1,276 @@
+import json
+import asyncio
+import itertools
+
+from typing import NamedTuple
+from contextlib import asynccontextmanager
+
+import websockets
+
+from core.metrics import (metrics, WS_MESSAGES, WS_STREAM_MESSAGES, WS_STREAM_DROPPED, WS_STREAM_QUEUE_DEPTH,
+                          WS_STREAM_SUBSCRIBERS, WS_CONNECTED, WS_RECONNECTS)
+from config.config import (BINANCE_WS_STREAM_BASE_URL, BINANCE_WS_COMBINED_STREAM_BASE_URL, BITGET_WS_BASE_URL,
+                           BLOCKFIN_WS_BASE_URL, HUB_QUEUE_SIZE, HUB_RECONNECT_MAX_DELAY)
+
+
+class Message(NamedTuple):
+    raw: str
+    data: dict
+
+
+class Venue:
+    """
+        업스트림 websocket 1개의 접속/구독 규칙
+        - subscribe/unsubscribe: (channel, inst_id) 목록 -> 전송할 메시지
+        - route: 디코딩된 메시지 -> (channel, inst_id) 또는 None
+    """
+    def __init__(self, name: str, url: str, subscribe, unsubscribe, route, keepalive: str = None):
+        self.name = name
+        self.url = url
+        self.subscribe = subscribe
+        self.unsubscribe = unsubscribe
+        self.route = route
+        self.keepalive = keepalive
+
+
+class Subscription:
+    def __init__(self, venue: str, channel: str, inst_id: str, maxsize: int = HUB_QUEUE_SIZE, listener=None):
+        self.key = (channel, inst_id)
+        self.venue = venue
+        self.listener = listener
+        self.queue = asyncio.Queue(maxsize) if listener is None else None
+        self.dropped = 0
+
+    def put(self, message: Message):
+        if self.listener is not None:
+            self.listener(message)
+            return
+        # 느린 클라이언트는 가장 오래된 메시지를 버림
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            WS_STREAM_DROPPED.labels(self.venue, *self.key).inc()
+        self.queue.put_nowait(message)
+
+    async def get(self) -> Message:
+        return await self.queue.get()
+
+
+class Upstream:
+    def __init__(self, venue: Venue):
+        self.venue = venue
+        self.subscribers = {}
+        self.ws = None
+        self.task = None
+        self.connected = asyncio.Event()
+
+    async def send(self, payload: dict):
+        if self.ws is not None and self.connected.is_set():
+            try:
+                await self.ws.send(json.dumps(payload))
+            except websockets.exceptions.ConnectionClosed:
+                pass
+
+    async def keepalive(self, ws):
+        while True:
+            await asyncio.sleep(20)
+            await ws.send(self.venue.keepalive)
+
+    def dispatch(self, raw: str):
+        WS_MESSAGES.labels(self.venue.name).inc()
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return
+        key = self.venue.route(data)
+        if key is None:
+            return
+        WS_STREAM_MESSAGES.labels(self.venue.name, *key).inc()
+        message = Message(raw, data)
+        for subscription in tuple(self.subscribers.get(key, ())):
+            try:
+                subscription.put(message)
+            except Exception as e:
+                print(f"[{self.venue.name}] 구독자 전달 실패: {e}")
+
+    async def run(self):
+        delay = 1
+        while self.subscribers:
+            keepalive_task = None
+            try:
+                async with websockets.connect(self.venue.url, ping_interval=30, ping_timeout=10) as ws:
+                    self.ws = ws
+                    self.connected.set()
+                    delay = 1
+                    # 재접속 시 현재 구독중인 키 전부 재구독
+                    await ws.send(json.dumps(self.venue.subscribe(list(self.subscribers))))
+                    if self.venue.keepalive:
+                        keepalive_task = asyncio.create_task(self.keepalive(ws))
+                    async for raw in ws:
+                        self.dispatch(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[{self.venue.name}] 업스트림 연결 종료: {e}")
+                WS_RECONNECTS.labels(self.venue.name).inc()
+            finally:
+                self.connected.clear()
+                self.ws = None
+                if keepalive_task is not None:
+                    keepalive_task.cancel()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, HUB_RECONNECT_MAX_DELAY)
+
+    async def add(self, subscription: Subscription):
+        subscribers = self.subscribers.setdefault(subscription.key, set())
+        subscribers.add(subscription)
+        if len(subscribers) == 1:
+            await self.send(self.venue.subscribe([subscription.key]))
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def remove(self, subscription: Subscription):
+        subscribers = self.subscribers.get(subscription.key)
+        if not subscribers or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        if subscribers:
+            return
+        # 마지막 구독자가 나가면 업스트림 구독 해제, 구독이 하나도 없으면 연결 종료
+        del self.subscribers[subscription.key]
+        await self.send(self.venue.unsubscribe([subscription.key]))
+        if not self.subscribers:
+            await self.close()
+
+    async def resubscribe(self, key: tuple):
+        if key in self.subscribers:
+            await self.send(self.venue.unsubscribe([key]))
+            await self.send(self.venue.subscribe([key]))
+
+    async def close(self):
+        # 취소를 기다리는 동안 add() 가 들어오면 새 연결 task 를 만들 수 있도록 먼저 비움
+        task, self.task = self.task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+class MarketDataHub:
+    """
+        (거래소, 채널, 심볼)당 업스트림 구독 1개를 참조 카운트로 공유
+        - 첫 구독자 진입 시 subscribe, 마지막 구독자 이탈 시 unsubscribe
+        - 업스트림 메시지는 한 번만 디코딩해서 모든 구독자에게 전달
+    """
+    def __init__(self, venues: dict):
+        self.venues = venues
+        self.upstreams = {}
+        self.source = Upstream  # shm 모드 워커는 core.feed.RingUpstream
+
+    def upstream(self, venue: str) -> Upstream:
+        upstream = self.upstreams.get(venue)
+        if upstream is None:
+            upstream = self.upstreams[venue] = self.source(self.venues[venue])
+        return upstream
+
+    async def subscribe(self, venue: str, channel: str, inst_id: str,
+                        maxsize: int = HUB_QUEUE_SIZE, listener=None) -> Subscription:
+        subscription = Subscription(venue, channel, inst_id, maxsize=maxsize, listener=listener)
+        await self.upstream(venue).add(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription):
+        await self.upstream(subscription.venue).remove(subscription)
+
+    async def resubscribe(self, venue: str, channel: str, inst_id: str):
+        await self.upstream(venue).resubscribe((channel, inst_id))
+
+    @asynccontextmanager
+    async def stream(self, venue: str, channel: str, inst_id: str, maxsize: int = HUB_QUEUE_SIZE):
+        subscription = await self.subscribe(venue, channel, inst_id, maxsize=maxsize)
+        try:
+            yield subscription
+        finally:
+            await self.unsubscribe(subscription)
+
+    async def close(self):
+        await asyncio.gather(*(upstream.close() for upstream in self.upstreams.values()))
+
+    def collect(self):
+        # 스트림별 구독자 수 / 큐 적체 (스크랩 시점 값, 없어진 스트림은 제거)
+        WS_STREAM_QUEUE_DEPTH.clear()
+        WS_STREAM_SUBSCRIBERS.clear()
+        for name, upstream in self.upstreams.items():
+            WS_CONNECTED.labels(name).set(1 if upstream.connected.is_set() else 0)
+            for key, subscribers in tuple(upstream.subscribers.items()):
+                WS_STREAM_SUBSCRIBERS.labels(name, *key).set(len(subscribers))
+                WS_STREAM_QUEUE_DEPTH.labels(name, *key).set(sum(s.queue.qsize() for s in subscribers if s.queue is not None))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# 거래소별 구독 규칙
+
+request_ids = itertools.count(1)
+
+# 단일 스트림(raw) 메시지는 stream 이름이 없으므로 이벤트 타입으로 채널 판별
+BINANCE_EVENT_CHANNELS = {
+    '24hrTicker': 'ticker',
+    'trade': 'trade',
+    'aggTrade': 'aggTrade',
+    'depthUpdate': 'depth@100ms',
+}
+
+
+def binance_subscribe(method: str):
+    def build(keys):
+        return {"method": method, "params": [f"{inst_id}@{channel}" for channel, inst_id in keys], "id": next(request_ids)}
+    return build
+
+
+def binance_route(data: dict):
+    if 'stream' in data:
+        inst_id, _, channel = data['stream'].partition('@')
+        return channel, inst_id
+    if 'e' in data:
+        channel = BINANCE_EVENT_CHANNELS.get(data['e'])
+        return (channel, data['s'].lower()) if channel else None
+    if 'u' in data and 'b' in data:
+        return 'bookTicker', data['s'].lower()
+    return None
+
+
+def bitget_subscribe(op: str, inst_type: str):
+    def build(keys):
+        return {"op": op, "args": [{"instType": inst_type, "channel": channel, "instId": inst_id} for channel, inst_id in keys]}
+    return build
+
+
+def blockfin_subscribe(op: str):
+    def build(keys):
+        return {"op": op, "args": [{"channel": channel, "instId": inst_id} for channel, inst_id in keys]}
+    return build
+
+
+def arg_route(data: dict):
+    if 'data' not in data or 'arg' not in data:
+        return None
+    return data['arg'].get('channel'), data['arg'].get('instId')
+
+
+VENUES = {
+    'binance_spot': Venue('binance_spot', BINANCE_WS_STREAM_BASE_URL,
+                          binance_subscribe('SUBSCRIBE'), binance_subscribe('UNSUBSCRIBE'), binance_route),
+    'binance_future': Venue('binance_future', BINANCE_WS_COMBINED_STREAM_BASE_URL,
+                            binance_subscribe('SUBSCRIBE'), binance_subscribe('UNSUBSCRIBE'), binance_route),
+    'bitget_spot': Venue('bitget_spot', BITGET_WS_BASE_URL,
+                         bitget_subscribe('subscribe', 'SPOT'), bitget_subscribe('unsubscribe', 'SPOT'),
+                         arg_route, keepalive='ping'),
+    'bitget_future': Venue('bitget_future', BITGET_WS_BASE_URL,
+                           bitget_subscribe('subscribe', 'COIN-FUTURES'), bitget_subscribe('unsubscribe', 'COIN-FUTURES'),
+                           arg_route, keepalive='ping'),
+    'blockfin': Venue('blockfin', BLOCKFIN_WS_BASE_URL,
+                      blockfin_subscribe('subscribe'), blockfin_subscribe('unsubscribe'),
+                      arg_route, keepalive='ping'),
+}
+
+hub = MarketDataHub(VENUES)
+metrics.on_collect(hub.collect)
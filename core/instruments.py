@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import asyncio
+
+from core.cache import SingleFlight
+from core.transport import transport
+from config.config import (BINANCE_BASE_URL, BINANCE_BASE_F_URL, BITGET_BASE_URL, BLOCKFIN_BASE_URL,
+                           INSTRUMENT_SNAPSHOT_PATH, INSTRUMENT_TTL, INSTRUMENT_MISS_TTL, MARKET_DATA_MODE)
+
+
+def instrument(exchange: str, symbol: str, base_asset: str = None, quote_asset: str = None, status: str = None,
+               contract_value: float = 1.0, lot_size: float = None, tick_size: float = None,
+               min_size: float = None, filters: dict = None) -> dict:
+    return {
+        "exchange": exchange,
+        "symbol": symbol,
+        "base_asset": base_asset,
+        "quote_asset": quote_asset,
+        "status": status,
+        "contract_value": contract_value,
+        "lot_size": lot_size,
+        "tick_size": tick_size,
+        "min_size": min_size,
+        "filters": filters or {},
+    }
+
+
+def to_float(value):
+    return float(value) if value not in (None, '') else None
+
+
+# 거래소별 전체 심볼 조회 -> 공통 포맷
+async def load_blockfin() -> list:
+    response_json = await transport.get(f"{BLOCKFIN_BASE_URL}/api/v1/market/instruments")
+    return [
+        instrument('blockfin', item['instId'],
+                   base_asset=item.get('baseCurrency'), quote_asset=item.get('quoteCurrency'), status=item.get('state'),
+                   contract_value=to_float(item.get('contractValue')), lot_size=to_float(item.get('lotSize')),
+                   tick_size=to_float(item.get('tickSize')), min_size=to_float(item.get('minSize')))
+        for item in response_json['data']
+    ]
+
+
+def binance_loader(exchange: str, url_of):
+    async def load() -> list:
+        response_json = await transport.get(url_of())
+        instruments = []
+        for item in response_json['symbols']:
+            filters = {f['filterType']: f for f in item.get('filters', [])}
+            lot_filter = filters.get('LOT_SIZE', {})
+            instruments.append(instrument(
+                exchange, item['symbol'],
+                base_asset=item.get('baseAsset'), quote_asset=item.get('quoteAsset'), status=item.get('status'),
+                lot_size=to_float(lot_filter.get('stepSize')), min_size=to_float(lot_filter.get('minQty')),
+                tick_size=to_float(filters.get('PRICE_FILTER', {}).get('tickSize')), filters=filters,
+            ))
+        return instruments
+    return load
+
+
+async def load_bitget_spot() -> list:
+    response_json = await transport.get(f"{BITGET_BASE_URL}/spot/public/symbols")
+    return [
+        instrument('bitget_spot', item['symbol'],
+                   base_asset=item.get('baseCoin'), quote_asset=item.get('quoteCoin'), status=item.get('status'),
+                   lot_size=10 ** -int(item.get('quantityPrecision', 0)),
+                   tick_size=10 ** -int(item.get('pricePrecision', 0)),
+                   min_size=to_float(item.get('minTradeAmount')))
+        for item in response_json['data']
+    ]
+
+
+LOADERS = {
+    'blockfin': load_blockfin,
+    'binance_spot': binance_loader('binance_spot', lambda: f"{BINANCE_BASE_URL}/api/v3/exchangeInfo"),
+    'binance_future': binance_loader('binance_future', lambda: f"{BINANCE_BASE_F_URL}/fapi/v1/exchangeInfo"),
+    'bitget_spot': load_bitget_spot,
+}
+
+
+class InstrumentRegistry:
+    """
+        거래소별 심볼 메타데이터 (contractValue, lotSize, tickSize, filters)
+        - 시작 시 로컬 스냅샷이 있으면 즉시 로드 후 백그라운드 갱신, 없으면 거래소 동시 조회
+        - TTL 지나면 백그라운드에서 다시 조회 후 스냅샷 저장
+        - (거래소, 심볼) dict 조회 O(1)
+        - 동시에 들어온 갱신 요청은 SingleFlight 로 묶음
+        - 없는 심볼 조회 시 재조회는 거래소별 miss_ttl 초에 1번 (그 사이는 None 반환)
+        - shared (shm 모드 워커): 갱신/저장은 ingest 프로세스가 하고, 워커는 스냅샷 파일이 바뀌면 다시 읽음
+    """
+    def __init__(self, snapshot_path: str = INSTRUMENT_SNAPSHOT_PATH, ttl: float = INSTRUMENT_TTL,
+                 miss_ttl: float = INSTRUMENT_MISS_TTL, shared: bool = MARKET_DATA_MODE == 'shm'):
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.missed_at = {}
+        self.shared = shared
+        self.snapshot_mtime = 0
+        self.instruments = {}
+        self.loaded_at = {}
+        self.flights = SingleFlight()
+        self.task = None
+
+    def get(self, exchange: str, symbol: str) -> dict:
+        return self.instruments.get(exchange, {}).get(symbol)
+
+    def symbols(self, exchange: str) -> list:
+        return list(self.instruments.get(exchange, {}).values())
+
+    async def fetch(self, exchange: str, symbol: str) -> dict:
+        # 신규 상장 등으로 없으면 한 번 다시 조회 (잘못된 심볼이 반복돼도 거래소별 miss_ttl 초에 1번만)
+        # 진행 중인 재조회가 있으면 같이 기다림
+        item = self.get(exchange, symbol)
+        if item is not None:
+            return item
+        if not self.flights.running(exchange):
+            if time.monotonic() - self.missed_at.get(exchange, float('-inf')) < self.miss_ttl:
+                return None
+            self.missed_at[exchange] = time.monotonic()
+        await self.refresh(exchange)
+        return self.get(exchange, symbol)
+
+    async def refresh(self, exchange: str):
+        # 미등록 심볼 조회가 몰려도 exchangeInfo 등 전체 조회는 거래소별 1번만 진행
+        await self.flights.do(exchange, lambda: self.reload(exchange))
+
+    async def reload(self, exchange: str):
+        # 워커: ingest 가 그 사이 저장한 스냅샷이 있으면 그걸로, 없으면 직접 조회 (저장은 안 함)
+        if self.shared and self.load_snapshot(newer_only=True):
+            return
+        items = await LOADERS[exchange]()
+        self.instruments[exchange] = {item['symbol']: item for item in items}
+        self.loaded_at[exchange] = time.time()
+
+    async def load(self, exchanges=None):
+        exchanges = list(exchanges or LOADERS)
+        results = await asyncio.gather(*(self.refresh(exchange) for exchange in exchanges), return_exceptions=True)
+        for exchange, result in zip(exchanges, results):
+            if isinstance(result, Exception):
+                print(f"[{exchange}] 심볼 정보 조회 실패: {result}")
+        self.save_snapshot()
+
+    def load_snapshot(self, newer_only: bool = False) -> bool:
+        try:
+            mtime = os.path.getmtime(self.snapshot_path)
+        except OSError:
+            return False
+        if newer_only and mtime <= self.snapshot_mtime:
+            return False
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"심볼 스냅샷 로드 실패: {e}")
+            return False
+        self.instruments = snapshot['instruments']
+        self.loaded_at = snapshot['loaded_at']
+        self.snapshot_mtime = mtime
+        return True
+
+    def save_snapshot(self):
+        os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({"instruments": self.instruments, "loaded_at": self.loaded_at}, f)
+        os.replace(temp_path, self.snapshot_path)
+
+    def stale(self) -> list:
+        now = time.time()
+        return [exchange for exchange in LOADERS if now - self.loaded_at.get(exchange, 0) > self.ttl]
+
+    async def run(self):
+        while True:
+            if self.shared:
+                self.load_snapshot(newer_only=True)
+            else:
+                exchanges = self.stale()
+                if exchanges:
+                    await self.load(exchanges)
+            await asyncio.sleep(min(self.ttl, 60))
+
+    async def start(self, wait: float = 30):
+        if self.shared:
+            # ingest 가 첫 스냅샷을 쓸 때까지 대기, 끝내 없으면 직접 조회
+            deadline = time.monotonic() + wait
+            while not self.load_snapshot() and time.monotonic() < deadline:
+                await asyncio.sleep(0.5)
+            if not self.instruments:
+                await asyncio.gather(*(self.refresh(exchange) for exchange in LOADERS), return_exceptions=True)
+        elif not self.load_snapshot():
+            await self.load()
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+
+instruments = InstrumentRegistry()
@@ -0,0 +1,206 @@
+import sys
+import json
+import time
+import queue
+import logging
+
+from logging.handlers import QueueHandler, QueueListener
+
+from core.metrics import metrics, LOG_QUEUED, LOG_DROPPED, LOG_SUPPRESSED
+from config.config import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_SAMPLING
+
+
+ROOT = 'trading'
+
+
+class DropQueueHandler(QueueHandler):
+    """
+        호출 스레드에서는 enqueue 만 (포맷팅은 리스너 스레드에서)
+        - 큐가 가득 차면 버리고 개수만 기록 (이벤트 루프를 막지 않음)
+        - 메시지 인자는 enqueue 후 변경하지 않는다고 가정
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s [%(name)s] %(message)s')
+
+    def format(self, record):
+        message = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            message += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        return message
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'ts': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            data.update(fields)
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class Sampler:
+    """
+        채널별 샘플링 + 초당 상한
+        - every: N 건 중 1 건만 통과 (rate 0.01 -> 100건 중 1건)
+        - per_second: 1초 창 안에서 통과 건수 상한 (0: 제한 없음)
+    """
+    __slots__ = ('every', 'per_second', 'count', 'window', 'passed', 'suppressed')
+
+    def __init__(self, rate: float = 1.0, per_second: int = 0):
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self.per_second = per_second
+        self.count = 0
+        self.window = 0
+        self.passed = 0
+        self.suppressed = 0
+
+    def allow(self) -> bool:
+        if not self.every:
+            return False
+        self.count += 1
+        if self.count % self.every:
+            self.suppressed += 1
+            return False
+        if self.per_second:
+            now = int(time.monotonic())
+            if now != self.window:
+                self.window, self.passed = now, 0
+            if self.passed >= self.per_second:
+                self.suppressed += 1
+                return False
+            self.passed += 1
+        return True
+
+
+class ChannelLogger:
+    """
+        get_logger(channel) 로 얻는 로거
+        - 레벨/샘플링 확인 후에만 LogRecord 생성
+        - 키워드 인자는 구조화 필드로 기록 (log.info("fill", order_id=..., price=...))
+    """
+    def __init__(self, channel: str, sampler: Sampler):
+        self.channel = channel
+        self.logger = logging.getLogger(f"{ROOT}.{channel}")
+        self.sampler = sampler
+
+    def log(self, level: int, msg: str, *args, exc_info=None, **fields):
+        if not self.logger.isEnabledFor(level) or not self.sampler.allow():
+            return
+        self.logger.log(level, msg, *args, exc_info=exc_info, extra={'fields': fields} if fields else None, stacklevel=3)
+
+    def debug(self, msg: str, *args, **fields):
+        self.log(logging.DEBUG, msg, *args, **fields)
+
+    def info(self, msg: str, *args, **fields):
+        self.log(logging.INFO, msg, *args, **fields)
+
+    def warning(self, msg: str, *args, **fields):
+        self.log(logging.WARNING, msg, *args, **fields)
+
+    def error(self, msg: str, *args, **fields):
+        self.log(logging.ERROR, msg, *args, **fields)
+
+    def exception(self, msg: str, *args, **fields):
+        self.log(logging.ERROR, msg, *args, exc_info=True, **fields)
+
+
+def parse_sampling(spec: str) -> list:
+    """
+        "stream.*=0.01:5,private=1:20" -> [(prefix, rate, per_second)]
+        (긴 prefix 가 우선, '*' 는 하위 채널 전체)
+    """
+    rules = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        pattern, _, value = item.partition('=')
+        rate, _, per_second = value.partition(':')
+        rules.append((pattern.strip().rstrip('*').rstrip('.'), float(rate or 1), int(per_second or 0)))
+    return sorted(rules, key=lambda rule: -len(rule[0]))
+
+
+class LogManager:
+    def __init__(self, level: str = LOG_LEVEL, log_format: str = LOG_FORMAT, queue_size: int = LOG_QUEUE_SIZE,
+                 sampling: str = LOG_SAMPLING):
+        self.level = level
+        self.format = log_format
+        self.queue = queue.Queue(queue_size)
+        self.handler = DropQueueHandler(self.queue)
+        self.rules = parse_sampling(sampling)
+        self.loggers = {}
+        self.listener = None
+
+        root = logging.getLogger(ROOT)
+        root.setLevel(level.upper())
+        root.addHandler(self.handler)
+        root.propagate = False
+
+    def sampler(self, channel: str) -> Sampler:
+        for prefix, rate, per_second in self.rules:
+            if not prefix or channel == prefix or channel.startswith(prefix + '.'):
+                return Sampler(rate, per_second)
+        return Sampler()
+
+    def get(self, channel: str) -> ChannelLogger:
+        logger = self.loggers.get(channel)
+        if logger is None:
+            logger = self.loggers[channel] = ChannelLogger(channel, self.sampler(channel))
+        return logger
+
+    def start(self):
+        # 실제 출력(stdout)은 리스너 스레드에서
+        if self.listener is None:
+            output = logging.StreamHandler(sys.stdout)
+            output.setFormatter(JsonFormatter() if self.format == 'json' else TextFormatter())
+            self.listener = QueueListener(self.queue, output, respect_handler_level=False)
+            self.listener.start()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def status(self) -> dict:
+        return {
+            'queued': self.queue.qsize(),
+            'dropped': self.handler.dropped,
+            'channels': {channel: {'every': logger.sampler.every, 'per_second': logger.sampler.per_second,
+                                   'suppressed': logger.sampler.suppressed}
+                         for channel, logger in self.loggers.items()},
+        }
+
+
+logs = LogManager()
+
+
+@metrics.on_collect
+def collect_logs():
+    LOG_QUEUED.labels().set(logs.queue.qsize())
+    LOG_DROPPED.labels().set(logs.handler.dropped)
+    for channel, logger in tuple(logs.loggers.items()):
+        LOG_SUPPRESSED.labels(channel).set(logger.sampler.suppressed)
+
+
+def get_logger(channel: str) -> ChannelLogger:
+    return logs.get(channel)
@@ -0,0 +1,339 @@
+import time
+import asyncio
+import bisect
+
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from config.config import (BINANCE_BASE_URL, BINANCE_BASE_F_URL, BITGET_BASE_URL, BLOCKFIN_BASE_URL,
+                           METRICS_LOOP_LAG_INTERVAL)
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+        라벨 조합별 child 를 dict 로 보관 (labels() 는 tuple 키 조회 1번)
+    """
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {values}")
+            child = self.children[values] = self.child()
+        return child
+
+    def child(self):
+        raise NotImplementedError
+
+    def clear(self):
+        self.children.clear()
+
+    def samples(self):
+        for values, child in tuple(self.children.items()):
+            yield self.name, format_labels(self.labelnames, values), child.value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name}{labels} {format_value(value)}" for name, labels, value in self.samples()]
+        return lines
+
+
+class Value:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def child(self):
+        return Value()
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def child(self):
+        return Value()
+
+
+class Buckets:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def child(self):
+        return Buckets(self.buckets)
+
+    def samples(self):
+        for values, child in tuple(self.children.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), child.counts):
+                cumulative += count
+                yield f"{self.name}_bucket", format_labels(self.labelnames, values, f'le="{format_value(bound)}"'), cumulative
+            labels = format_labels(self.labelnames, values)
+            yield f"{self.name}_sum", labels, child.sum
+            yield f"{self.name}_count", labels, child.count
+
+
+class Registry:
+    """
+        Prometheus text format (0.0.4) 레지스트리
+        - 카운터/히스토그램은 이벤트 발생 지점에서 갱신
+        - 큐 깊이, 풀 상태처럼 현재값인 지표는 on_collect 에 등록한 함수가 스크랩 시점에 채움
+    """
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"duplicate metric: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def on_collect(self, collector):
+        self.collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"[metrics] collector 실패 {getattr(collector, '__name__', collector)}: {e}")
+        lines = []
+        for metric in self.metrics.values():
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Registry()
+
+# 거래소 REST
+REST_LATENCY = metrics.histogram('exchange_rest_request_seconds', "Exchange REST request latency",
+                                 ('exchange', 'endpoint', 'status'))
+WS_API_LATENCY = metrics.histogram('exchange_ws_api_request_seconds', "Exchange WebSocket API request latency",
+                                   ('exchange', 'method', 'status'))
+
+# 요청 예산 (core.rate_limit)
+RATE_LIMIT_WAIT = metrics.histogram('rate_limit_wait_seconds', "Time spent waiting for request budget",
+                                    ('exchange', 'lane'))
+RATE_LIMIT_THROTTLED = metrics.counter('rate_limit_throttled_total', "Requests that had to queue for request budget",
+                                       ('exchange', 'lane'))
+RATE_LIMIT_TOKENS = metrics.gauge('rate_limit_tokens', "Remaining tokens in the exchange-wide weight buckets",
+                                  ('exchange', 'bucket'))
+
+# public GET 응답 캐시 (core.cache)
+CACHE_REQUESTS = metrics.counter('response_cache_requests_total', "Cached endpoint lookups (hit / miss / coalesced)",
+                                 ('endpoint', 'result'))
+CACHE_ENTRIES = metrics.gauge('response_cache_entries', "Responses held in the cache")
+
+# 계정 레지스트리 (core.accounts)
+ACCOUNTS_LOADED = metrics.gauge('accounts_loaded', "Accounts held in the registry", ('exchange',))
+ACCOUNT_EVICTIONS = metrics.counter('account_evictions_total', "Idle accounts evicted from the registry", ('exchange',))
+
+# 업스트림 websocket
+WS_MESSAGES = metrics.counter('ws_upstream_messages_total', "Upstream websocket messages received", ('venue',))
+WS_STREAM_MESSAGES = metrics.counter('ws_stream_messages_total', "Routed upstream messages per stream",
+                                     ('venue', 'channel', 'inst_id'))
+WS_STREAM_DROPPED = metrics.counter('ws_stream_dropped_total', "Messages dropped from full subscriber queues",
+                                    ('venue', 'channel', 'inst_id'))
+WS_STREAM_QUEUE_DEPTH = metrics.gauge('ws_stream_queue_depth', "Queued messages over all subscribers of a stream",
+                                      ('venue', 'channel', 'inst_id'))
+WS_STREAM_SUBSCRIBERS = metrics.gauge('ws_stream_subscribers', "Subscribers per upstream stream",
+                                      ('venue', 'channel', 'inst_id'))
+WS_CONNECTED = metrics.gauge('ws_upstream_connected', "Upstream websocket connection state (1: connected)", ('venue',))
+WS_RECONNECTS = metrics.counter('ws_upstream_reconnects_total', "Upstream websocket disconnects followed by a reconnect",
+                                ('venue',))
+
+# 공유메모리 시세 링 (MARKET_DATA_MODE=shm 워커)
+RING_LAG = metrics.gauge('market_ring_lag', "Ring messages written by ingest but not yet read by this worker")
+RING_DROPPED = metrics.counter('market_ring_dropped_total', "Ring messages overwritten before this worker read them")
+
+# 거래소 통합 BBO
+BBO_TICKS = metrics.counter('bbo_ticks_total', "Venue ticks applied to the consolidated BBO", ('venue',))
+BBO_CONFLATED = metrics.counter('bbo_conflated_total', "BBO updates replaced by a newer one before a client sent them")
+BBO_SYMBOLS = metrics.gauge('bbo_symbols', "Symbols tracked by the consolidated BBO")
+
+# 클라이언트 websocket (fan-out 엔드포인트)
+WS_CLIENTS = metrics.gauge('ws_clients', "Connected client websockets per endpoint", ('endpoint',))
+WS_CLIENTS_TOTAL = metrics.counter('ws_clients_total', "Accepted client websockets per endpoint", ('endpoint',))
+
+# 이벤트 루프
+LOOP_LAG = metrics.histogram('event_loop_lag_seconds', "Event loop scheduling delay",
+                             buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1))
+
+# DB
+DB_POOL = metrics.gauge('db_pool_connections', "SQLAlchemy pool connections by state", ('state',))
+DB_SESSIONS = metrics.gauge('db_sessions_active', "Open db.Interface sessions")
+DB_SESSIONS_TOTAL = metrics.counter('db_sessions_total', "Sessions opened through db.Interface")
+
+# 로깅 (core.logger)
+LOG_QUEUED = metrics.gauge('log_queue_depth', "Log records waiting for the writer thread")
+LOG_DROPPED = metrics.counter('log_records_dropped_total', "Log records dropped because the queue was full")
+LOG_SUPPRESSED = metrics.counter('log_records_sampled_out_total', "Log records skipped by sampling / rate limit",
+                                 ('channel',))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# REST 라벨: URL -> (거래소, 경로)
+
+REST_PREFIXES = sorted(((url.rstrip('/'), name) for url, name in (
+    (BINANCE_BASE_URL, 'binance_spot'),
+    (BINANCE_BASE_F_URL, 'binance_future'),
+    (BITGET_BASE_URL, 'bitget'),
+    (BLOCKFIN_BASE_URL, 'blockfin'),
+) if url), key=lambda item: -len(item[0]))
+
+
+@lru_cache(maxsize=1024)
+def rest_labels(url: str) -> tuple:
+    # url 은 query string 을 뗀 값 (서명 때문에 매번 달라지므로)
+    for prefix, name in REST_PREFIXES:
+        if url.startswith(prefix):
+            return name, url[len(prefix):] or '/'
+    parts = urlsplit(url)
+    return parts.netloc, parts.path or '/'
+
+
+def observe_rest(url: str, status, elapsed: float):
+    exchange, endpoint = rest_labels(url.split('?', 1)[0])
+    REST_LATENCY.labels(exchange, endpoint, str(status)).observe(elapsed)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+class MetricsMiddleware:
+    """
+        ASGI 미들웨어: 경로별 클라이언트 websocket 연결 수
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'websocket':
+            return await self.app(scope, receive, send)
+        endpoint = scope['path']
+        accepted = False
+
+        async def tracked_send(message):
+            nonlocal accepted
+            if message['type'] == 'websocket.accept' and not accepted:
+                accepted = True
+                WS_CLIENTS.labels(endpoint).inc()
+                WS_CLIENTS_TOTAL.labels(endpoint).inc()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, tracked_send)
+        finally:
+            if accepted:
+                WS_CLIENTS.labels(endpoint).dec()
+
+
+def watch_db(interface):
+    """
+        db.Interface 의 풀/세션 상태를 스크랩 시점에 수집
+    """
+    @metrics.on_collect
+    def collect_db():
+        stats = interface.stats()
+        for state in ('size', 'checked_in', 'checked_out', 'overflow'):
+            if stats.get(state) is not None:
+                DB_POOL.labels(state).set(stats[state])
+        DB_SESSIONS.labels().set(stats['sessions_active'])
+        DB_SESSIONS_TOTAL.labels().set(stats['sessions_total'])
+
+
+class LoopLagMonitor:
+    """
+        interval 마다 sleep 해서 예정보다 늦게 깨어난 만큼을 이벤트 루프 지연으로 기록
+    """
+    def __init__(self, interval: float = METRICS_LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.task = None
+
+    async def run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            LOOP_LAG.labels().observe(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self):
+        if self.interval > 0 and (self.task is None or self.task.done()):
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+
+loop_lag = LoopLagMonitor()
@@ -0,0 +1,373 @@
+import time
+import asyncio
+
+from itertools import islice
+
+from sortedcontainers import SortedDict
+
+from core.hub import hub
+from core.transport import transport
+from config.config import (BINANCE_BASE_URL, BINANCE_BASE_F_URL, HUB_RECONNECT_MAX_DELAY, ORDER_BOOK_IDLE_TIMEOUT,
+                           ORDER_BOOK_EVICT_INTERVAL, ORDER_BOOK_SNAPSHOT_RETRIES, ORDER_BOOK_BUFFER_SIZE)
+
+
+class PriceLevels:
+    """
+        가격 -> 수량 SortedDict
+        - 매수호가는 -price 를 키로 써서 항상 오름차순 = 최우선호가 순
+        - 갱신/삭제 O(log n), 최우선호가 O(1), 최우선 N호가 조회 O(N)
+    """
+    def __init__(self, descending: bool = False):
+        self.sign = -1 if descending else 1
+        self.levels = SortedDict()
+
+    def __len__(self):
+        return len(self.levels)
+
+    def clear(self):
+        self.levels.clear()
+
+    def set(self, price: float, size: float):
+        if size == 0:
+            self.levels.pop(price * self.sign, None)
+            return
+        self.levels[price * self.sign] = size
+
+    def best(self):
+        if not self.levels:
+            return None
+        key, size = self.levels.peekitem(0)
+        return key * self.sign, size
+
+    def top(self, depth: int) -> list:
+        return [[key * self.sign, size] for key, size in islice(self.levels.items(), depth)]
+
+    def walk(self):
+        for key, size in self.levels.items():
+            yield key * self.sign, size
+
+
+class OrderBook:
+    def __init__(self, venue: str, inst_id: str):
+        self.venue = venue
+        self.inst_id = inst_id
+        self.bids = PriceLevels(descending=True)
+        self.asks = PriceLevels()
+        self.sequence = None
+        self.updated_at = None
+        self.ready = asyncio.Event()
+
+    def reset(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.sequence = None
+        self.ready.clear()
+
+    def apply(self, bids: list, asks: list, sequence=None):
+        for price, size, *_ in bids:
+            self.bids.set(float(price), float(size))
+        for price, size, *_ in asks:
+            self.asks.set(float(price), float(size))
+        if sequence is not None:
+            self.sequence = sequence
+        self.updated_at = time.time()
+
+    def load_snapshot(self, bids: list, asks: list, sequence=None):
+        self.bids.clear()
+        self.asks.clear()
+        self.apply(bids, asks, sequence)
+        self.ready.set()
+
+    def top(self, depth: int = 20) -> dict:
+        return {
+            "bids": self.bids.top(depth),
+            "asks": self.asks.top(depth),
+            "sequence": self.sequence,
+            "ts": int(self.updated_at * 1000) if self.updated_at else None,
+        }
+
+    def estimate_fill(self, side: str, size: float = None, notional: float = None) -> dict:
+        """
+            시장가 주문을 호가에 대어봤을 때 예상 체결
+            - side: buy -> 매도호가 소진, sell -> 매수호가 소진
+            - size(수량) 또는 notional(금액) 중 하나
+        """
+        levels = self.asks if side.lower() == 'buy' else self.bids
+        best = levels.best()
+        filled_size, filled_notional = 0.0, 0.0
+
+        for price, level_size in levels.walk():
+            if size is not None:
+                take = min(level_size, size - filled_size)
+            else:
+                take = min(level_size, (notional - filled_notional) / price)
+            filled_size += take
+            filled_notional += take * price
+            if (size is not None and filled_size >= size) or (notional is not None and filled_notional >= notional):
+                break
+
+        average_price = filled_notional / filled_size if filled_size else None
+        slippage_bps = None
+        if average_price is not None and best is not None:
+            slippage_bps = abs(average_price - best[0]) / best[0] * 10000
+
+        is_filled = filled_size >= size if size is not None else filled_notional >= notional
+        return {
+            "filled_size": filled_size,
+            "average_price": average_price,
+            "slippage_bps": slippage_bps,
+            "is_filled": is_filled,
+        }
+
+
+class BlockFinBookFeed:
+    """블록핀 books 채널: snapshot 후 update, prevSeqId 불일치 시 재구독(새 snapshot)"""
+    def __init__(self, book: OrderBook):
+        self.book = book
+        self.subscription = None
+
+    async def start(self):
+        self.subscription = await hub.subscribe('blockfin', 'books', self.book.inst_id, listener=self.on_message)
+
+    async def stop(self):
+        if self.subscription is not None:
+            await hub.unsubscribe(self.subscription)
+            self.subscription = None
+
+    def on_message(self, message):
+        data = message.data['data']
+        data = data[0] if isinstance(data, list) else data
+        sequence = data.get('seqId')
+
+        if message.data.get('action') == 'snapshot':
+            self.book.load_snapshot(data.get('bids', []), data.get('asks', []), sequence)
+            return
+        if not self.book.ready.is_set():
+            return
+        if self.book.sequence is not None and data.get('prevSeqId') != self.book.sequence:
+            print(f"[{self.book.venue}:{self.book.inst_id}] 호가 시퀀스 누락, 재동기화")
+            self.book.reset()
+            asyncio.create_task(hub.resubscribe('blockfin', 'books', self.book.inst_id))
+            return
+        self.book.apply(data.get('bids', []), data.get('asks', []), sequence)
+
+
+class BinanceBookFeed:
+    """
+        바이낸스 diff-depth: 이벤트 버퍼링 -> REST snapshot -> 버퍼 적용 -> 연속성 검사
+        - spot: U == 이전 u + 1, futures: pu == 이전 u
+        - snapshot 조회 실패는 backoff 재시도, retries 번 연속 실패하면 max_delay 동안 쉼 (버퍼는 최근 buffer_size 개만)
+    """
+    def __init__(self, book: OrderBook, is_future: bool, retries: int = ORDER_BOOK_SNAPSHOT_RETRIES,
+                 buffer_size: int = ORDER_BOOK_BUFFER_SIZE, max_delay: float = HUB_RECONNECT_MAX_DELAY):
+        self.book = book
+        self.is_future = is_future
+        self.retries = retries
+        self.buffer_size = buffer_size
+        self.max_delay = max_delay
+        self.buffer = []
+        self.syncing = None
+        self.retry_at = 0
+        self.awaiting = False  # snapshot 적용 후 snapshot 을 걸치는 첫 이벤트 대기 중
+        self.subscription = None
+
+    @property
+    def snapshot_url(self) -> str:
+        if self.is_future:
+            return f"{BINANCE_BASE_F_URL}/fapi/v1/depth?symbol={self.book.inst_id.upper()}&limit=1000"
+        return f"{BINANCE_BASE_URL}/api/v3/depth?symbol={self.book.inst_id.upper()}&limit=1000"
+
+    async def start(self):
+        self.subscription = await hub.subscribe(self.book.venue, 'depth@100ms', self.book.inst_id, listener=self.on_message)
+
+    async def stop(self):
+        if self.syncing is not None:
+            self.syncing.cancel()
+            await asyncio.gather(self.syncing, return_exceptions=True)
+            self.syncing = None
+        if self.subscription is not None:
+            await hub.unsubscribe(self.subscription)
+            self.subscription = None
+
+    def resync(self):
+        self.awaiting = False
+        self.book.reset()
+        self.start_sync()
+
+    def start_sync(self):
+        if (self.syncing is None or self.syncing.done()) and time.monotonic() >= self.retry_at:
+            self.syncing = asyncio.create_task(self.sync())
+
+    def hold(self, events: list):
+        self.buffer.extend(events)
+        if len(self.buffer) > self.buffer_size:
+            del self.buffer[:-self.buffer_size]
+
+    async def load(self) -> dict:
+        delay = 1
+        for attempt in range(1, self.retries + 1):
+            try:
+                snapshot = await transport.get(self.snapshot_url)
+                if 'lastUpdateId' in snapshot:
+                    return snapshot
+                error = snapshot  # 거래소 에러 응답 {"code", "msg"}
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = repr(e)
+            print(f"[{self.book.venue}:{self.book.inst_id}] 호가 snapshot 조회 실패 ({attempt}/{self.retries}): {error}")
+            if attempt < self.retries:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_delay)
+        return None
+
+    async def sync(self):
+        snapshot = await self.load()
+        if snapshot is None:
+            # 연속 실패: 한동안 snapshot 요청을 멈추고 그 사이 이벤트는 버퍼에 최근 것만 유지
+            self.retry_at = time.monotonic() + self.max_delay
+            return
+        last_update_id = snapshot['lastUpdateId']
+
+        self.book.load_snapshot(snapshot['bids'], snapshot['asks'], last_update_id)
+        self.book.ready.clear()
+        self.awaiting = True
+
+        buffer, self.buffer = self.buffer, []
+        self.replay(buffer)
+
+    def replay(self, events: list):
+        # ready 는 snapshot 을 걸치는 첫 이벤트까지 적용된 뒤에만 set (버퍼가 전부 snapshot 이전이면 다음 이벤트에서)
+        for idx, event in enumerate(events):
+            if self.awaiting and self.is_stale(event):
+                continue
+            if not self.is_continuous(event):
+                # snapshot 과 이어지지 않으면 남은 이벤트를 두고 snapshot 부터 다시
+                buffer, self.buffer = self.buffer, []
+                self.hold(events[idx:] + buffer)
+                self.awaiting = False
+                self.book.reset()
+                asyncio.get_running_loop().call_soon(self.resync)
+                return
+            self.book.apply(event['b'], event['a'], event['u'])
+            if self.awaiting:
+                self.awaiting = False
+                self.book.ready.set()
+
+    def is_stale(self, event: dict) -> bool:
+        # snapshot 에 이미 반영된 이벤트 (futures 는 u == lastUpdateId 인 이벤트가 첫 이벤트)
+        if self.is_future:
+            return event['u'] < self.book.sequence
+        return event['u'] <= self.book.sequence
+
+    def is_continuous(self, event: dict) -> bool:
+        last = self.book.sequence
+        if self.awaiting:
+            # snapshot 직후 첫 이벤트
+            if self.is_future:
+                return event['U'] <= last <= event['u']
+            return event['U'] <= last + 1 <= event['u']
+        if self.is_future:
+            return event['pu'] == last
+        return event['U'] == last + 1
+
+    def on_message(self, message):
+        event = message.data.get('data', message.data)
+        if self.awaiting:
+            self.replay([event])
+            return
+        if not self.book.ready.is_set():
+            self.hold([event])
+            self.start_sync()
+            return
+        if not self.is_continuous(event):
+            print(f"[{self.book.venue}:{self.book.inst_id}] 호가 시퀀스 누락, 재동기화")
+            self.hold([event])
+            self.resync()
+            return
+        self.book.apply(event['b'], event['a'], event['u'])
+
+
+class OrderBookManager:
+    """
+        로컬 호가창 관리
+        - 첫 요청 시 피드 시작, 이후에는 메모리에서 top-N 조회
+        - idle_timeout 동안 조회가 없는 호가창은 삭제하고 피드 구독 해제 (다시 조회하면 새로 동기화)
+    """
+    def __init__(self, idle_timeout: float = ORDER_BOOK_IDLE_TIMEOUT, evict_interval: float = ORDER_BOOK_EVICT_INTERVAL):
+        self.idle_timeout = idle_timeout
+        self.evict_interval = evict_interval
+        self.books = {}
+        self.feeds = {}
+        self.last_used = {}
+        self.task = None
+
+    def feed_of(self, book: OrderBook):
+        if book.venue == 'blockfin':
+            return BlockFinBookFeed(book)
+        return BinanceBookFeed(book, is_future=book.venue == 'binance_future')
+
+    async def ensure(self, venue: str, inst_id: str) -> OrderBook:
+        key = (venue, inst_id)
+        self.last_used[key] = time.monotonic()
+        book = self.books.get(key)
+        if book is None:
+            book = self.books[key] = OrderBook(venue, inst_id)
+            feed = self.feeds[key] = self.feed_of(book)
+            await feed.start()
+        return book
+
+    def get(self, venue: str, inst_id: str) -> OrderBook:
+        key = (venue, inst_id)
+        book = self.books.get(key)
+        if book is not None:
+            self.last_used[key] = time.monotonic()
+        if book is not None and book.ready.is_set():
+            return book
+        return None
+
+    async def top(self, venue: str, inst_id: str, depth: int = 20, timeout: float = 2) -> dict:
+        book = await self.ensure(venue, inst_id)
+        if not book.ready.is_set():
+            try:
+                await asyncio.wait_for(book.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return book.top(depth)
+
+    async def discard(self, key: tuple):
+        self.books.pop(key, None)
+        self.last_used.pop(key, None)
+        feed = self.feeds.pop(key, None)
+        if feed is not None:
+            await feed.stop()
+
+    async def evict(self) -> int:
+        deadline = time.monotonic() - self.idle_timeout
+        idle = [key for key, last_used in self.last_used.items() if last_used < deadline]
+        for key in idle:
+            await self.discard(key)
+        return len(idle)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.evict_interval)
+            try:
+                await self.evict()
+            except Exception as e:
+                print(f"[order_books] 정리 실패: {e}")
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        for key in tuple(self.books):
+            await self.discard(key)
+
+
+order_books = OrderBookManager()
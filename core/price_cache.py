@@ -0,0 +1,131 @@
+import time
+import asyncio
+
+from core.hub import hub
+from config.config import PRICE_MAX_AGE_MS
+
+
+def now_ms() -> float:
+    return time.time() * 1000
+
+
+def first(data):
+    return data[0] if isinstance(data, list) else data
+
+
+# 채널별 메시지 -> {last, mark, bid, ask}
+def blockfin_trades(data: dict) -> dict:
+    return {"last": first(data['data'])['price']}
+
+
+def blockfin_tickers(data: dict) -> dict:
+    ticker = first(data['data'])
+    return {"last": ticker.get('last'), "bid": ticker.get('bidPrice'), "ask": ticker.get('askPrice')}
+
+
+def binance_book_ticker(data: dict) -> dict:
+    event = data.get('data', data)
+    return {"bid": event['b'], "ask": event['a']}
+
+
+def binance_ticker(data: dict) -> dict:
+    return {"last": data.get('data', data)['c']}
+
+
+def binance_mark_price(data: dict) -> dict:
+    return {"mark": data.get('data', data)['p']}
+
+
+def bitget_ticker(data: dict) -> dict:
+    ticker = first(data['data'])
+    return {"last": ticker.get('lastPr'), "bid": ticker.get('bidPr'), "ask": ticker.get('askPr'), "mark": ticker.get('markPrice')}
+
+
+FEEDS = {
+    'blockfin': (('trades', blockfin_trades), ('tickers', blockfin_tickers)),
+    'binance_spot': (('bookTicker', binance_book_ticker), ('ticker', binance_ticker)),
+    'binance_future': (('bookTicker', binance_book_ticker), ('ticker', binance_ticker), ('markPrice', binance_mark_price)),
+    'bitget_spot': (('ticker', bitget_ticker),),
+    'bitget_future': (('ticker', bitget_ticker),),
+}
+
+
+class PriceCache:
+    """
+        심볼별 최종체결가 / 마크가격 / 호가중간값 캐시
+        - 심볼당 허브 구독 1개를 계속 유지하면서 갱신
+        - 조회는 dict 조회, 필요하면 max_age_ms 보다 최신 값이 들어올 때까지 대기
+    """
+    def __init__(self):
+        self.prices = {}
+        self.waiters = {}
+        self.subscriptions = {}
+
+    def update(self, venue: str, inst_id: str, **values):
+        key = (venue, inst_id)
+        quote = self.prices.setdefault(key, {})
+        timestamp = now_ms()
+        for name, value in values.items():
+            if value is not None and value != '':
+                quote[name] = float(value)
+                quote[f"{name}_ts"] = timestamp
+        if 'bid' in quote and 'ask' in quote:
+            quote['mid'] = (quote['bid'] + quote['ask']) / 2
+        quote['ts'] = timestamp
+
+        waiter = self.waiters.pop(key, None)
+        if waiter is not None:
+            waiter.set()
+
+    def listener(self, venue: str, inst_id: str, parse):
+        def on_message(message):
+            self.update(venue, inst_id, **parse(message.data))
+        return on_message
+
+    async def ensure(self, venue: str, inst_id: str):
+        key = (venue, inst_id)
+        if key in self.subscriptions:
+            return
+        # 구독 요청을 기다리는 동안 들어온 호출이 중복 구독하지 않도록 먼저 등록
+        subscriptions = self.subscriptions[key] = []
+        for channel, parse in FEEDS[venue]:
+            subscriptions.append(await hub.subscribe(venue, channel, inst_id, listener=self.listener(venue, inst_id, parse)))
+
+    def get(self, venue: str, inst_id: str) -> dict:
+        return self.prices.get((venue, inst_id))
+
+    async def wait(self, venue: str, inst_id: str, name: str = 'last', max_age_ms: float = None, timeout: float = 5) -> float:
+        """
+            name 값이 max_age_ms 이내로 갱신돼 있으면 바로 반환, 아니면 다음 갱신까지 대기
+        """
+        await self.ensure(venue, inst_id)
+        key = (venue, inst_id)
+        deadline = time.monotonic() + timeout
+
+        while True:
+            quote = self.prices.get(key, {})
+            if name in quote and (max_age_ms is None or now_ms() - quote[f"{name}_ts"] <= max_age_ms):
+                return quote[name]
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"no {name} price for {venue}:{inst_id}")
+            waiter = self.waiters.setdefault(key, asyncio.Event())
+            try:
+                await asyncio.wait_for(waiter.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def last_price(self, venue: str, inst_id: str, max_age_ms: float = PRICE_MAX_AGE_MS, timeout: float = 5) -> float:
+        try:
+            return await self.wait(venue, inst_id, 'last', max_age_ms=max_age_ms, timeout=timeout)
+        except TimeoutError:
+            # 기한 내 최신 값이 안 오면 마지막으로 받은 값 사용 (한 번도 못 받았으면 그대로 TimeoutError)
+            quote = self.prices.get((venue, inst_id), {})
+            if 'last' not in quote:
+                raise
+            print(f"[{venue}:{inst_id}] 최신 가격 없음, 마지막 가격 사용: {quote['last']}")
+            return quote['last']
+
+
+price_cache = PriceCache()
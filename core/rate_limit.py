@@ -0,0 +1,351 @@
+import re
+import time
+import heapq
+import asyncio
+import itertools
+
+from urllib.parse import urlsplit, parse_qsl
+
+from core.metrics import metrics, rest_labels, RATE_LIMIT_WAIT, RATE_LIMIT_TOKENS, RATE_LIMIT_THROTTLED
+from config.config import RATE_LIMIT_ENABLED, RATE_LIMIT_RESERVE, RATE_LIMIT_MAX_WAIT
+
+
+# 우선순위 lane (작을수록 먼저)
+ORDER, QUERY, META = 0, 1, 2
+LANES = {'order': ORDER, 'query': QUERY, 'meta': META}
+LANE_NAMES = {value: key for key, value in LANES.items()}
+
+INTERVALS = {'S': 1, 'M': 60, 'H': 3600, 'D': 86400}
+BINANCE_HEADER = re.compile(r'x-mbx-(used-weight|order-count)-(\d+)([smhd])$')
+
+
+class RateLimited(ConnectionError):
+    """요청 예산을 RATE_LIMIT_MAX_WAIT 안에 확보하지 못함 (요청은 전송되지 않음)"""
+
+
+class Bucket:
+    """
+        토큰 버킷 (capacity / interval 초 속도로 연속 충전)
+        - 거래소 응답 헤더의 사용량으로 보수적으로 동기화 (tokens <= capacity - used)
+        - 429/418 Retry-After 동안은 blocked_until 까지 차단
+    """
+    __slots__ = ('name', 'capacity', 'interval', 'rate', 'tokens', 'updated', 'blocked_until')
+
+    def __init__(self, name: str, capacity: float, interval: float):
+        self.name = name
+        self.capacity = capacity
+        self.interval = interval
+        self.rate = capacity / interval
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float, reserve: float, now: float) -> float:
+        # reserve: order lane 을 위해 남겨둘 비율 (order lane 은 0)
+        self.refill(now)
+        needed = min(cost + self.capacity * reserve, self.capacity) - self.tokens
+        wait = needed / self.rate if needed > 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def take(self, cost: float):
+        self.tokens -= cost
+
+    def sync(self, used: float):
+        self.refill(time.monotonic())
+        self.tokens = min(self.tokens, self.capacity - used)
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class Waiter:
+    __slots__ = ('priority', 'seq', 'cost', 'key', 'is_order', 'future')
+
+    def __init__(self, priority: int, seq: int, cost: float, key: str, is_order: bool, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.cost = cost
+        self.key = key
+        self.is_order = is_order
+        self.future = future
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class ExchangeScheduler:
+    """
+        거래소 1개의 요청 예산
+        - weight 버킷: IP 단위 (거래소 전체 공유)
+        - order 버킷: API key 단위 (주문 요청만 차감)
+        - 대기열은 (lane, 도착순) 힙 -> 주문/취소가 조회, 메타데이터 갱신보다 먼저 나감
+        - key 별 order 버킷만 비어서 기다리는 요청은 뒤 요청을 막지 않음 (weight 만 head-of-line)
+        - order 가 아닌 lane 은 weight 버킷의 RATE_LIMIT_RESERVE 비율을 남겨둠 (조회 폭주 중에도 주문 여유분 유지)
+    """
+    def __init__(self, name: str, weight_limits: list, order_limits: list, reserve: float = RATE_LIMIT_RESERVE):
+        self.name = name
+        self.weights = [Bucket(f"weight_{interval}s", capacity, interval) for capacity, interval in weight_limits]
+        self.order_limits = order_limits
+        self.orders = {}
+        self.reserve = reserve
+        self.waiters = []
+        self.seq = itertools.count()
+        self.changed = asyncio.Event()
+        self.task = None
+
+    def order_buckets(self, key: str) -> list:
+        buckets = self.orders.get(key)
+        if buckets is None:
+            buckets = self.orders[key] = [Bucket(f"orders_{interval}s", capacity, interval)
+                                          for capacity, interval in self.order_limits]
+        return buckets
+
+    def weight_wait(self, priority: int, cost: float) -> float:
+        now = time.monotonic()
+        reserve = 0.0 if priority == ORDER else self.reserve
+        return max((bucket.wait_time(cost, reserve, now) for bucket in self.weights), default=0.0)
+
+    def key_wait(self, waiter) -> float:
+        # API key 별 order 버킷 (다른 계정 요청과는 무관)
+        if not waiter.is_order:
+            return 0.0
+        now = time.monotonic()
+        return max((bucket.wait_time(1, 0.0, now) for bucket in self.order_buckets(waiter.key)), default=0.0)
+
+    def take(self, cost: float, key: str, is_order: bool):
+        for bucket in self.weights:
+            bucket.take(cost)
+        if is_order:
+            for bucket in self.order_buckets(key):
+                bucket.take(1)
+
+    def queued_ahead(self, priority: int) -> bool:
+        # 같거나 높은 lane 에서 weight 를 기다리는 요청 (자기 key 의 order 버킷만 비어서 기다리는 요청은 제외)
+        return any(waiter.priority <= priority and not waiter.future.done() and self.key_wait(waiter) <= 0
+                   for waiter in self.waiters)
+
+    async def acquire(self, priority: int, cost: float, key: str, is_order: bool, max_wait: float = RATE_LIMIT_MAX_WAIT):
+        waiter = Waiter(priority, next(self.seq), cost, key, is_order, None)
+        # 앞에서 weight 를 기다리는 요청이 없고 예산이 있으면 바로 통과
+        if self.key_wait(waiter) <= 0 and self.weight_wait(priority, cost) <= 0 and not self.queued_ahead(priority):
+            self.take(cost, key, is_order)
+            return
+        RATE_LIMIT_THROTTLED.labels(self.name, LANE_NAMES[priority]).inc()
+        waiter.future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, waiter)
+        self.changed.set()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.pump())
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), max_wait)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                waiter.future.cancel()
+                raise RateLimited(f"{self.name}: no request budget within {max_wait}s")
+        except asyncio.CancelledError:
+            waiter.future.cancel()
+            raise
+
+    def release(self) -> float:
+        """
+            (lane, 도착순) 으로 대기열을 훑으면서 통과시킬 수 있는 요청을 통과
+            - 자기 key 의 order 버킷만 비어 있는 요청은 건너뜀 (한 계정이 다른 계정 주문 / 조회를 막지 않도록)
+            - weight 버킷은 거래소 공유: 앞 요청이 weight 를 기다리면 뒤 요청도 대기 (head-of-line)
+            :return: 다음 검사까지 대기 시간
+        """
+        next_wait = None
+        for waiter in sorted(self.waiters):
+            if waiter.future.done():
+                continue
+            wait = self.key_wait(waiter)
+            if wait > 0:
+                next_wait = wait if next_wait is None else min(next_wait, wait)
+                continue
+            wait = self.weight_wait(waiter.priority, waiter.cost)
+            if wait > 0:
+                next_wait = wait if next_wait is None else min(next_wait, wait)
+                break
+            self.take(waiter.cost, waiter.key, waiter.is_order)
+            waiter.future.set_result(None)
+        self.waiters = [waiter for waiter in self.waiters if not waiter.future.done()]
+        heapq.heapify(self.waiters)
+        return next_wait
+
+    async def pump(self):
+        while self.waiters:
+            wait = self.release()
+            if not self.waiters:
+                break
+            # 새 요청이 들어오면 바로 다시 검사
+            self.changed.clear()
+            try:
+                await asyncio.wait_for(self.changed.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def observe(self, key: str, status: int, headers):
+        """
+            응답 헤더로 사용량 동기화
+            - binance: X-MBX-USED-WEIGHT-<n><unit>, X-MBX-ORDER-COUNT-<n><unit>
+            - 429/418: Retry-After (없으면 1초) 동안 전체 차단
+        """
+        for name, value in headers.items():
+            match = BINANCE_HEADER.match(name.lower())
+            if match is None:
+                continue
+            kind, amount, unit = match.groups()
+            interval = int(amount) * INTERVALS[unit.upper()]
+            buckets = self.weights if kind == 'used-weight' else self.order_buckets(key)
+            for bucket in buckets:
+                if bucket.interval == interval:
+                    bucket.sync(float(value))
+        if status in (418, 429):
+            try:
+                retry_after = float(headers.get('Retry-After', 1))
+            except ValueError:
+                retry_after = 1.0
+            for bucket in self.weights:
+                bucket.block(retry_after)
+            print(f"[rate_limit] {self.name} {status}, {retry_after}s 대기")
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        for bucket in self.weights:
+            bucket.refill(now)
+        return {
+            'waiting': {LANE_NAMES[lane]: sum(1 for waiter in self.waiters if waiter.priority == lane and not waiter.future.done())
+                        for lane in LANE_NAMES},
+            'weights': {bucket.name: {'tokens': round(bucket.tokens, 2), 'capacity': bucket.capacity,
+                                      'blocked_for': round(max(0.0, bucket.blocked_until - now), 3)}
+                        for bucket in self.weights},
+            'orders': {key[-6:]: {bucket.name: round(bucket.tokens, 2) for bucket in buckets}
+                       for key, buckets in self.orders.items()},
+        }
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# 거래소별 한도 / 요청 비용
+
+# (capacity, interval 초)
+LIMITS = {
+    'binance_spot': dict(weights=[(6000, 60)], orders=[(50, 10), (160000, 86400)]),
+    'binance_future': dict(weights=[(2400, 60)], orders=[(300, 10), (1200, 60)]),
+    'bitget': dict(weights=[(20, 1)], orders=[(10, 1)]),
+    'blockfin': dict(weights=[(30, 1)], orders=[(30, 1)]),
+}
+
+KEY_HEADERS = ('X-MBX-APIKEY', 'ACCESS-KEY')
+
+
+def depth_weight(limit: int, future: bool) -> int:
+    if future:
+        return 2 if limit <= 50 else 5 if limit <= 100 else 10 if limit <= 500 else 20
+    return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+
+
+def binance_cost(method: str, path: str, params: dict) -> tuple:
+    future = path.startswith('/fapi')
+    if path.endswith('/order') and method in ('POST', 'DELETE'):
+        return ORDER, 1, True
+    # 주문 직전 설정 변경은 주문과 같은 lane
+    if path in ('/fapi/v1/leverage', '/fapi/v1/marginType', '/fapi/v1/positionSide/dual'):
+        return ORDER, 1, False
+    if path.endswith('/depth'):
+        return META, depth_weight(int(params.get('limit', 100)), future), False
+    if path.endswith('/exchangeInfo'):
+        return META, 1 if future else 20, False
+    if path.endswith('/time') or path.endswith('/ping'):
+        return META, 1, False
+    if path in ('/api/v3/account', '/api/v3/allOrders'):
+        return QUERY, 20, False
+    if path in ('/fapi/v1/allOrders', '/fapi/v2/positionRisk', '/fapi/v2/account', '/fapi/v3/account'):
+        return QUERY, 5, False
+    return QUERY, 1, False
+
+
+def default_cost(method: str, path: str, params: dict) -> tuple:
+    # bitget: /spot/trade/place-order, blockfin: /api/v1/trade/order, /trade/cancel-order
+    if method == 'POST' and '/trade/' in path:
+        return ORDER, 1, 'order' in path
+    if method == 'POST' and '/account/set-' in path:
+        return ORDER, 1, False
+    if '/market/' in path or '/public/' in path:
+        return META, 1, False
+    return QUERY, 1, False
+
+
+class RateLimiter:
+    """
+        거래소별 ExchangeScheduler 묶음 (transport.request 가 전송 전 acquire, 응답 후 observe)
+        - lane 은 요청 경로로 분류, 호출부에서 priority='order' 등으로 지정 가능
+    """
+    def __init__(self, limits: dict = LIMITS, enabled: bool = RATE_LIMIT_ENABLED):
+        self.limits = limits
+        self.enabled = enabled
+        self.schedulers = {}
+
+    def scheduler(self, exchange: str):
+        scheduler = self.schedulers.get(exchange)
+        if scheduler is None and exchange in self.limits:
+            limits = self.limits[exchange]
+            scheduler = self.schedulers[exchange] = ExchangeScheduler(exchange, limits['weights'], limits['orders'])
+        return scheduler
+
+    @staticmethod
+    def classify(url: str) -> tuple:
+        exchange, path = rest_labels(url.split('?', 1)[0])
+        if exchange.startswith('binance'):
+            exchange = 'binance_future' if path.startswith('/fapi') else 'binance_spot'
+        return exchange, path
+
+    async def acquire(self, method: str, url: str, headers: dict = None, params: dict = None, priority: str = None):
+        """
+            :return: observe() 에 넘길 ticket (한도 대상이 아니면 None)
+        """
+        if not self.enabled:
+            return None
+        exchange, path = self.classify(url)
+        scheduler = self.scheduler(exchange)
+        if scheduler is None:
+            return None
+        query = dict(parse_qsl(urlsplit(url).query))
+        if params:
+            query.update(params)
+        lane, cost, is_order = (binance_cost if exchange.startswith('binance') else default_cost)(method.upper(), path, query)
+        if priority is not None:
+            lane = LANES[priority]
+        key = next((headers[name] for name in KEY_HEADERS if headers and headers.get(name)), '')
+
+        start = time.perf_counter()
+        await scheduler.acquire(lane, cost, key, is_order)
+        RATE_LIMIT_WAIT.labels(exchange, LANE_NAMES[lane]).observe(time.perf_counter() - start)
+        return scheduler, key
+
+    def forget(self, api_key: str):
+        # 계정 eviction 시 키별 order 버킷 제거
+        for scheduler in self.schedulers.values():
+            scheduler.orders.pop(api_key, None)
+
+    @staticmethod
+    def observe(ticket, status: int, headers):
+        if ticket is not None:
+            scheduler, key = ticket
+            scheduler.observe(key, status, headers)
+
+    def collect(self):
+        for name, scheduler in self.schedulers.items():
+            now = time.monotonic()
+            for bucket in scheduler.weights:
+                bucket.refill(now)
+                RATE_LIMIT_TOKENS.labels(name, bucket.name).set(bucket.tokens)
+
+    def status(self) -> dict:
+        return {name: scheduler.status() for name, scheduler in self.schedulers.items()}
+
+
+rate_limiter = RateLimiter()
+metrics.on_collect(rate_limiter.collect)
@@ -0,0 +1,282 @@
+import os
+import time
+import asyncio
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from core.hub import hub
+from config.config import RECORDER_PATH, RECORDER_CHANNELS, RECORDER_FLUSH_INTERVAL, RECORDER_INDEX_INTERVAL_MS
+
+
+# 컬럼별 고정폭 파일 (ts.i8, price.f8 ...) -> np.memmap 으로 바로 읽기
+COLUMNS = {
+    'ts': np.dtype('<i8'),
+    'price': np.dtype('<f8'),
+    'size': np.dtype('<f8'),
+    'side': np.dtype('<i1'),   # 1: buy, -1: sell, 0: 알 수 없음
+    'bid': np.dtype('<f8'),
+    'ask': np.dtype('<f8'),
+}
+INDEX_DTYPE = np.dtype([('ts', '<i8'), ('row', '<i8')])
+NAN = float('nan')
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def to_float(value) -> float:
+    return float(value) if value not in (None, '') else NAN
+
+
+def to_side(value) -> int:
+    return {'buy': 1, 'sell': -1}.get(str(value).lower(), 0)
+
+
+def items(data: dict) -> list:
+    data = data.get('data', data)
+    return data if isinstance(data, list) else [data]
+
+
+# 채널별 메시지 -> (ts, price, size, side, bid, ask) 행 목록
+def blockfin_trades(data: dict) -> list:
+    return [(int(item['ts']), to_float(item['price']), to_float(item['size']), to_side(item.get('side')), NAN, NAN)
+            for item in items(data)]
+
+
+def blockfin_tickers(data: dict) -> list:
+    return [(int(item.get('ts') or now_ms()), to_float(item.get('last')), to_float(item.get('lastSize')), 0,
+             to_float(item.get('bidPrice')), to_float(item.get('askPrice')))
+            for item in items(data)]
+
+
+def binance_trade(data: dict) -> list:
+    # m: 매수자가 maker -> 체결 방향은 매도
+    return [(int(item['T']), to_float(item['p']), to_float(item['q']), -1 if item.get('m') else 1, NAN, NAN)
+            for item in items(data)]
+
+
+def binance_book_ticker(data: dict) -> list:
+    return [(int(item.get('T') or item.get('E') or now_ms()), NAN, NAN, 0, to_float(item['b']), to_float(item['a']))
+            for item in items(data)]
+
+
+def binance_ticker(data: dict) -> list:
+    return [(int(item['E']), to_float(item['c']), to_float(item.get('Q')), 0, to_float(item.get('b')), to_float(item.get('a')))
+            for item in items(data)]
+
+
+def bitget_ticker(data: dict) -> list:
+    return [(int(item.get('ts') or now_ms()), to_float(item.get('lastPr')), NAN, 0,
+             to_float(item.get('bidPr')), to_float(item.get('askPr')))
+            for item in items(data)]
+
+
+PARSERS = {
+    ('blockfin', 'trades'): blockfin_trades,
+    ('blockfin', 'tickers'): blockfin_tickers,
+    ('binance_spot', 'trade'): binance_trade,
+    ('binance_spot', 'aggTrade'): binance_trade,
+    ('binance_spot', 'bookTicker'): binance_book_ticker,
+    ('binance_spot', 'ticker'): binance_ticker,
+    ('binance_future', 'aggTrade'): binance_trade,
+    ('binance_future', 'bookTicker'): binance_book_ticker,
+    ('binance_future', 'ticker'): binance_ticker,
+    ('bitget_spot', 'ticker'): bitget_ticker,
+    ('bitget_future', 'ticker'): bitget_ticker,
+}
+
+
+def day_of(ts: int) -> str:
+    return datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime('%Y%m%d')
+
+
+class TickFile:
+    """
+        (venue, 채널, 심볼, 일자) 디렉터리 1개 = 컬럼 파일 6개 + index
+        - append 전용, 메모리 버퍼에 모았다가 flush 때 컬럼별로 한 번에 write
+        - index: RECORDER_INDEX_INTERVAL_MS 구간마다 (구간 시작 ts, 첫 행 번호)
+    """
+    def __init__(self, path: str, index_interval_ms: int = RECORDER_INDEX_INTERVAL_MS):
+        self.path = path
+        self.index_interval_ms = index_interval_ms
+        self.rows = []
+        os.makedirs(path, exist_ok=True)
+        self.count = os.path.getsize(self.column_path('ts')) // COLUMNS['ts'].itemsize \
+            if os.path.exists(self.column_path('ts')) else 0
+        self.last_bucket = None
+        index = read_index(path)
+        if len(index):
+            self.last_bucket = int(index['ts'][-1])
+
+    def column_path(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def append(self, rows: list):
+        self.rows.extend(rows)
+
+    def take(self) -> list:
+        rows, self.rows = self.rows, []
+        return rows
+
+    def write(self, rows: list):
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        # ts 는 마지막에: reader 는 행 수를 ts.bin 기준으로 보므로 다른 컬럼이 먼저 다 써져 있어야 함
+        for (name, dtype), values in reversed(tuple(zip(COLUMNS.items(), columns))):
+            with open(self.column_path(name), 'ab') as f:
+                f.write(np.asarray(values, dtype=dtype).tobytes())
+
+        index = []
+        for offset, ts in enumerate(columns[0]):
+            bucket = ts - ts % self.index_interval_ms
+            if self.last_bucket is None or bucket > self.last_bucket:
+                index.append((bucket, self.count + offset))
+                self.last_bucket = bucket
+        if index:
+            with open(os.path.join(self.path, 'index.bin'), 'ab') as f:
+                f.write(np.array(index, dtype=INDEX_DTYPE).tobytes())
+        self.count += len(rows)
+
+
+def read_index(path: str) -> np.ndarray:
+    index_path = os.path.join(path, 'index.bin')
+    if not os.path.exists(index_path) or os.path.getsize(index_path) == 0:
+        return np.empty(0, dtype=INDEX_DTYPE)
+    return np.memmap(index_path, dtype=INDEX_DTYPE, mode='r')
+
+
+def read(path: str, start: int = None, end: int = None) -> dict:
+    """
+        일자 디렉터리 -> {컬럼: memmap 슬라이스} (복사 없음)
+        start/end(ms) 가 있으면 index 로 대략 위치를 찾은 뒤 해당 구간 ts 만 이진 탐색
+    """
+    # 쓰는 중인 flush 가 있어도 모든 컬럼에 다 써진 행까지만
+    sizes = [os.path.getsize(os.path.join(path, f"{name}.bin")) // dtype.itemsize
+             if os.path.exists(os.path.join(path, f"{name}.bin")) else 0 for name, dtype in COLUMNS.items()]
+    size = min(sizes)
+    if size == 0:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+    columns = {name: np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode='r', shape=(size,))
+               for name, dtype in COLUMNS.items()}
+
+    lo, hi = 0, size
+    index = read_index(path)
+    if start is not None and len(index):
+        lo = int(index['row'][max(np.searchsorted(index['ts'], start, side='right') - 1, 0)])
+    if end is not None and len(index):
+        position = np.searchsorted(index['ts'], end, side='right')
+        hi = int(index['row'][position]) if position < len(index) else size
+
+    ts = columns['ts'][lo:hi]
+    if start is not None:
+        lo += int(np.searchsorted(ts, start, side='left'))
+    if end is not None:
+        hi = lo + int(np.searchsorted(columns['ts'][lo:hi], end, side='right'))
+    return {name: column[lo:hi] for name, column in columns.items()}
+
+
+def day_path(venue: str, channel: str, inst_id: str, day: str, root: str = RECORDER_PATH) -> str:
+    return os.path.join(root, venue, channel.replace('@', '_'), inst_id, day)
+
+
+class MarketRecorder:
+    """
+        허브 구독에 listener 로 붙어서 메시지를 행으로 변환해 버퍼링 (다른 구독자와 업스트림 공유)
+        - RECORDER_FLUSH_INTERVAL 마다 파일에 append, 틱마다 디스크/DB 쓰기 없음
+        - 일자(UTC)가 바뀌면 새 디렉터리
+    """
+    def __init__(self, root: str = RECORDER_PATH, flush_interval: float = RECORDER_FLUSH_INTERVAL):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.files = {}
+        self.subscriptions = {}
+        self.task = None
+        self.writing = None
+
+    def file_of(self, venue: str, channel: str, inst_id: str, day: str) -> TickFile:
+        key = (venue, channel, inst_id, day)
+        tick_file = self.files.get(key)
+        if tick_file is None:
+            tick_file = self.files[key] = TickFile(day_path(venue, channel, inst_id, day, self.root))
+        return tick_file
+
+    def listener(self, venue: str, channel: str, inst_id: str, parse):
+        def on_message(message):
+            try:
+                rows = parse(message.data)
+            except (KeyError, TypeError, ValueError):
+                return
+            for row in rows:
+                self.file_of(venue, channel, inst_id, day_of(row[0])).append([row])
+        return on_message
+
+    async def record(self, venue: str, channel: str, inst_id: str):
+        key = (venue, channel, inst_id)
+        if key in self.subscriptions:
+            return
+        parse = PARSERS.get((venue, channel))
+        if parse is None:
+            raise KeyError(f"no recorder parser for {venue}:{channel}")
+        self.subscriptions[key] = await hub.subscribe(venue, channel, inst_id, listener=self.listener(venue, channel, inst_id, parse))
+
+    async def stop_recording(self, venue: str, channel: str, inst_id: str):
+        subscription = self.subscriptions.pop((venue, channel, inst_id), None)
+        if subscription is not None:
+            await hub.unsubscribe(subscription)
+
+    def take(self) -> list:
+        # 버퍼 교체는 이벤트 루프 스레드에서, 파일 쓰기만 스레드로
+        today = day_of(now_ms())
+        batches = []
+        for key, tick_file in tuple(self.files.items()):
+            batches.append((tick_file, tick_file.take()))
+            # 지난 일자 파일은 닫음
+            if key[3] < today:
+                del self.files[key]
+        return batches
+
+    @staticmethod
+    def write(batches: list):
+        for tick_file, rows in batches:
+            tick_file.write(rows)
+
+    def flush(self):
+        self.write(self.take())
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            # 스레드 쓰기는 취소되지 않으므로 stop() 이 끝날 때까지 기다릴 수 있게 보관
+            self.writing = asyncio.ensure_future(asyncio.to_thread(self.write, self.take()))
+            try:
+                await asyncio.shield(self.writing)
+            except OSError as e:
+                print(f"틱 기록 실패: {e}")
+
+    async def start(self, channels: str = RECORDER_CHANNELS):
+        # channels: "blockfin:trades:BTC-USDT,binance_future:bookTicker:btcusdt"
+        for item in filter(None, (item.strip() for item in channels.split(','))):
+            venue, channel, inst_id = item.split(':')
+            await self.record(venue, channel, inst_id)
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        for key in tuple(self.subscriptions):
+            await self.stop_recording(*key)
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        if self.writing is not None:
+            # 진행 중인 쓰기가 끝난 뒤 마지막 flush (count / last_bucket 경합 방지)
+            await asyncio.gather(self.writing, return_exceptions=True)
+            self.writing = None
+        self.flush()
+
+
+recorder = MarketRecorder()
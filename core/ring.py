@@ -0,0 +1,139 @@
+import struct
+
+from multiprocessing import shared_memory, resource_tracker
+
+from config.config import MARKET_RING_NAME, MARKET_RING_SLOTS, MARKET_RING_SLOT_SIZE
+
+
+MAGIC = 0x4D524E47  # 'MRNG'
+VERSION = 1
+HEADER = struct.Struct('<IIII')   # magic, version, slots, slot_size
+SEQ = struct.Struct('<Q')         # 헤더: 마지막으로 쓴 seq / 슬롯: 해당 슬롯 메시지 seq
+LENGTH = struct.Struct('<I')
+HEADER_SIZE = 64
+SEQ_OFFSET = HEADER.size
+SLOT_HEADER = SEQ.size + LENGTH.size
+
+KEY_SEP, FIELD_SEP = b'\x1e', b'\x1f'
+
+
+def attach(name: str) -> shared_memory.SharedMemory:
+    # 읽는 쪽이 종료될 때 resource_tracker 가 세그먼트를 지우지 않도록 추적 해제
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class RingWriter:
+    """
+        단일 writer 공유메모리 링 (ingest 프로세스)
+        - 슬롯: [seq u64][length u32][venue\x1fchannel\x1finst_id\x1e raw JSON]
+        - 쓰기 순서: 슬롯 seq 무효화 -> 길이/본문 -> 슬롯 seq -> 헤더 seq (reader 는 seq 를 앞뒤로 확인)
+        - 슬롯보다 큰 메시지는 버리고 oversized 로 집계
+    """
+    def __init__(self, name: str = MARKET_RING_NAME, slots: int = MARKET_RING_SLOTS, slot_size: int = MARKET_RING_SLOT_SIZE):
+        self.name = name
+        self.slots = slots
+        self.slot_size = slot_size
+        self.capacity = slot_size - SLOT_HEADER
+        try:
+            # 이전 ingest 가 비정상 종료하면서 남긴 세그먼트
+            stale = attach(name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = shared_memory.SharedMemory(name, create=True, size=HEADER_SIZE + slots * slot_size)
+        self.buf = self.shm.buf
+        HEADER.pack_into(self.buf, 0, MAGIC, VERSION, slots, slot_size)
+        SEQ.pack_into(self.buf, SEQ_OFFSET, 0)
+        self.seq = 0
+        self.oversized = 0
+
+    @staticmethod
+    def key_of(venue: str, channel: str, inst_id: str) -> bytes:
+        return FIELD_SEP.join((venue.encode(), channel.encode(), (inst_id or '').encode())) + KEY_SEP
+
+    def publish(self, key: bytes, raw: bytes) -> bool:
+        length = len(key) + len(raw)
+        if length > self.capacity:
+            self.oversized += 1
+            return False
+        seq = self.seq + 1
+        offset = HEADER_SIZE + (seq % self.slots) * self.slot_size
+        body = offset + SLOT_HEADER
+        buf = self.buf
+        SEQ.pack_into(buf, offset, 0)
+        LENGTH.pack_into(buf, offset + SEQ.size, length)
+        buf[body:body + len(key)] = key
+        buf[body + len(key):body + length] = raw
+        SEQ.pack_into(buf, offset, seq)
+        SEQ.pack_into(buf, SEQ_OFFSET, seq)
+        self.seq = seq
+        return True
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class RingReader:
+    """
+        공유메모리 링 reader (API worker 마다 1개, 자기 cursor 만 관리)
+        - 연결 시점 이후 메시지부터 읽음
+        - writer 가 한 바퀴 이상 앞서면 밀린 만큼 건너뛰고 dropped 로 집계
+    """
+    def __init__(self, name: str = MARKET_RING_NAME):
+        self.shm = attach(name)
+        self.buf = self.shm.buf
+        magic, version, self.slots, self.slot_size = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{name}: not a market data ring")
+        self.cursor = self.head() + 1
+        self.dropped = 0
+
+    def head(self) -> int:
+        return SEQ.unpack_from(self.buf, SEQ_OFFSET)[0]
+
+    def lag(self) -> int:
+        return max(0, self.head() + 1 - self.cursor)
+
+    def read(self, limit: int = 1024) -> list:
+        """
+            :return: [(venue, channel, inst_id, raw)]
+        """
+        buf = self.buf
+        head = self.head()
+        cursor = self.cursor
+        if head - cursor + 1 > self.slots - 1:
+            # writer 가 덮어쓰는 중인 슬롯은 피해서 한 슬롯 여유를 둠
+            skipped = head - self.slots + 2 - cursor
+            self.dropped += skipped
+            cursor += skipped
+        messages = []
+        while cursor <= head and len(messages) < limit:
+            offset = HEADER_SIZE + (cursor % self.slots) * self.slot_size
+            if SEQ.unpack_from(buf, offset)[0] == cursor:
+                length = LENGTH.unpack_from(buf, offset + SEQ.size)[0]
+                payload = bytes(buf[offset + SLOT_HEADER:offset + SLOT_HEADER + length])
+                # 복사하는 동안 덮어써졌으면 버림
+                if SEQ.unpack_from(buf, offset)[0] == cursor:
+                    key, _, raw = payload.partition(KEY_SEP)
+                    venue, channel, inst_id = key.decode().split('\x1f')
+                    messages.append((venue, channel, inst_id or None, raw.decode()))
+                else:
+                    self.dropped += 1
+            else:
+                self.dropped += 1
+            cursor += 1
+        self.cursor = cursor
+        return messages
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
@@ -0,0 +1,260 @@
+import time
+import asyncio
+import itertools
+
+from datetime import datetime, timezone
+from collections import deque, OrderedDict
+from contextvars import ContextVar
+
+from config.config import TRACE_RING_SIZE, TRACE_FILL_TIMEOUT, TRACE_DB_SINK, TRACE_SINK_INTERVAL
+
+
+# 주문 1건이 거치는 구간 (mark 순서)
+STAGES = ('signal', 'validate', 'config', 'sign', 'send', 'ack', 'fill')
+
+current = ContextVar('order_trace', default=None)
+
+
+class OrderTrace:
+    """
+        주문 1건의 구간별 시각 (perf_counter_ns, signal 기준 상대값으로 보고)
+        - stage 는 '직전 mark -> 해당 mark' 소요시간
+    """
+    __slots__ = ('trace_id', 'source', 'exchange', 'inst_id', 'side', 'started_at', 'marks', 'order_id', 'status', 'error')
+
+    def __init__(self, trace_id: int, source: str, exchange: str, inst_id: str = None, side: str = None):
+        self.trace_id = trace_id
+        self.source = source
+        self.exchange = exchange
+        self.inst_id = inst_id
+        self.side = side
+        self.started_at = time.time_ns()
+        self.marks = [('signal', time.perf_counter_ns())]
+        self.order_id = None
+        self.status = 'pending'
+        self.error = None
+
+    def mark(self, stage: str):
+        self.marks.append((stage, time.perf_counter_ns()))
+
+    def offset_us(self, stage: str):
+        origin = self.marks[0][1]
+        for name, ns in self.marks:
+            if name == stage:
+                return (ns - origin) / 1000
+        return None
+
+    def stages_us(self) -> dict:
+        return {name: round((ns - previous) / 1000, 3)
+                for (_, previous), (name, ns) in zip(self.marks, self.marks[1:])}
+
+    def to_dict(self) -> dict:
+        origin = self.marks[0][1]
+        return {
+            'trace_id': self.trace_id,
+            'source': self.source,
+            'exchange': self.exchange,
+            'inst_id': self.inst_id,
+            'side': self.side,
+            'order_id': self.order_id,
+            'status': self.status,
+            'error': self.error,
+            'started_at': self.started_at / 1e9,
+            'offsets_us': {name: round((ns - origin) / 1000, 3) for name, ns in self.marks},
+            'stages_us': self.stages_us(),
+            'tick_to_ack_us': self.offset_us('ack'),
+            'tick_to_fill_us': self.offset_us('fill'),
+        }
+
+
+def percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class OrderTracer:
+    """
+        주문 trace 수집
+        - start(): 현재 태스크(contextvar)에 trace 를 붙이고, 하위 호출은 mark() 로 구간 기록 (trace 없으면 무시)
+        - ack(): 거래소 응답 -> ring 에 보관, 체결 push 를 기다리는 목록에 등록
+        - fill(): private 스트림 체결 push -> fill 구간 기록 후 완료
+        - 완료된 trace 는 TRACE_DB_SINK 설정 시 주기적으로 DB 에 일괄 저장
+    """
+    def __init__(self, size: int = TRACE_RING_SIZE, fill_timeout: float = TRACE_FILL_TIMEOUT,
+                 sink: bool = TRACE_DB_SINK, sink_interval: float = TRACE_SINK_INTERVAL):
+        self.ring = deque(maxlen=size)
+        self.awaiting_fill = OrderedDict()  # (exchange, order_id) -> (trace, ack 시각)
+        self.early_fills = OrderedDict()    # ack 보다 먼저 도착한 체결 push: (exchange, order_id) -> perf_counter_ns
+        self.fill_timeout = fill_timeout
+        self.ids = itertools.count(1)
+        self.sink = sink
+        self.sink_interval = sink_interval
+        self.completed = deque(maxlen=size * 10)
+        self.dropped = 0
+        self.task = None
+
+    def start(self, source: str, exchange: str, inst_id: str = None, side: str = None) -> OrderTrace:
+        trace = OrderTrace(next(self.ids), source, exchange, inst_id, side)
+        current.set(trace)
+        return trace
+
+    @staticmethod
+    def mark(stage: str):
+        trace = current.get()
+        if trace is not None:
+            trace.mark(stage)
+
+    def ack(self, order_id=None, ok: bool = True, error: str = None):
+        trace = current.get()
+        if trace is None:
+            return
+        current.set(None)
+        trace.mark('ack')
+        trace.order_id = str(order_id) if order_id is not None else None
+        trace.status = 'acked' if ok else 'rejected'
+        trace.error = None if ok else error
+        self.ring.append(trace)
+        filled_ns = self.early_fills.pop((trace.exchange, trace.order_id), None)
+        if ok and filled_ns is not None:
+            # 체결 push 가 REST 응답보다 빨랐던 경우: 실제 수신 시각으로 기록
+            trace.marks.append(('fill', filled_ns))
+            trace.marks.sort(key=lambda mark: mark[1])
+            trace.status = 'filled'
+            self.complete(trace)
+        elif ok and trace.order_id:
+            self.awaiting_fill[(trace.exchange, trace.order_id)] = (trace, time.monotonic())
+            while len(self.awaiting_fill) > self.ring.maxlen:
+                self.complete(self.awaiting_fill.popitem(last=False)[1][0])
+        else:
+            self.complete(trace)
+
+    def fail(self, error: str):
+        # 거래소 응답 전 실패 (검증 실패, 연결 오류 ...)
+        trace = current.get()
+        if trace is None:
+            return
+        current.set(None)
+        trace.status = 'failed'
+        trace.error = error
+        self.ring.append(trace)
+        self.complete(trace)
+
+    def fill(self, exchange: str, order_id):
+        key = (exchange, str(order_id))
+        entry = self.awaiting_fill.pop(key, None)
+        if entry is None:
+            if key not in self.early_fills:
+                self.early_fills[key] = time.perf_counter_ns()
+                while len(self.early_fills) > self.ring.maxlen:
+                    self.early_fills.popitem(last=False)
+            return
+        trace = entry[0]
+        trace.mark('fill')
+        trace.status = 'filled'
+        self.complete(trace)
+
+    def complete(self, trace: OrderTrace):
+        if not self.sink:
+            return
+        if len(self.completed) == self.completed.maxlen:
+            self.dropped += 1
+        self.completed.append(trace)
+
+    def expire(self):
+        # 체결 push 가 오지 않는 주문 (미체결 지정가, orders 채널 미구독 ...)
+        deadline = time.monotonic() - self.fill_timeout
+        while self.awaiting_fill:
+            key, (trace, acked_at) = next(iter(self.awaiting_fill.items()))
+            if acked_at > deadline:
+                break
+            del self.awaiting_fill[key]
+            self.complete(trace)
+
+    def find(self, trace_id: int):
+        for trace in self.ring:
+            if trace.trace_id == trace_id:
+                return trace
+        return None
+
+    def query(self, limit: int = 100, source: str = None, exchange: str = None, inst_id: str = None,
+              status: str = None) -> list:
+        results = []
+        for trace in reversed(self.ring):
+            if ((source and trace.source != source) or (exchange and trace.exchange != exchange)
+                    or (inst_id and trace.inst_id != inst_id) or (status and trace.status != status)):
+                continue
+            results.append(trace.to_dict())
+            if len(results) >= limit:
+                break
+        return results
+
+    def summary(self, source: str = None, exchange: str = None) -> dict:
+        # ring 안 trace 의 구간별 p50/p99 (us)
+        samples = {}
+        for trace in self.ring:
+            if (source and trace.source != source) or (exchange and trace.exchange != exchange):
+                continue
+            for stage, us in trace.stages_us().items():
+                samples.setdefault(stage, []).append(us)
+            for name in ('tick_to_ack', 'tick_to_fill'):
+                value = trace.offset_us(name[len('tick_to_'):])
+                if value is not None:
+                    samples.setdefault(name, []).append(value)
+        result = {}
+        for stage in (*STAGES[1:], 'tick_to_ack', 'tick_to_fill'):
+            values = sorted(samples.get(stage, ()))
+            if values:
+                result[stage] = {'count': len(values), 'p50_us': percentile(values, 50),
+                                 'p99_us': percentile(values, 99), 'max_us': values[-1]}
+        return result
+
+    async def write(self, traces: list):
+        from db import db
+        from db.models import OrderTraceLog
+        rows = []
+        for trace in traces:
+            data = trace.to_dict()
+            rows.append(dict(trace_id=data['trace_id'], source=data['source'], exchange=data['exchange'],
+                             inst_id=data['inst_id'], side=data['side'], order_id=data['order_id'],
+                             status=data['status'], error=data['error'],
+                             started_at=datetime.fromtimestamp(data['started_at'], timezone.utc),
+                             offsets_us=data['offsets_us'], tick_to_ack_us=data['tick_to_ack_us'],
+                             tick_to_fill_us=data['tick_to_fill_us']))
+        async with db.session_maker() as session:
+            await db.bulk_insert(session, OrderTraceLog, *rows)
+
+    async def flush(self):
+        self.expire()
+        if not self.completed:
+            return
+        traces = list(self.completed)
+        self.completed.clear()
+        try:
+            await self.write(traces)
+        except Exception as e:
+            print(f"[trace] DB 저장 실패 ({len(traces)}건): {e}")
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.sink_interval)
+            if self.sink:
+                await self.flush()
+            else:
+                self.expire()
+
+    def start_sink(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def stop_sink(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        if self.sink:
+            for trace, _ in self.awaiting_fill.values():
+                self.complete(trace)
+            self.awaiting_fill.clear()
+            await self.flush()
+
+
+tracer = OrderTracer()
@@ -0,0 +1,90 @@
+import time
+import asyncio
+
+from urllib.parse import urlsplit
+
+import aiohttp
+from yarl import URL
+
+from core.metrics import observe_rest
+from core.rate_limit import rate_limiter
+from config.config import (HTTP_TIMEOUT, HTTP_CONNECT_TIMEOUT, HTTP_POOL_SIZE_PER_HOST,
+                           HTTP_KEEPALIVE_TIMEOUT, HTTP_DNS_CACHE_TTL)
+
+
+class ExchangeTransport:
+    """
+        거래소 REST 호출 공용 트랜스포트
+        - 호스트별 ClientSession(커넥션 풀) 1개를 앱 lifespan 동안 재사용
+        - keep-alive, DNS 캐시, 타임아웃은 config 값으로 설정
+    """
+    def __init__(self,
+                 timeout: float = HTTP_TIMEOUT,
+                 connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+                 pool_size_per_host: int = HTTP_POOL_SIZE_PER_HOST,
+                 keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT,
+                 dns_cache_ttl: int = HTTP_DNS_CACHE_TTL):
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.pool_size_per_host = pool_size_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.trace_configs = []  # aiohttp.TraceConfig (계측용), 세션 생성 전에 추가
+        self.sessions = {}
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def session(self, url: str) -> aiohttp.ClientSession:
+        host = self.host_of(url)
+        session = self.sessions.get(host)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size_per_host,
+                limit_per_host=self.pool_size_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, trace_configs=self.trace_configs or None)
+            self.sessions[host] = session
+        return session
+
+    async def request(self, method: str, url: str, headers: dict = None, params: dict = None,
+                      json: dict = None, timeout: float = None, priority: str = None):
+        # 거래소 요청 예산 확보 (주문 lane 우선, 오래 기다려야 하면 RateLimited)
+        ticket = await rate_limiter.acquire(method, url, headers, params, priority)
+
+        # 서명된 query string이 재인코딩되지 않도록 encoded=True
+        request_url = URL(url, encoded=True)
+        # timeout 을 따로 준 경우만 넘김 (None 을 넘기면 세션 기본 타임아웃까지 꺼짐)
+        options = {'timeout': aiohttp.ClientTimeout(total=timeout, connect=self.timeout.connect)} if timeout else {}
+
+        # 거래소/엔드포인트/상태코드별 지연시간 (/metrics)
+        status = 'error'
+        start = time.perf_counter()
+        try:
+            async with self.session(url).request(method, request_url, headers=headers, params=params,
+                                                 json=json, **options) as response:
+                status = response.status
+                rate_limiter.observe(ticket, status, response.headers)
+                return await response.json(content_type=None)
+        except asyncio.TimeoutError:
+            status = 'timeout'
+            raise
+        finally:
+            observe_rest(url, status, time.perf_counter() - start)
+
+    async def get(self, url: str, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def close(self):
+        sessions, self.sessions = self.sessions, {}
+        await asyncio.gather(*(session.close() for session in sessions.values()))
+
+
+transport = ExchangeTransport()
@@ -3,7 +3,9 @@ import sys
 
 from .models import *
 from .interface import Interface, AsyncSession
+from core.metrics import watch_db
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
 db = Interface()
+watch_db(db)
@@ -4,7 +4,7 @@ import asyncio
 from typing import Iterable
 from functools import reduce
 
-from sqlalchemy import select, insert, delete, update, sql, func
+from sqlalchemy import select, insert, delete, update, sql, func, text
 from sqlalchemy.orm import joinedload, selectinload, aliased
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncSession
 from sqlalchemy.dialects.postgresql import insert as pg_insert
@@ -21,6 +21,8 @@ class Interface:
         self.engine = create_async_engine(DB_URI, echo=False)
         self.session_maker = async_sessionmaker(self.engine, autoflush=False, autocommit=False)
         self.queryset = None
+        self.sessions_active = 0
+        self.sessions_total = 0
 
     @staticmethod
     def func(name):
@@ -47,8 +49,28 @@ class Interface:
             await conn.run_sync(models.Base.metadata.create_all)
 
     async def get_session(self):
-        async with self.session_maker() as session:
-            yield session
+        self.sessions_active += 1
+        self.sessions_total += 1
+        try:
+            async with self.session_maker() as session:
+                yield session
+        finally:
+            self.sessions_active -= 1
+
+    def stats(self) -> dict:
+        # 커넥션 풀 / 세션 현황 (QueuePool 이 아니면 풀 항목은 None)
+        pool = self.engine.pool
+        def call(name):
+            method = getattr(pool, name, None)
+            return method() if callable(method) else None
+        return {
+            'size': call('size'),
+            'checked_in': call('checkedin'),
+            'checked_out': call('checkedout'),
+            'overflow': call('overflow'),
+            'sessions_active': self.sessions_active,
+            'sessions_total': self.sessions_total,
+        }
 
     @staticmethod
     async def rollback(session: AsyncSession):
@@ -123,14 +145,12 @@ class Interface:
 
     @staticmethod
     async def bulk_insert(session: AsyncSession, model, *datas, flush=True, commit=True, add_all=False, or_replace=False):
+        count = len(datas)
         if add_all:
             session.add_all(datas)
         else:
             if or_replace:
-                for data in datas:
-                    queryset = pg_insert(model).values(**data)
-                    queryset = queryset.on_conflict_do_update(index_elements=or_replace, set_=data)
-                    await session.execute(queryset)
+                return await Interface.bulk_upsert(session, model, datas, index_elements=or_replace, flush=flush, commit=commit)
             else:
                 queryset = (insert(model), datas)
                 await session.execute(*queryset)
@@ -141,6 +161,89 @@ class Interface:
         if commit:
             await session.commit()
 
+        return count
+
+    @staticmethod
+    def dedupe(datas, index_elements):
+        # 한 statement 안에서 같은 키가 두 번 나오면 ON CONFLICT 에러 -> 마지막 값만 유지
+        unique = {}
+        for data in datas:
+            unique[tuple(data[key] for key in index_elements)] = data
+        return list(unique.values())
+
+    @staticmethod
+    async def bulk_upsert(session: AsyncSession, model, datas, index_elements, update_columns=None, chunk_size=1000,
+                          use_copy=False, flush=True, commit=True):
+        """
+            multi-row INSERT ... ON CONFLICT (index_elements) DO UPDATE SET col = excluded.col
+            - chunk_size 행씩 한 statement 로 전송 (Postgres 바인드 파라미터 32767개 제한 내로 자동 축소)
+            - update_columns 미지정 시 index_elements 를 제외한 모든 컬럼, 빈 리스트면 DO NOTHING
+            - use_copy=True 면 COPY -> 임시 staging 테이블 -> INSERT ... SELECT (asyncpg 전용)
+            :return: 영향받은 행 수
+        """
+        datas = Interface.dedupe(datas, index_elements)
+        if not datas:
+            return 0
+
+        columns = list(datas[0].keys())
+        if update_columns is None:
+            update_columns = [column for column in columns if column not in index_elements]
+
+        if use_copy:
+            count = await Interface.copy_upsert(session, model, datas, columns, index_elements, update_columns)
+        else:
+            count = 0
+            chunk_size = max(1, min(chunk_size, 32767 // len(columns)))
+            for start in range(0, len(datas), chunk_size):
+                queryset = pg_insert(model).values(datas[start:start + chunk_size])
+                if update_columns:
+                    queryset = queryset.on_conflict_do_update(
+                        index_elements=index_elements,
+                        set_={column: queryset.excluded[column] for column in update_columns},
+                    )
+                else:
+                    queryset = queryset.on_conflict_do_nothing(index_elements=index_elements)
+                result = await session.execute(queryset)
+                count += result.rowcount
+
+        if flush:
+            await session.flush()
+
+        if commit:
+            await session.commit()
+
+        return count
+
+    @staticmethod
+    async def copy_upsert(session: AsyncSession, model, datas, columns, index_elements, update_columns):
+        connection = await session.connection()
+        preparer = connection.dialect.identifier_preparer
+        table = model.__table__
+        target = preparer.format_table(table)
+        staging = preparer.quote(f"staging_{table.name}")
+        column_list = ", ".join(preparer.quote(column) for column in columns)
+
+        await session.execute(text(f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {target} INCLUDING DEFAULTS) ON COMMIT DROP"))
+        await session.execute(text(f"TRUNCATE {staging}"))
+
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            f"staging_{table.name}",
+            records=[tuple(data[column] for column in columns) for data in datas],
+            columns=columns,
+        )
+
+        conflict = ", ".join(preparer.quote(column) for column in index_elements)
+        if update_columns:
+            action = "DO UPDATE SET " + ", ".join(f"{preparer.quote(column)} = EXCLUDED.{preparer.quote(column)}"
+                                                  for column in update_columns)
+        else:
+            action = "DO NOTHING"
+        result = await session.execute(text(
+            f"INSERT INTO {target} ({column_list}) SELECT {column_list} FROM {staging} ON CONFLICT ({conflict}) {action}"
+        ))
+        return result.rowcount
+
     @staticmethod
     async def update(session: AsyncSession, selection, flush=True, commit=True, **update_data):
         for key, value in update_data.items():
@@ -0,0 +1,3 @@
+from .base import Base
+from .account import User, ExchangeAccount
+from .trace import OrderTraceLog
@@ -0,0 +1,26 @@
+from .base import *
+
+from sqlalchemy import BigInteger, String, Boolean, LargeBinary
+
+
+class User(Base):
+    __tablename__ = 'users'
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    uid: Mapped[str] = mapped_column(String(64), unique=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+
+
+class ExchangeAccount(Base):
+    """거래소 API 키 (secret/passphrase 는 pgp_sym_encrypt, ACCOUNT_ENCRYPTION_KEY)"""
+    __tablename__ = 'exchange_account'
+    __table_args__ = (UniqueConstraint('exchange', 'uid'),)
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    uid: Mapped[str] = mapped_column(String(64), ForeignKey('users.uid', ondelete='CASCADE'), index=True)
+    exchange: Mapped[str] = mapped_column(String(32))
+    api_key: Mapped[str] = mapped_column(String(128))
+    secret_key: Mapped[bytes] = mapped_column(LargeBinary)
+    passphrase: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, server_default='true')
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
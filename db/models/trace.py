@@ -0,0 +1,22 @@
+from .base import *
+
+from sqlalchemy import BigInteger, String, Float
+
+
+class OrderTraceLog(Base):
+    """주문 구간별 지연시간 (core.trace, TRACE_DB_SINK)"""
+    __tablename__ = 'order_trace'
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    trace_id: Mapped[int] = mapped_column(BigInteger)
+    source: Mapped[str] = mapped_column(String(64))
+    exchange: Mapped[str] = mapped_column(String(32))
+    inst_id: Mapped[str] = mapped_column(String(32), nullable=True)
+    side: Mapped[str] = mapped_column(String(8), nullable=True)
+    order_id: Mapped[str] = mapped_column(String(64), nullable=True, index=True)
+    status: Mapped[str] = mapped_column(String(16))
+    error: Mapped[str] = mapped_column(String(255), nullable=True)
+    started_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), index=True)
+    offsets_us: Mapped[dict] = mapped_column(JSON)
+    tick_to_ack_us: Mapped[float] = mapped_column(Float, nullable=True)
+    tick_to_fill_us: Mapped[float] = mapped_column(Float, nullable=True)
@@ -2,19 +2,24 @@ import json
 import time
 import asyncio
 
-from fastapi import APIRouter, WebSocket
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Depends
 from collections import OrderedDict
 from urllib.parse import urlencode
 
 import hmac, hashlib, string
-import requests
-import websockets
 from starlette.websockets import WebSocketState
 
+from core.hub import hub
+from core.order_book import order_books
+from core.instruments import instruments
+from core.clock import clocks
+from core.account_state import account_config
+from core.accounts import accounts, Account, account_dependency
+from core.trace import tracer
+from core.logger import get_logger
+from domain.v1.binance.ws_api import ws_api, BinanceWsApiUnavailable, BinanceWsApiAckLost
 from config.models.binance import BinanceSpotTrade, BinanceFutureTrade, BinanceWithdrawal, BinanceSymbol
-from config.config import (BINANCE_BASE_URL, BINANCE_BASE_F_URL, BINANCE_WS_STREAM_BASE_URL,
-                           BINANCE_WS_F_STREAM_BASE_URL, BINANCE_WS_COMBINED_STREAM_BASE_URL,
-                           BINANCE_API_KEY, BINANCE_API_SECRET)
+from config.config import BINANCE_BASE_URL, BINANCE_BASE_F_URL, BINANCE_WS_ORDER_ENTRY
 
 
 router = APIRouter(
@@ -23,22 +28,64 @@ router = APIRouter(
     include_in_schema=True,
 )
 
-HEADERS = {"X-MBX-APIKEY": BINANCE_API_KEY}
+stream_log = get_logger('stream.binance')
 
 
-def get_usdt_spot_symbols():
-    spot_info = requests.get(BINANCE_BASE_URL + '/api/v3/exchangeInfo').json()
-    symbols = spot_info['symbols']
+class BinanceSigner:
+    """계정별 HMAC-SHA256 서명 (query string 뒤에 signature)"""
+    def __init__(self, api_key: str, secret_key: str):
+        self.secret_key = secret_key.encode()
+        self.headers = {"X-MBX-APIKEY": api_key}
+
+    def sign(self, params: dict) -> str:
+        query_string = urlencode(params, doseq=True)
+        signature = hmac.new(self.secret_key, query_string.encode(), hashlib.sha256).hexdigest()
+        return f"{query_string}&signature={signature}"
+
+
+accounts.register('binance', signer=lambda account: BinanceSigner(account.api_key, account.secret_key))
+current_account = account_dependency('binance')
+
+
+def use_ws_api(trade_model, account: Account) -> bool:
+    # WebSocket API 세션은 config 기본 계정 키로 인증되므로 기본 계정만
+    if account.uid is not None:
+        return False
+    return trade_model.use_ws_api if trade_model.use_ws_api is not None else BINANCE_WS_ORDER_ENTRY
+
+
+async def reconcile_order(url: str, clock: str, symbol: str, client_order_id: str, account: Account) -> dict:
+    # WebSocket API 주문 응답 유실: 중복 주문 위험이 있어 재주문하지 않고 clientOrderId 로 조회
+    params = OrderedDict([
+        ("symbol", symbol),
+        ("origClientOrderId", client_order_id),
+        ("timestamp", await clocks[clock].timestamp()),
+        ("recvWindow", 60000),
+    ])
+    signer = account.signer
+    try:
+        order = await account.get(f"{url}?{signer.sign(params)}", headers=signer.headers)
+    except Exception as e:
+        order = {"msg": str(e)}
+    if 'orderId' in order:
+        return order
+    # 조회로도 확인 안 되면 상태 불명으로 응답 (clientOrderId 로 나중에 다시 조회)
+    return {"status": "UNKNOWN", "clientOrderId": client_order_id, "msg": order.get('msg')}
+
+
+async def get_usdt_spot_symbols():
+    # exchangeInfo 는 심볼 레지스트리에서 조회 (TTL 갱신)
+    symbols = instruments.symbols('binance_spot')
     spot_usdt_available = []
 
     for symbol in symbols:
-        if symbol['quoteAsset'] == 'USDT' and symbol['status'] == 'TRADING' and symbol["symbol"].isascii():
+        if symbol['quote_asset'] == 'USDT' and symbol['status'] == 'TRADING' and symbol["symbol"].isascii():
             spot_usdt_available.append(symbol['symbol'].lower() + "@ticker")
 
     return spot_usdt_available
 
 
-def get_usdt_future_symbols():
+async def get_usdt_future_symbols():
     """
     @ticker: 현재가
     @kline_1m: 1분봉 캔들(OHLC)
@@ -69,29 +116,56 @@ def get_usdt_future_symbols():
     }
     :return:
     """
-    future_info = requests.get(BINANCE_BASE_F_URL + '/fapi/v1/exchangeInfo').json()
-    symbols = future_info['symbols']
+    symbols = instruments.symbols('binance_future')
     future_usdt_available = []
 
     for symbol in symbols:
-        if symbol['quoteAsset'] == 'USDT' and symbol['status'] == 'TRADING' and symbol["symbol"].isascii():
+        if symbol['quote_asset'] == 'USDT' and symbol['status'] == 'TRADING' and symbol["symbol"].isascii():
             future_usdt_available.append(symbol['symbol'].lower() + "@ticker")
 
     return future_usdt_available
 
 
+# 서버시간 오프셋 모니터링
+@router.get('/clock')
+async def clock_status():
+    return [clocks['binance_spot'].status(), clocks['binance_future'].status()]
+
+
+# SPOT 호가창 (로컬 호가창, diff-depth 스트림으로 유지)
+@router.get('/order/book')
+async def get_order_book(symbol: str, limit: int = 20):
+    if await instruments.fetch('binance_spot', symbol.upper()) is None:
+        raise HTTPException(status_code=404, detail="Unknown symbol")
+    book = await order_books.top('binance_spot', symbol.lower(), limit)
+    if book is None:
+        raise HTTPException(status_code=503, detail="Order book is not synced yet")
+    return {"lastUpdateId": book['sequence'], "bids": book['bids'], "asks": book['asks']}
+
+
+# FUTURE 호가창
+@router.get('/future/order/book')
+async def get_future_order_book(symbol: str, limit: int = 20):
+    if await instruments.fetch('binance_future', symbol.upper()) is None:
+        raise HTTPException(status_code=404, detail="Unknown symbol")
+    book = await order_books.top('binance_future', symbol.lower(), limit)
+    if book is None:
+        raise HTTPException(status_code=503, detail="Order book is not synced yet")
+    return {"lastUpdateId": book['sequence'], "E": book['ts'], "bids": book['bids'], "asks": book['asks']}
+
+
 # 유저 자산조회
 @router.post('/user/asset')
-async def user_asset():
-    servertime = str(requests.get(url=BINANCE_BASE_URL + '/api/v3/time').json()['serverTime'])
-    query_string = f"timestamp={servertime}&recvWindow=60000"
-    signature = hmac.new(BINANCE_API_SECRET.encode(), query_string.encode(), hashlib.sha256).hexdigest()
-    url = f"https://api.binance.com/sapi/v3/asset/getUserAsset?{query_string}&signature={signature}"
-    # url = f"https://fapi.binance.com/fapi/v2/account?{query_string}&signature={signature}"
+async def user_asset(account: Account = Depends(current_account)):
+    servertime = await clocks['binance_spot'].timestamp()
+    signer = account.signer
+    query_string = signer.sign(OrderedDict([("timestamp", servertime), ("recvWindow", 60000)]))
+    url = f"https://api.binance.com/sapi/v3/asset/getUserAsset?{query_string}"
+    # url = f"https://fapi.binance.com/fapi/v2/account?{query_string}"
 
-    response = requests.post(url, headers=HEADERS)
+    response_json = await account.post(url, headers=signer.headers)
 
-    return response.json()
+    return response_json
 
 
 # FUTURE 현재가 ticker
@@ -99,29 +173,19 @@ async def user_asset():
 async def get_currency(websocket: WebSocket):
     await websocket.accept()
 
-    # future_symbols = get_usdt_future_symbols()
-    # symbols = future_symbols[0]
-    # for symbol in future_symbols[1:]:
-    #     symbols += ('/' + symbol)
-    # stream_url = BINANCE_WS_COMBINED_STREAM_BASE_URL + symbols
-    stream_url = BINANCE_WS_COMBINED_STREAM_BASE_URL + '/btcusdt@ticker'
-
-
+    # 업스트림 구독은 허브에서 클라이언트끼리 공유
     try:
-        async with websockets.connect(stream_url, ping_interval=None) as binance_ws:
+        async with hub.stream('binance_future', 'ticker', 'btcusdt') as subscription:
             while True:
-                msg = await binance_ws.recv()
-                recv_data = json.loads(msg)
-                print(recv_data['data']['c'])
+                message = await subscription.get()
+                stream_log.info("ticker", venue='binance_future', inst_id='btcusdt', last=message.data['data']['c'])
                 if websocket.client_state == WebSocketState.DISCONNECTED:
                     print("클라이언트와 연결 끊김")
                     break
                 elif websocket.client_state == WebSocketState.CONNECTED:
-                    await websocket.send_text(msg)
-    except websockets.ConnectionClosedOK:
-        print("websocket 정상종료")
-    except websockets.ConnectionClosedError as e:
-        print(f"websocket 비정상종료: {e}")
+                    await websocket.send_text(message.raw)
+    except WebSocketDisconnect:
+        print("클라이언트와 연결 끊김")
     except RuntimeError as e:
         print(f"클라이언트가 연결을 끊은 후 send 시도: {e}")
     finally:
@@ -142,20 +206,21 @@ async def get_currency(websocket: WebSocket):
 
     # 클라이언트 연결 수락
     await websocket.accept()
-    # 바이낸스 웹소켓 서버 연결
-    async with websockets.connect(BINANCE_WS_STREAM_BASE_URL + '/btcusdt@ticker', ping_interval=30, ping_timeout=10) as binance_ws:
-
-        while True:
-            msg = await binance_ws.recv() # 주기적 요청 X. 바이낸스서버가 push하면 즉시 수신
-            recv_data = json.loads(msg)
-            print(recv_data['c'])
-            await websocket.send_text(msg)
+    # 바이낸스 웹소켓 구독 (허브 공유)
+    try:
+        async with hub.stream('binance_spot', 'ticker', 'btcusdt') as subscription:
+            while True:
+                message = await subscription.get() # 주기적 요청 X. 바이낸스서버가 push하면 즉시 수신
+                stream_log.info("ticker", venue='binance_spot', inst_id='btcusdt', last=message.data['c'])
+                await websocket.send_text(message.raw)
+    except WebSocketDisconnect:
+        print("클라이언트와 연결 끊김")
 
 
 # SPOT 트레이드
 @router.post('/spot/trade')
-async def spot_trade(trade_model: BinanceSpotTrade):
-    servertime = str(requests.get(url=BINANCE_BASE_URL + '/api/v3/time').json()['serverTime'])
+async def spot_trade(trade_model: BinanceSpotTrade, account: Account = Depends(current_account)):
+    servertime = await clocks['binance_spot'].timestamp()
 
     params = OrderedDict([
         ("symbol", trade_model.symbol),
@@ -171,72 +236,104 @@ async def spot_trade(trade_model: BinanceSpotTrade):
     elif trade_model.type.upper()== "MARKET":
         params["quoteOrderQty"] = trade_model.quote_order_qty
 
-    query_string = urlencode(params, doseq=True)
-    signature = hmac.new(
-        BINANCE_API_SECRET.encode(),
-        query_string.encode(),
-        hashlib.sha256
-    ).hexdigest()
-
-    url = f"{BINANCE_BASE_URL}/api/v3/order?{query_string}&signature={signature}"
-    response = requests.post(url, headers=HEADERS)
-    return response.json()
+    # 시장가 주문은 로컬 호가창으로 체결가능 금액/슬리피지 확인
+    book = order_books.get('binance_spot', trade_model.symbol.lower())
+    if book is None:
+        await order_books.ensure('binance_spot', trade_model.symbol.lower())
+    elif trade_model.type.upper() == "MARKET" and trade_model.quote_order_qty:
+        estimate = book.estimate_fill(trade_model.side, notional=float(trade_model.quote_order_qty))
+        print(f"예상 체결: {estimate}")
+        if not estimate['is_filled']:
+            raise HTTPException(status_code=400, detail="Insufficient order book depth")
+
+    # WebSocket API 주문 (연결이 없으면 REST로 주문)
+    if use_ws_api(trade_model, account):
+        try:
+            return await ws_api['spot'].place_order(params)
+        except BinanceWsApiUnavailable as e:
+            print(f"WebSocket API 사용불가, REST 주문: {e}")
+        except BinanceWsApiAckLost as e:
+            print(f"WebSocket API 주문 응답 유실, 주문 조회: {e}")
+            return await reconcile_order(f"{BINANCE_BASE_URL}/api/v3/order", 'binance_spot', params['symbol'],
+                                         e.client_order_id, account)
+
+    signer = account.signer
+    url = f"{BINANCE_BASE_URL}/api/v3/order?{signer.sign(params)}"
+    response_json = await account.post(url, headers=signer.headers)
+    return response_json
 
 
 # FUTURE 트레이드
 @router.post('/future/trade')
-async def future_trade(trade_model: BinanceFutureTrade):
+async def future_trade(trade_model: BinanceFutureTrade, account: Account = Depends(current_account)):
     """
         1. 심볼별 레버리지 변경
         2. 심볼별 마진 모드 변경
+           (1, 2는 캐시된 현재값과 다를 때만 동시에 요청)
         3. 실제 주문 실행
         GTC: 체결될 때까지 계속 유지 (기본값)
         IOC: 즉시 체결 가능한 만큼만 체결, 나머지는 취소
         FOK: 전량이 즉시 체결되지 않으면 전부 취소
         GTX: 즉시 체결될 상황이면 자동 취소
         :param trade_model:
+        :param account: 세션 uid 계정 (없으면 config 기본 계정)
         :return:
     """
+    symbol = trade_model.symbol.upper()
+    signer = account.signer
+    tracer.start('binance.future_trade', 'binance_future', symbol, trade_model.side)
+
     # 바이낸스 서버시간 동기화
-    servertime = str(requests.get(url=BINANCE_BASE_F_URL + '/fapi/v1/time').json()['serverTime'])
+    servertime = await clocks['binance_future'].timestamp()
+
+    # 시장가 주문은 로컬 호가창으로 체결가능 수량/슬리피지 확인
+    book = order_books.get('binance_future', symbol.lower())
+    if book is None:
+        await order_books.ensure('binance_future', symbol.lower())
+    elif trade_model.type.upper() == "MARKET" and trade_model.quantity:
+        estimate = book.estimate_fill(trade_model.side, size=float(trade_model.quantity))
+        print(f"예상 체결: {estimate}")
+        if not estimate['is_filled']:
+            tracer.fail("Insufficient order book depth")
+            raise HTTPException(status_code=400, detail="Insufficient order book depth")
+    tracer.mark('validate')
 
     # 레버리지 설정
-    lev_params = OrderedDict([
-        ("symbol", trade_model.symbol.upper()),
-        ("leverage", trade_model.leverage),
-        ("timestamp", servertime),
-        ("recvWindow", 60000),
-    ])
-    lev_query = urlencode(lev_params)
-    lev_signature = hmac.new(
-        BINANCE_API_SECRET.encode(),
-        lev_query.encode(),
-        hashlib.sha256
-    ).hexdigest()
-
-    lev_url = f"{BINANCE_BASE_F_URL}/fapi/v1/leverage?{lev_query}&signature={lev_signature}"
-    lev_res = requests.post(lev_url, headers=HEADERS)
+    async def set_leverage():
+        lev_params = OrderedDict([
+            ("symbol", symbol),
+            ("leverage", trade_model.leverage),
+            ("timestamp", servertime),
+            ("recvWindow", 60000),
+        ])
+        lev_url = f"{BINANCE_BASE_F_URL}/fapi/v1/leverage?{signer.sign(lev_params)}"
+        lev_res = await account.post(lev_url, headers=signer.headers)
+        return 'leverage' in lev_res, lev_res
 
     # 마진 모드 설정(Cross or Isolated)
-    margin_params = OrderedDict([
-        ("symbol", trade_model.symbol.upper()),
-        ("marginType", trade_model.margin_type.upper()),  # ISOLATED 또는 CROSSED
-        ("timestamp", servertime),
-        ("recvWindow", 60000),
-    ])
-    margin_query = urlencode(margin_params)
-    margin_signature = hmac.new(
-        BINANCE_API_SECRET.encode(),
-        margin_query.encode(),
-        hashlib.sha256
-    ).hexdigest()
-
-    margin_url = f"{BINANCE_BASE_F_URL}/fapi/v1/marginType?{margin_query}&signature={margin_signature}"
-    margin_res = requests.post(margin_url, headers=HEADERS)
+    async def set_margin_type():
+        margin_params = OrderedDict([
+            ("symbol", symbol),
+            ("marginType", trade_model.margin_type.upper()),  # ISOLATED 또는 CROSSED
+            ("timestamp", servertime),
+            ("recvWindow", 60000),
+        ])
+        margin_url = f"{BINANCE_BASE_F_URL}/fapi/v1/marginType?{signer.sign(margin_params)}"
+        margin_res = await account.post(margin_url, headers=signer.headers)
+        # -4046: No need to change margin type
+        return margin_res.get('code') in (200, -4046), margin_res
+
+    # 현재 설정과 다른 값만 동시에 요청
+    config_res = await account_config.ensure(
+        account.key, symbol,
+        desired=dict(leverage=trade_model.leverage, margin_type=trade_model.margin_type),
+        setters=dict(leverage=set_leverage, margin_type=set_margin_type),
+    )
+    tracer.mark('config')
 
     # 주문설정
     order_params = OrderedDict([
-        ("symbol", trade_model.symbol.upper()),
+        ("symbol", symbol),
         ("side", trade_model.side.upper()),
         ("positionSide", trade_model.position_side.upper()),
         ("type", trade_model.type.upper()),
@@ -250,27 +347,45 @@ async def future_trade(trade_model: BinanceFutureTrade):
     elif trade_model.type.upper()== "MARKET":
         order_params["quantity"] = trade_model.quantity
 
-    query_string = urlencode(order_params, doseq=True)
-    signature = hmac.new(
-        BINANCE_API_SECRET.encode(),
-        query_string.encode(),
-        hashlib.sha256
-    ).hexdigest()
-
-    order_url = f"{BINANCE_BASE_F_URL}/fapi/v1/order?{query_string}&signature={signature}"
-    order_res = requests.post(order_url, headers=HEADERS)
+    order_res = None
+    try:
+        if use_ws_api(trade_model, account):
+            try:
+                # WebSocket API 는 요청 전송 시 서명 (sign 구간이 send 에 포함)
+                tracer.mark('send')
+                order_res = await ws_api['future'].place_order(order_params)
+            except BinanceWsApiUnavailable as e:
+                print(f"WebSocket API 사용불가, REST 주문: {e}")
+            except BinanceWsApiAckLost as e:
+                print(f"WebSocket API 주문 응답 유실, 주문 조회: {e}")
+                order_res = await reconcile_order(f"{BINANCE_BASE_F_URL}/fapi/v1/order", 'binance_future', symbol,
+                                                  e.client_order_id, account)
+
+        if order_res is None:
+            query_string = signer.sign(order_params)
+            tracer.mark('sign')
+
+            order_url = f"{BINANCE_BASE_F_URL}/fapi/v1/order?{query_string}"
+            tracer.mark('send')
+            order_res = await account.post(order_url, headers=signer.headers)
+    except Exception as e:
+        tracer.fail(str(e))
+        raise
+    tracer.ack(order_res.get('orderId'), ok='orderId' in order_res, error=order_res.get('msg'))
+    if 'orderId' not in order_res:
+        account_config.invalidate(account.key, symbol)
 
     return {
-        "leverage": lev_res.json(),
-        "marginType": margin_res.json(),
-        "order": order_res.json()
+        "leverage": config_res.get('leverage'),
+        "marginType": config_res.get('margin_type'),
+        "order": order_res
     }
 
 
 # FUTURE 미청산 포지션 조회
 @router.get('/future/unliquidated')
-async def future_orders_unliquidated(symbol: str = None):
-    servertime = str(requests.get(url=BINANCE_BASE_F_URL + '/fapi/v1/time').json()['serverTime'])
+async def future_orders_unliquidated(symbol: str = None, account: Account = Depends(current_account)):
+    servertime = await clocks['binance_future'].timestamp()
 
     params = OrderedDict([
         ("timestamp", servertime),
@@ -279,16 +394,10 @@ async def future_orders_unliquidated(symbol: str = None):
     if symbol:
         params['symbol'] = symbol
 
-    query_string = urlencode(params, doseq=True)
-    signature = hmac.new(
-        BINANCE_API_SECRET.encode(),
-        query_string.encode(),
-        hashlib.sha256
-    ).hexdigest()
+    signer = account.signer
+    url = f"{BINANCE_BASE_F_URL}/fapi/v2/positionRisk?{signer.sign(params)}"
 
-    url = f"{BINANCE_BASE_F_URL}/fapi/v2/positionRisk?{query_string}&signature={signature}"
-
-    response_json = requests.get(url, headers=HEADERS).json()
+    response_json = await account.get(url, headers=signer.headers)
     unliquidated_symbol_list = []
 
     for resp in response_json:
@@ -300,8 +409,8 @@ async def future_orders_unliquidated(symbol: str = None):
 
 # FUTURE 주문조회
 @router.get('/future/all/orders')
-async def future_orders(symbol: str = None):
-    servertime = str(requests.get(url=BINANCE_BASE_F_URL + '/fapi/v1/time').json()['serverTime'])
+async def future_orders(symbol: str = None, account: Account = Depends(current_account)):
+    servertime = await clocks['binance_future'].timestamp()
 
     params = OrderedDict([
         ("timestamp", servertime),
@@ -310,24 +419,18 @@ async def future_orders(symbol: str = None):
     if symbol:
         params['symbol'] = symbol
 
-    query_string = urlencode(params, doseq=True)
-    signature = hmac.new(
-        BINANCE_API_SECRET.encode(),
-        query_string.encode(),
-        hashlib.sha256
-    ).hexdigest()
-
-    url = f"{BINANCE_BASE_F_URL}/fapi/v1/allOrders?{query_string}&signature={signature}"
+    signer = account.signer
+    url = f"{BINANCE_BASE_F_URL}/fapi/v1/allOrders?{signer.sign(params)}"
 
-    response = requests.get(url, headers=HEADERS)
-    return response.json()
+    response_json = await account.get(url, headers=signer.headers)
+    return response_json
 
 
 # SPOT withdraw
 # TODO: {"id": "ded217996129448682bc3544a4ed5728"} -> GET /sapi/v1/capital/withdraw/history
 @router.post('/spot/wallet/withdrawal')
-async def spot_withdrawal(withdraw_model: BinanceWithdrawal):
-    servertime = str(requests.get(url=BINANCE_BASE_URL + '/api/v3/time').json()['serverTime'])
+async def spot_withdrawal(withdraw_model: BinanceWithdrawal, account: Account = Depends(current_account)):
+    servertime = await clocks['binance_spot'].timestamp()
 
     params = OrderedDict([
         ("coin", withdraw_model.coin),
@@ -338,14 +441,7 @@ async def spot_withdrawal(withdraw_model: BinanceWithdrawal):
         ("recvWindow", 60000),
     ])
 
-    query_string = urlencode(params, doseq=True)
-    signature = hmac.new(
-        BINANCE_API_SECRET.encode(),
-        query_string.encode(),
-        hashlib.sha256
-    ).hexdigest()
-
-
-    url = f"{BINANCE_BASE_URL}/sapi/v1/capital/withdraw/apply?{query_string}&signature={signature}"
-    response = requests.post(url, headers=HEADERS)
-    return response.json()
\ No newline at end of file
+    signer = account.signer
+    url = f"{BINANCE_BASE_URL}/sapi/v1/capital/withdraw/apply?{signer.sign(params)}"
+    response_json = await account.post(url, headers=signer.headers)
+    return response_json
\ No newline at end of file
@@ -0,0 +1,205 @@
+import json
+import time
+import uuid
+import base64
+import asyncio
+import hmac, hashlib
+
+from urllib.parse import urlencode
+
+import websockets
+from Crypto.PublicKey import ECC
+from Crypto.Signature import eddsa
+
+from core.clock import clocks
+from core.metrics import WS_API_LATENCY, WS_RECONNECTS
+from config.config import (BINANCE_API_SECRET, BINANCE_WS_API_BASE_URL, BINANCE_WS_F_API_BASE_URL, BINANCE_WS_API_KEY,
+                           BINANCE_WS_API_PRIVATE_KEY, BINANCE_WS_API_TIMEOUT, HUB_RECONNECT_MAX_DELAY)
+
+
+class BinanceWsApiUnavailable(ConnectionError):
+    """요청을 전송하지 못함 (REST로 재시도해도 중복 주문 위험 없음)"""
+
+
+class BinanceWsApiAckLost(Exception):
+    """주문은 전송했지만 응답 전에 연결이 끊기거나 시간 초과 (체결 여부 불명, 재주문하지 말고 client_order_id 로 조회)"""
+    def __init__(self, client_order_id: str, reason: str):
+        super().__init__(f"{client_order_id}: {reason}")
+        self.client_order_id = client_order_id
+
+
+class BinanceWsApi:
+    """
+        바이낸스 WebSocket API 주문 세션
+        - 연결 1개에 요청을 파이프라이닝, 응답은 request id로 매칭
+        - Ed25519 키가 있으면 session.logon 으로 인증, 없으면 요청마다 HMAC 서명
+        - 연결이 끊기면 재접속 후 재인증
+    """
+    def __init__(self, name: str, url: str, clock: str, api_key: str = BINANCE_WS_API_KEY,
+                 secret: str = BINANCE_API_SECRET, private_key_path: str = BINANCE_WS_API_PRIVATE_KEY,
+                 timeout: float = BINANCE_WS_API_TIMEOUT):
+        self.name = name
+        self.url = url
+        self.clock = clock
+        self.api_key = api_key
+        self.secret = secret
+        self.private_key = None
+        if private_key_path:
+            with open(private_key_path) as f:
+                self.private_key = ECC.import_key(f.read())
+        self.timeout = timeout
+
+        self.ws = None
+        self.task = None
+        self.pending = {}
+        self.connected = asyncio.Event()
+        self.logged_on = False
+
+    @property
+    def is_ready(self) -> bool:
+        return self.connected.is_set()
+
+    async def timestamp(self) -> int:
+        return int(await clocks[self.clock].timestamp())
+
+    def hmac_sign(self, params: dict) -> dict:
+        params = dict(params, apiKey=self.api_key)
+        query_string = urlencode(sorted(params.items()))
+        params['signature'] = hmac.new(self.secret.encode(), query_string.encode(), hashlib.sha256).hexdigest()
+        return params
+
+    def ed25519_sign(self, params: dict) -> dict:
+        params = dict(params, apiKey=self.api_key)
+        query_string = urlencode(sorted(params.items()))
+        signature = eddsa.new(self.private_key, 'rfc8032').sign(query_string.encode())
+        params['signature'] = base64.b64encode(signature).decode()
+        return params
+
+    async def call(self, ws, method: str, params: dict = None) -> dict:
+        request_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            payload = {"id": request_id, "method": method}
+            if params is not None:
+                payload["params"] = params
+            try:
+                await ws.send(json.dumps(payload))
+            except websockets.exceptions.ConnectionClosed as e:
+                raise BinanceWsApiUnavailable(str(e))
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def logon(self, ws):
+        self.logged_on = False
+        if self.private_key is None:
+            return
+        params = self.ed25519_sign({"timestamp": await self.timestamp()})
+        response = await self.call(ws, "session.logon", params)
+        self.logged_on = response.get('status') == 200
+        print(f"[{self.name}] session.logon: {response.get('status')}")
+
+    def dispatch(self, raw: str):
+        response = json.loads(raw)
+        future = self.pending.get(response.get('id'))
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    async def reader(self, ws):
+        async for raw in ws:
+            self.dispatch(raw)
+
+    async def run(self):
+        delay = 1
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=30, ping_timeout=10) as ws:
+                    reader = asyncio.create_task(self.reader(ws))
+                    try:
+                        self.ws = ws
+                        await self.logon(ws)
+                        self.connected.set()
+                        delay = 1
+                        await reader
+                    finally:
+                        reader.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[{self.name}] WebSocket API 연결 종료: {e}")
+                WS_RECONNECTS.labels(self.name).inc()
+            finally:
+                self.connected.clear()
+                self.ws = None
+                for future in self.pending.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError(f"{self.name} connection closed"))
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, HUB_RECONNECT_MAX_DELAY)
+
+    def start(self):
+        if self.url and (self.task is None or self.task.done()):
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def request(self, method: str, params: dict) -> dict:
+        """
+            연결이 없으면 BinanceWsApiUnavailable (전송 전 실패)
+            응답 성공 시 result, 실패 시 REST와 같은 {"code", "msg"} 반환
+        """
+        if not self.is_ready:
+            self.start()
+            raise BinanceWsApiUnavailable(f"{self.name} is not connected")
+
+        params = {key: value for key, value in params.items() if value is not None}
+        params = params if self.logged_on else self.hmac_sign(params)
+        status = 'error'
+        start = time.perf_counter()
+        try:
+            response = await self.call(self.ws, method, params)
+            status = response.get('status')
+        finally:
+            WS_API_LATENCY.labels(self.name, method, str(status)).observe(time.perf_counter() - start)
+
+        # 세션 만료 등 인증 실패 시 재인증 후 1회 재시도
+        if response.get('status') == 401 and self.private_key is not None:
+            await self.logon(self.ws)
+            response = await self.call(self.ws, method, params if self.logged_on else self.hmac_sign(params))
+
+        if response.get('status') == 200:
+            return response['result']
+        return response.get('error', response)
+
+    async def place_order(self, params: dict) -> dict:
+        """
+            응답 유실 시 BinanceWsApiAckLost (조회용 newClientOrderId 는 없으면 여기서 지정)
+        """
+        params = dict(params)
+        params.setdefault('newClientOrderId', uuid.uuid4().hex)
+        try:
+            return await self.request("order.place", params)
+        except BinanceWsApiUnavailable:
+            raise
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            raise BinanceWsApiAckLost(params['newClientOrderId'], str(e) or type(e).__name__)
+
+
+ws_api = {
+    'spot': BinanceWsApi('binance_ws_api_spot', BINANCE_WS_API_BASE_URL, clock='binance_spot'),
+    'future': BinanceWsApi('binance_ws_api_future', BINANCE_WS_F_API_BASE_URL, clock='binance_future'),
+}
+
+
+def start_ws_api():
+    for client in ws_api.values():
+        client.start()
+
+
+async def stop_ws_api():
+    await asyncio.gather(*(client.stop() for client in ws_api.values()))
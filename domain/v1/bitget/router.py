@@ -1,20 +1,22 @@
-import asyncio
-
-import websockets
-from fastapi import APIRouter, WebSocket
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from collections import OrderedDict
 
-import aiohttp
 import time
-import requests
 import hmac
 import hashlib
 import base64
 import json
 
 from urllib.parse import urlencode
+from core.hub import hub
+from core.clock import clocks
+from core.transport import transport
+from core.cache import response_cache
+from core.accounts import accounts, Account, account_dependency
+from core.trace import tracer
+from core.logger import get_logger
 from config.models.bitget import BitgetTrade
-from config.config import BITGET_API_KEY, BITGET_API_SECRET, BITGET_API_PASSPHRASE, BITGET_BASE_URL, BITGET_WS_BASE_URL
+from config.config import BITGET_BASE_URL, CACHE_TTL_SYMBOLS
 
 router = APIRouter(
     prefix='/api/v1/bitget',
@@ -22,15 +24,17 @@ router = APIRouter(
     include_in_schema=True,
 )
 
+stream_log = get_logger('stream.bitget')
+
 
-def get_server_time():
-    return str(requests.get(BITGET_BASE_URL + '/public/time').json()['data']['serverTime'])
+async def get_server_time():
+    return await clocks['bitget'].timestamp()
 
 
-def auth_headers(access_sign: str, server_time: str) -> dict:
+def auth_headers(api_key: str, passphrase: str, access_sign: str, server_time: str) -> dict:
     return {
-        "ACCESS-KEY": BITGET_API_KEY,
-        "ACCESS-PASSPHRASE": BITGET_API_PASSPHRASE,
+        "ACCESS-KEY": api_key,
+        "ACCESS-PASSPHRASE": passphrase,
         "ACCESS-SIGN": access_sign,
         "ACCESS-TIMESTAMP": server_time,
         "Content-Type": "application/json",
@@ -38,7 +42,7 @@ def auth_headers(access_sign: str, server_time: str) -> dict:
     }
 
 
-def generate_signature(server_time: str, method: str, request_path: str,
+def generate_signature(secret_key: str, server_time: str, method: str, request_path: str,
                        query_params: dict = None, body: dict = None) -> str:
     query_string = ""
     if query_params:
@@ -54,7 +58,7 @@ def generate_signature(server_time: str, method: str, request_path: str,
         pre_hash = f"{server_time}{method.upper()}{request_path}{body_str}"
 
     signature_bytes = hmac.new(
-        BITGET_API_SECRET.encode('utf-8'),
+        secret_key.encode('utf-8'),
         pre_hash.encode('utf-8'),
         hashlib.sha256
     ).digest()
@@ -64,91 +68,88 @@ def generate_signature(server_time: str, method: str, request_path: str,
     return signature
 
 
+class BitgetSigner:
+    """계정별 서명 / 인증 헤더"""
+    def __init__(self, api_key: str, secret_key: str, passphrase: str):
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.passphrase = passphrase
+
+    def headers(self, server_time: str, method: str, request_path: str, query_params: dict = None, body: dict = None) -> dict:
+        signature = generate_signature(self.secret_key, server_time, method, request_path, query_params, body)
+        return auth_headers(self.api_key, self.passphrase, signature, server_time)
+
+
+accounts.register('bitget', signer=lambda account: BitgetSigner(account.api_key, account.secret_key, account.passphrase))
+current_account = account_dependency('bitget')
+
+
+# 서버시간 오프셋 모니터링
+@router.get('/clock')
+async def clock_status():
+    return clocks['bitget'].status()
+
+
 # 전체 심볼 조회
 @router.get('/symbols')
 async def spot_symbols():
-    response = requests.get(url=BITGET_BASE_URL + '/spot/public/symbols')
-    return response.json()
+    async def load():
+        return await transport.get(BITGET_BASE_URL + '/spot/public/symbols')
+
+    return await response_cache.response(('bitget.symbols',), CACHE_TTL_SYMBOLS, load,
+                                         lambda response_json: response_json.get('code') == '00000')
 
 
 # TODO: 유저 자산 조회 spot/future 분기처리
 @router.get('/user/spot/asset')
-async def user_spot_asset():
+async def user_spot_asset(account: Account = Depends(current_account)):
     timestamp = str(int(time.time() * 1000))
-    signature = generate_signature(timestamp, 'GET', '/api/v2/spot/account/assets')
-
-    headers = auth_headers(signature, timestamp)
+    headers = account.signer.headers(timestamp, 'GET', '/api/v2/spot/account/assets')
 
-    response = requests.get(url=BITGET_BASE_URL + '/spot/account/assets', headers=headers)
+    response_json = await account.get(BITGET_BASE_URL + '/spot/account/assets', headers=headers)
 
-    return response.json()
+    return response_json
 
 
 # TODO: FUTURE 현재가 조회 Ticker
 @router.websocket('/ws/future/currency')
 async def get_future_currency(websocket: WebSocket):
     await websocket.accept()
-    async with websockets.connect(BITGET_WS_BASE_URL, ping_interval=30, ping_timeout=10) as bitget_ws:
-        subscribe_msg = {
-            "op": "subscribe",
-            "args": [
-                {
-                    "instType": "COIN-FUTURES",
-                    "channel": "ticker",
-                    "instId": "POPCATPERP_CMCBL"
-                }
-            ]
-        }
-        await bitget_ws.send(json.dumps(subscribe_msg))
-
-        try:
+    try:
+        async with hub.stream('bitget_future', 'ticker', 'POPCATPERP_CMCBL') as subscription:
             while True:
-                msg = await bitget_ws.recv()
-                print(msg)
-                await websocket.send_text(msg)
-        except websockets.exceptions.ConnectionClosed as e:
-            print(f"Bitget WS 연결 종료: {e}")
-        finally:
-            await websocket.close()
+                message = await subscription.get()
+                if message.data.get('data'):
+                    stream_log.info("ticker", venue='bitget_future', inst_id='POPCATPERP_CMCBL',
+                                    last=message.data['data'][0].get('lastPr'))
+                await websocket.send_text(message.raw)
+    except WebSocketDisconnect as e:
+        print(f"클라이언트 연결 종료: {e}")
 
 
 # TODO: 현재가 조회 Ticker spot/future 분기처리
 @router.websocket('/ws/spot/currency')
 async def get_spot_currency(websocket: WebSocket):
     await websocket.accept()
-    async with websockets.connect(BITGET_WS_BASE_URL, ping_interval=30, ping_timeout=10) as bitget_ws:
-        # 구독 메시지 세팅 (args 추가 가능)
-        subscribe_msg = {
-            "op": "subscribe",
-            "args": [
-                {
-                    "instType": "SPOT",
-                    "channel": "ticker",
-                    "instId": "BTCUSDT"
-                }
-            ]
-        }
-        # Bitget 서버에 구독 요청
-        await bitget_ws.send(json.dumps(subscribe_msg))
-
-        # Bitget -> 서버 -> 클라이언트로 브로드캐스팅
-        try:
+    # Bitget 구독은 허브에서 공유 (args 추가 시 channel/instId 별로 stream)
+    # Bitget -> 서버 -> 클라이언트로 브로드캐스팅
+    try:
+        async with hub.stream('bitget_spot', 'ticker', 'BTCUSDT') as subscription:
             while True:
-                msg = await bitget_ws.recv()
-                recv_data = json.loads(msg)
-                if 'data' in recv_data and recv_data['data']:
-                    print(recv_data['data'][0]['lastPr'])
-                await websocket.send_text(msg)
-        except websockets.exceptions.ConnectionClosed as e:
-            print(f"Bitget WS 연결 종료: {e}")
-        finally:
-            await websocket.close()
+                message = await subscription.get()
+                if message.data['data']:
+                    stream_log.info("ticker", venue='bitget_spot', inst_id='BTCUSDT', last=message.data['data'][0]['lastPr'])
+                await websocket.send_text(message.raw)
+    except WebSocketDisconnect as e:
+        print(f"클라이언트 연결 종료: {e}")
 
 
 # SPOT 트레이드
 @router.post('/spot/trade')
-async def spot_trade(trade_model: BitgetTrade):
-    server_time = get_server_time()
+async def spot_trade(trade_model: BitgetTrade, account: Account = Depends(current_account)):
+    tracer.start('bitget.spot_trade', 'bitget', trade_model.symbol, trade_model.side)
+    server_time = await get_server_time()
+    tracer.mark('config')
 
     path = "/api/v2/spot/trade/place-order"
     body = OrderedDict([
@@ -161,17 +162,24 @@ async def spot_trade(trade_model: BitgetTrade):
         body["force"] = trade_model.force
     body["size"] = trade_model.size
 
-    signature = generate_signature(server_time, 'POST', path, None, body)
-    headers = auth_headers(signature, server_time)
+    headers = account.signer.headers(server_time, 'POST', path, None, body)
+    tracer.mark('sign')
 
-    response = requests.post(url=BITGET_BASE_URL + '/spot/trade/place-order', headers=headers, json=body)
-    return response.json()
+    tracer.mark('send')
+    try:
+        response_json = await account.post(BITGET_BASE_URL + '/spot/trade/place-order', headers=headers, json=body)
+    except Exception as e:
+        tracer.fail(str(e))
+        raise
+    tracer.ack((response_json.get('data') or {}).get('orderId'), ok=response_json.get('code') == '00000',
+               error=response_json.get('msg'))
+    return response_json
 
 
 # SPOT 출금
 @router.post('/spot/wallet/withdrawal')
-async def spot_withdrawal():
-    server_time = get_server_time()
+async def spot_withdrawal(account: Account = Depends(current_account)):
+    server_time = await get_server_time()
 
     path = "/api/v2/spot/wallet/withdrawal"
     body = OrderedDict([
@@ -182,8 +190,7 @@ async def spot_withdrawal():
         ("size", "29")
     ])
 
-    signature = generate_signature(server_time, 'POST', path, None, body)
-    headers = auth_headers(signature, server_time)
+    headers = account.signer.headers(server_time, 'POST', path, None, body)
 
-    response = requests.post(url=BITGET_BASE_URL + '/spot/wallet/withdrawal', headers=headers, json=body)
-    return response.json()
\ No newline at end of file
+    response_json = await account.post(BITGET_BASE_URL + '/spot/wallet/withdrawal', headers=headers, json=body)
+    return response_json
\ No newline at end of file
@@ -1,17 +1,31 @@
 import time
 import json
 import asyncio
-import websockets
 import uuid, hmac, hashlib, base64
-import aiohttp
 
 from urllib.parse import urlencode
-from setting import SETTINGS
+from fastapi import HTTPException
+from domain.v1.blockfin.setting import SETTINGS
+from domain.v1.blockfin.session import get_private_session, release_private_session
+from core.accounts import accounts, Account
+from core.hub import hub
+from core.price_cache import price_cache
+from core.instruments import instruments
+from core.account_state import account_config
+from core.trace import tracer
+from core.logger import get_logger
+from config.config import BLOCKFIN_BASE_URL
 
 
-BLOCKFIN_BASE_URL = 'https://openapi.blockfin.com'
-BLOCKFIN_WS_BASE_URL = 'wss://openapi.blockfin.com/ws/public'
-BLOCKFIN_WS_PRIVATE_URL = 'wss://openapi.blockfin.com/ws/private'
+private_log = get_logger('private.blockfin')
+
+
+def order_id_of(response: dict):
+    # 주문 응답 data: {orderId ...} 또는 [{orderId ...}]
+    data = response.get('data') if isinstance(response, dict) else None
+    if isinstance(data, list):
+        data = data[0] if data else None
+    return data.get('orderId') if isinstance(data, dict) else None
 
 
 class BlockFin:
@@ -62,144 +76,97 @@ class BlockFin:
         }
 
 
+# 계정 레지스트리: 계정별 signer / private 세션 생성 방법
+accounts.register(
+    'blockfin',
+    signer=lambda account: BlockFin(account.uid, account.api_key, account.secret_key, account.passphrase),
+    session=lambda account: get_private_session(account.signer),
+    release=lambda account: release_private_session(account.api_key),
+)
+
+
 class BlockFinTrade:
-    def __init__(self, uid, api_key, secret_key, passphrase):
-        self.account = BlockFin(uid, api_key, secret_key, passphrase)
+    """
+        계정 레지스트리의 Account 1개로 주문 / private 스트림 (signer, private 세션, 계정별 REST 제한 모두 Account 것 사용)
+    """
+    def __init__(self, account: Account):
+        self.account = account
         self.interface_ws = None # LogicProcess가 나중에 주입.
 
-    # 블록핀 웹소켓 로그인
-    async def websocket_login(self):
-        method = "GET"
-        path = "/users/self/verify"
-        timestamp, nonce, query_string, signature = await self.account.generate_signature(method, path)
-
-        login_msg = {
-            "op": "login",
-            "args": [{
-                "apiKey": self.account.api_key,
-                "passphrase": self.account.passphrase,
-                "timestamp": timestamp,
-                "sign": signature,
-                "nonce": nonce
-            }]
-        }
-        async with websockets.connect(BLOCKFIN_WS_PRIVATE_URL, ping_interval=30, ping_timeout=10) as blockfin_ws:
-            await blockfin_ws.send(json.dumps(login_msg))
-            login_resp = await blockfin_ws.recv()
-            print(f"LOGIN_RESP: {login_resp}")
-            return login_resp
+    @property
+    def signer(self) -> BlockFin:
+        return self.account.signer
+
+    @property
+    def session(self):
+        return self.account.session
+
+    @property
+    def account_key(self) -> str:
+        return self.account.key
+
+    # 블록핀 웹소켓 로그인 (계정당 private 세션 1개를 공유)
+    async def websocket_login(self) -> bool:
+        is_login = await self.session.login()
+        print(f"LOGIN_RESP: {self.session.login_resp}")
+        return is_login
 
     # 1. 자산 조회
     async def fetch_wallet_balance(self) -> dict:
-        async with websockets.connect(BLOCKFIN_WS_PRIVATE_URL, ping_interval=30, ping_timeout=10) as blockfin_ws:
-            login_resp = self.websocket_login()
-            if '"event":"login"' in login_resp and '"code":"0"' in login_resp:
-                print("Login success")
-                subscribe_msg = {
-                    "op": "subscribe",
-                    "args": [
-                        {
-                            "channel": "account"
-                        }
-                    ]
-                }
-                await blockfin_ws.send(json.dumps(subscribe_msg))
-
+        if await self.websocket_login():
+            print("Login success")
+            async with self.session.stream("account") as queue:
                 # push 데이터 수신 루프
                 while True:
-                    try:
-                        msg = await blockfin_ws.recv()
-                        data = json.loads(msg)
-                        print(f"자산조회: {data}")
-                    except Exception as e:
-                        print(f"Error in recv loop: {e}")
-                        break
-
-    # 2. 실시간 가격 스트림
+                    data = await queue.get()
+                    private_log.info("자산조회 %s", data)
+
+    # 2. 실시간 가격 스트림 (허브 구독 공유)
     async def fetch_symbol_price(self, inst_id: str = "BTC-USDT"):
-        async with websockets.connect(BLOCKFIN_WS_BASE_URL, ping_interval=30, ping_timeout=10) as ws:
-            subscribe_msg = {
-                "op": "subscribe",
-                "args": [{"channel": "trades", "instId": inst_id}]
-            }
-            await ws.send(json.dumps(subscribe_msg))
+        async with hub.stream('blockfin', 'trades', inst_id) as subscription:
             print(f"[{inst_id}] trades 채널 구독 시작")
-
             while True:
-                try:
-                    msg = await ws.recv()
-                    data = json.loads(msg)
-                    if "data" in data and data["arg"]["channel"] == "trades":
-                        price = float(data["data"][0]["price"])
-                        yield price
-                except Exception as e:
-                    print(f"[fetch_symbol_price] 에러: {e}")
-                    break
-
-    # 3. 한번만 현재가 가져오기
+                message = await subscription.get()
+                yield float(message.data["data"][0]["price"])
+
+    # 3. 현재가 (상시 구독 중인 가격 캐시에서 조회)
     async def fetch_symbol_price_once(self, inst_id: str = "BTC-USDT") -> float:
-        async for price in self.fetch_symbol_price(inst_id):
-            return price  # 첫 번째 값만 받고 바로 종료
+        return await price_cache.last_price('blockfin', inst_id)
 
     # 3. 보유포지션 현황
     async def fetch_positions(self) -> dict:
-        login_resp = self.websocket_login()
+        if await self.websocket_login():
+            print("Login success, subscribing to positions...")
+            async with self.session.stream("positions") as queue:
+                position_resp = await queue.get()
+                print(f"WSS POSITION RESP: {position_resp}")
+                return position_resp
 
-        async with websockets.connect(BLOCKFIN_WS_PRIVATE_URL) as blockfin_ws:
-            if '"event":"login"' in login_resp and '"code":"0"' in login_resp:
-                print("Login success, subscribing to positions...")
-                subscribe_msg = {
-                    "op": "subscribe",
-                    "args": [
-                        {
-                            "channel": "positions"
-                        }
-                    ]
-                }
-                for symbol in ['BTC-USDT', 'ETH-USDT']:
-                    subscribe_msg['args'][0]['instId'] = symbol
-                    await blockfin_ws.send(json.dumps(subscribe_msg))
-
-                # push 데이터 수신 루프
-                while True:
-                    try:
-                        position_resp = await blockfin_ws.recv()
-                        print(f"WSS POSITION RESP: {position_resp}")
-
-                        return position_resp
-                    except Exception as e:
-                        print(f"Error in recv loop: {e}")
-                        break
-
-    # 4. 심볼설정값 가져오기
-    async def set_symbols(self, inst_id: str):
-        return_obj = {}
-
-        query_params = {"instId": inst_id}  # BTC-USDT
-        request_path = '/api/v1/market/instruments'
-        timestamp, nonce, query_string, signature = self.account.generate_signature(method='GET', request_path=request_path, query_params=query_params)
-        headers = self.account.set_auth_headers(signature, timestamp, nonce)
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{BLOCKFIN_BASE_URL}{request_path}?{query_string}", headers=headers) as resp:
-                response_data = await resp.json()
-        return_obj[inst_id] = response_data
-        return return_obj
+    # 4. 심볼설정값 가져오기 (심볼 레지스트리 조회)
+    async def set_symbols(self, inst_id: str) -> dict:
+        return await instruments.fetch('blockfin', inst_id)
 
     # 5. 주문 사이즈 검증
     async def validate_req_size(self, setting):
         inst_id = setting['inst_id']
         current_order_idx = setting['current_order_idx']
         leverage = setting['leverage']
-        symbol_obj = await self.set_symbols(inst_id)
+        instrument = await self.set_symbols(inst_id)
+        if instrument is None:
+            # 미상장 심볼 (또는 재조회 대기 중)
+            raise HTTPException(status_code=404, detail="Unknown instrument")
 
         # 수량 = (진입금액 * 레버리지) / 진입시점가격
-        current_price = await self.fetch_symbol_price_once(inst_id)  # 현재가격
+        try:
+            current_price = await self.fetch_symbol_price_once(inst_id)  # 현재가격
+        except TimeoutError:
+            raise HTTPException(status_code=503, detail="No price for instrument")
 
-        amount = float(setting['additional'][current_order_idx]['amount'])  # 진입금액
+        amount = float(setting['addtional_entry'][current_order_idx]['amount'])  # 진입금액
         input_size = (amount * leverage) / current_price
-        contract_value = float(symbol_obj[inst_id]['data'][0]['contractValue'])
+        contract_value = instrument['contract_value']
         req_size = str(input_size / contract_value)
-        lot_size = float(symbol_obj[inst_id]['data'][0]['lotSize'])
+        lot_size = instrument['lot_size']
         print(f"요청사이즈 / 단위사이즈: {req_size} / {lot_size}")
 
         if input_size / contract_value < lot_size:
@@ -209,44 +176,61 @@ class BlockFinTrade:
             return True, req_size
 
     # 6. 매수주문 함수
-    async def place_order(self, inst_id: str, margin_mode: str, leverage: int, position_side: str, side: str, order_type: str, req_size:float):
+    async def place_order(self, inst_id: str, margin_mode: str, leverage: int, position_side: str, side: str, order_type: str, req_size:float,
+                          reduce_only: bool = False):
         # set position mode(one-way or hedge) 'net_mode' / 'long_short_mode'
-        position_mode_request_path = '/api/v1/account/set-position-mode'
-        body = dict(positionMode='long_short_mode')
-        timestamp, nonce, query_string, signature = self.account.generate_signature(method='POST', request_path=position_mode_request_path,
-                                                                                    query_params=None, body=body)
-        headers = self.account.set_auth_headers(signature, timestamp, nonce)
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{BLOCKFIN_BASE_URL}{position_mode_request_path}", headers=headers, json=body) as resp:
-                position_mode_response_json = await resp.json()
-        print(f"position_mode 응답: {position_mode_response_json}")
+        async def set_position_mode():
+            position_mode_request_path = '/api/v1/account/set-position-mode'
+            body = dict(positionMode='long_short_mode')
+            timestamp, nonce, query_string, signature = await self.signer.generate_signature(method='POST', request_path=position_mode_request_path,
+                                                                                             query_params=None, body=body)
+            headers = await self.signer.set_auth_headers(signature, timestamp, nonce)
+            position_mode_response_json = await self.account.post(f"{BLOCKFIN_BASE_URL}{position_mode_request_path}", headers=headers, json=body)
+            print(f"position_mode 응답: {position_mode_response_json}")
+            return position_mode_response_json.get('code') == '0', position_mode_response_json
 
         # --------------------------------------------------------------------------------------------------------
 
-        # set  'cross' / 'imargin_modesolated'
-        margin_mode_request_path = '/api/v1/account/set-margin-mode'
-        body = dict(marginMode=margin_mode)
-        timestamp, nonce, query_string, signature = self.account.generate_signature(method='POST', request_path=margin_mode_request_path,
-                                                                                    query_params=None, body=body)
-        headers = self.account.set_auth_headers(signature, timestamp, nonce)
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{BLOCKFIN_BASE_URL}{margin_mode_request_path}", headers=headers, json=body) as resp:
-                margin_mode_response_json = await resp.json()
-        print(f"margin_mode_response_json 응답: {margin_mode_response_json}")
+        # set margin_mode 'cross' / 'isolated'
+        async def set_margin_mode():
+            margin_mode_request_path = '/api/v1/account/set-margin-mode'
+            body = dict(marginMode=margin_mode)
+            timestamp, nonce, query_string, signature = await self.signer.generate_signature(method='POST', request_path=margin_mode_request_path,
+                                                                                             query_params=None, body=body)
+            headers = await self.signer.set_auth_headers(signature, timestamp, nonce)
+            margin_mode_response_json = await self.account.post(f"{BLOCKFIN_BASE_URL}{margin_mode_request_path}", headers=headers, json=body)
+            print(f"margin_mode_response_json 응답: {margin_mode_response_json}")
+            return margin_mode_response_json.get('code') == '0', margin_mode_response_json
 
         # --------------------------------------------------------------------------------------------------------
 
         # set leverage
-        leverage_request_path = '/api/v1/account/set-leverage'
-        body = dict(instId=inst_id, leverage=leverage, marginMode=margin_mode, positionSide=position_side)
-        timestamp, nonce, query_string, signature = self.account.generate_signature(method='POST', request_path=leverage_request_path,
-                                                                                    query_params=None,
-                                                                                    body=body)
-        headers = self.account.set_auth_headers(signature, timestamp, nonce)
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{BLOCKFIN_BASE_URL}{leverage_request_path}", headers=headers, json=body) as resp:
-                leverage_response_json = await resp.json()
-        print(f"leverage_response_json 응답: {leverage_response_json}")
+        async def set_leverage():
+            leverage_request_path = '/api/v1/account/set-leverage'
+            body = dict(instId=inst_id, leverage=leverage, marginMode=margin_mode, positionSide=position_side)
+            timestamp, nonce, query_string, signature = await self.signer.generate_signature(method='POST', request_path=leverage_request_path,
+                                                                                             query_params=None,
+                                                                                             body=body)
+            headers = await self.signer.set_auth_headers(signature, timestamp, nonce)
+            leverage_response_json = await self.account.post(f"{BLOCKFIN_BASE_URL}{leverage_request_path}", headers=headers, json=body)
+            print(f"leverage_response_json 응답: {leverage_response_json}")
+            return leverage_response_json.get('code') == '0', leverage_response_json
+
+        # --------------------------------------------------------------------------------------------------------
+
+        # 캐시된 현재값과 다른 설정만 요청 (계정 단위 -> 심볼 단위)
+        await account_config.ensure(
+            self.account_key, None,
+            desired=dict(position_mode='long_short_mode', margin_mode=margin_mode),
+            setters=dict(position_mode=set_position_mode, margin_mode=set_margin_mode),
+        )
+        await account_config.ensure(
+            self.account_key, inst_id,
+            desired={f"leverage:{position_side}": leverage},
+            setters={f"leverage:{position_side}": set_leverage},
+        )
+
+        tracer.mark('config')
 
         # --------------------------------------------------------------------------------------------------------
 
@@ -254,20 +238,30 @@ class BlockFinTrade:
         request_path = '/api/v1/trade/order'
         body = dict(instId=inst_id, marginMode=margin_mode, positionSide=position_side, side=side,
                     orderType=order_type, size=req_size)
-
-        timestamp, nonce, query_string, signature = self.account.generate_signature(method='POST', request_path=request_path, query_params=None,
-                                                                                    body=body)
-        headers = self.account.set_auth_headers(signature, timestamp, nonce)
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{BLOCKFIN_BASE_URL}{request_path}", headers=headers, json=body) as resp:
-                order_response_json = await resp.json()
-                return order_response_json
+        if reduce_only:
+            body['reduceOnly'] = 'true'
+
+        timestamp, nonce, query_string, signature = await self.signer.generate_signature(method='POST', request_path=request_path, query_params=None,
+                                                                                   body=body)
+        tracer.mark('sign')
+        headers = await self.signer.set_auth_headers(signature, timestamp, nonce)
+        tracer.mark('send')
+        try:
+            order_response_json = await self.account.post(f"{BLOCKFIN_BASE_URL}{request_path}", headers=headers, json=body)
+        except Exception as e:
+            tracer.fail(str(e))
+            raise
+        tracer.ack(order_id_of(order_response_json), ok=order_response_json.get('code') == '0', error=order_response_json.get('msg'))
+        if order_response_json.get('code') != '0':
+            account_config.invalidate(self.account_key, None)
+            account_config.invalidate(self.account_key, inst_id)
+        return order_response_json
 
     # 7. 포지션 진입
     async def enter_position(self, position: str = "BTC_LONG") -> dict:
         setting = SETTINGS[position]
 
-        current_order_idx = setting['additional_entry_idx']  # 현재 진입순서
+        current_order_idx = setting['current_order_idx']  # 현재 진입순서
         entry_length = len(setting['addtional_entry'])
         is_trading = setting['is_trading']
         is_stop = setting['is_stop']
@@ -278,19 +272,26 @@ class BlockFinTrade:
             position_side = setting['position_side']
             leverage = setting['leverage']
             order_type = setting['order_type']
-            side = 'BUY'
+            side = 'buy' if position_side == 'long' else 'sell'
+            tracer.start('blockfin.enter_position', 'blockfin', inst_id, side)
 
             # validate size
-            is_validate, req_size = await self.validate_req_size(setting)
+            try:
+                is_validate, req_size = await self.validate_req_size(setting)
+            except HTTPException as e:
+                tracer.fail(e.detail)
+                raise
+            tracer.mark('validate')
 
             if is_validate:
                 order_response_json = await self.place_order(inst_id, margin_mode, leverage, position_side, side, order_type, req_size)
                 print(f"응답: {order_response_json}")
                 # current_order_idx: 1 추가
                 if entry_length > current_order_idx:
-                    setting['additional_entry_idx'] += 1
+                    setting['current_order_idx'] += 1
                 return order_response_json
             else:
+                tracer.fail("Requested size is Too Small")
                 print("Requested size is Too Small")
         elif is_trading:
             return "트레이딩 중입니다"
@@ -306,34 +307,30 @@ class BlockFinTrade:
         position_side = setting['position_side']
         entry_length = len(setting['addtional_entry'])
         current_order_idx = setting['current_order_idx']
-        login_resp = self.websocket_login()
 
         if is_trading and not is_stop and current_order_idx != 0:
-            async with websockets.connect(BLOCKFIN_WS_PRIVATE_URL) as blockfin_ws:
-                if '"event":"login"' in login_resp and '"code":"0"' in login_resp:
-                    print("Login success, subscribing to positions...")
-                    # 구독 메시지: 보유포지션 현황
-                    subscribe_msg = {
-                        "op": "subscribe",
-                        "args": [
-                            {
-                                "channel": "positions",
-                                "inst_id": inst_id
-                            }
-                        ]
-                    }
-                    # 구독 메시지 요청
-                    await blockfin_ws.send(json.dumps(subscribe_msg))
+            if await self.websocket_login():
+                print("Login success, subscribing to positions...")
+                # 구독: 보유포지션 현황 (계정 private 세션에서 공유)
+                async with self.session.stream("positions", inst_id) as queue:
                     # 구독 데이터 수신 루프
                     while True:
                         try:
-                            msg = await blockfin_ws.recv()
-                            position_resp = json.loads(msg)
-                            print(f"POSITION RESP: {position_resp}")
-                            markPrice = position_resp['data'][0]['markPrice']   # 현재가
-                            averagePrice = position_resp['data'][0]['averagePrice'] # 매수단가
-                            leverage = position_resp['data'][0]['leverage']
-
+                            position_resp = await queue.get()
+                            private_log.info("POSITION RESP %s", position_resp)
+                            if not position_resp.get('data'):
+                                continue
+                            account_config.update_from_blockfin_positions(self.account_key, position_resp['data'])
+                            markPrice = float(position_resp['data'][0]['markPrice'])   # 현재가
+                            price_cache.update('blockfin', inst_id, mark=markPrice)
+                            averagePrice = float(position_resp['data'][0]['averagePrice']) # 매수단가
+                            leverage = float(position_resp['data'][0]['leverage'])
+
+                            # 진입순서는 push 마다 다시 읽음 (이전 push 에서 추가진입했으면 다음 gap 기준), 남은 진입이 없거나 정지면 종료
+                            current_order_idx = setting['current_order_idx']
+                            if current_order_idx >= entry_length or setting['is_stop']:
+                                print("추가진입 종료")
+                                break
                             gap = setting['addtional_entry'][current_order_idx]['gap']
                             multiplier = 1 if position_side == "long" else -1
                             roi = (markPrice - averagePrice) / averagePrice * leverage * 100 * multiplier
@@ -343,18 +340,20 @@ class BlockFinTrade:
                                 position_side = setting['position_side']
                                 leverage = setting['leverage']
                                 order_type = setting['order_type']
-                                side = 'BUY'
+                                side = 'buy' if position_side == 'long' else 'sell'
+                                tracer.start('blockfin.additional_entry', 'blockfin', inst_id, side)
 
                                 is_validate, req_size = await self.validate_req_size(setting)
+                                tracer.mark('validate')
 
                                 if is_validate:
                                     order_response_json = await self.place_order(inst_id, margin_mode, leverage, position_side, side, order_type,
                                                                                  req_size)
                                     print(f"응답: {order_response_json}")
                                     # current_order_idx: 1 추가
-                                    if entry_length > current_order_idx:
-                                        setting['additional_entry_idx'] += 1
+                                    setting['current_order_idx'] += 1
                                 else:
+                                    tracer.fail("Requested size is Too Small")
                                     print("Requested size is Too Small")
                         except Exception as e:
                             print(f"Error in recv loop: {e}")
@@ -0,0 +1,332 @@
+import os
+import copy
+import argparse
+import asyncio
+import tempfile
+import itertools
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from domain.v1.blockfin.setting import SETTINGS
+from core.transport import transport
+from core.recorder import read as recorder_read
+from config.config import BLOCKFIN_BASE_URL
+
+
+FUNDING_INTERVAL_MS = 8 * 60 * 60 * 1000
+TICK_DTYPE = np.dtype([('ts', 'i8'), ('price', 'f8')])
+
+
+# ------------------------------------------------------------------------------------------------
+# 틱 데이터
+# ------------------------------------------------------------------------------------------------
+
+def load_ticks(path: str) -> np.ndarray:
+    """
+        .npy (ts, price 필드 구조체 배열 또는 2열 배열) 는 memmap 으로, .csv (ts,price) 는 읽어서 반환
+        디렉터리면 recorder 일자 디렉터리 (체결가 있는 행만)
+    """
+    if os.path.isdir(path):
+        columns = recorder_read(path)
+        has_price = ~np.isnan(columns['price'])
+        ticks = np.empty(int(has_price.sum()), dtype=TICK_DTYPE)
+        ticks['ts'], ticks['price'] = columns['ts'][has_price], columns['price'][has_price]
+        return ticks
+    if path.endswith('.csv'):
+        data = np.loadtxt(path, delimiter=',', usecols=(0, 1), ndmin=2)
+    else:
+        data = np.load(path, mmap_mode='r')
+    if data.dtype.names:
+        return data
+    ticks = np.empty(len(data), dtype=TICK_DTYPE)
+    ticks['ts'], ticks['price'] = data[:, 0], data[:, 1]
+    return ticks
+
+
+def candles_to_ticks(candles) -> np.ndarray:
+    """
+        캔들 1개 -> 틱 4개 (양봉: 시가, 저가, 고가, 종가 / 음봉: 시가, 고가, 저가, 종가)
+        candles: [ts, open, high, low, close, ...] 오래된 순
+    """
+    candles = np.asarray(candles, dtype=float)[:, :5]
+    ts, open_, high, low, close = candles.T
+    bullish = close >= open_
+    ticks = np.empty(len(candles) * 4, dtype=TICK_DTYPE)
+    ticks['ts'] = np.repeat(ts.astype('i8'), 4)
+    prices = ticks['price'].reshape(-1, 4)
+    prices[:, 0] = open_
+    prices[:, 1] = np.where(bullish, low, high)
+    prices[:, 2] = np.where(bullish, high, low)
+    prices[:, 3] = close
+    return ticks
+
+
+async def download_candles(inst_id: str, bar: str = '1m', start: int = None, end: int = None, limit: int = 300) -> list:
+    """블록핀 캔들 조회 (최신순 페이지 -> 오래된 순으로 정렬해서 반환)"""
+    candles, after = [], end
+    try:
+        while True:
+            params = dict(instId=inst_id, bar=bar, limit=limit)
+            if after:
+                params['after'] = after
+            response_json = await transport.get(f"{BLOCKFIN_BASE_URL}/api/v1/market/candles", params=params)
+            page = response_json.get('data') or []
+            if not page:
+                break
+            candles.extend(page)
+            after = page[-1][0]
+            if start and int(after) <= start:
+                break
+    finally:
+        await transport.close()
+
+    candles = sorted({int(candle[0]): candle for candle in candles}.values(), key=lambda candle: int(candle[0]))
+    return [candle for candle in candles if not start or int(candle[0]) >= start]
+
+
+# ------------------------------------------------------------------------------------------------
+# 시뮬레이션
+# ------------------------------------------------------------------------------------------------
+
+def first_cross(prices: np.ndarray, start: int, up: float, down: float, block: int = 4096) -> int:
+    """start 부터 price >= up 또는 price <= down 인 첫 인덱스 (없으면 -1), 구간을 늘려가며 검색"""
+    n = len(prices)
+    while start < n:
+        segment = prices[start:start + block]
+        hit = np.flatnonzero((segment >= up) | (segment <= down))
+        if hit.size:
+            return start + int(hit[0])
+        start += block
+        block *= 2
+    return -1
+
+
+def backtest(ticks: np.ndarray, setting: dict, fee_rate: float = 0.0006, funding_rate: float = 0.0001,
+             slippage_bps: float = 1.0) -> dict:
+    """
+        BlockFinTrade / StrategyEngine 과 같은 규칙으로 틱 재생
+        - 1차 진입 즉시, 추가진입은 ROI <= -gap, 익절 ROI >= profit_point, 손절 ROI <= -loss_point
+        - 익절 후 다음 사이클 바로 진입, 손절 후 정지 (엔진과 동일)
+        - 체결가는 틱 가격 ± slippage, 수수료는 체결 금액 기준, 펀딩은 8시간마다 포지션 금액 기준
+        - 이벤트(진입/청산) 사이 틱은 numpy 로 다음 교차 지점만 찾아 건너뜀
+    """
+    ts, prices = ticks['ts'], ticks['price']
+    entries = setting['addtional_entry']
+    leverage = float(setting['leverage'])
+    direction = 1 if setting['position_side'] == 'long' else -1
+    slippage = slippage_bps / 10000
+
+    realized, fees, funding = 0.0, 0.0, 0.0
+    equity_peak, max_drawdown = 0.0, 0.0
+    wins, losses, liquidations, fills = 0, 0, 0, 0
+    size, cost, margin, step = 0.0, 0.0, 0.0, 0
+    opened_at = None
+    i, n = 0, len(prices)
+
+    def fill_price(price: float, is_open: bool) -> float:
+        return price * (1 + slippage * direction * (1 if is_open else -1))
+
+    while i < n:
+        if size == 0:
+            # 1차 진입
+            price = fill_price(float(prices[i]), True)
+            amount = float(entries[0]['amount'])
+            size, cost, margin, step = amount * leverage / price, amount * leverage, amount, 1
+            fees += cost * fee_rate
+            fills += 1
+            opened_at = int(ts[i])
+
+        average = cost / size
+        tp = average * (1 + direction * setting['profit_point'] / (leverage * 100))
+        sl = average * (1 - direction * setting['loss_point'] / (leverage * 100))
+        liquidation = average * (1 - direction / leverage)
+        entry = None
+        if step < len(entries):
+            entry = average * (1 - direction * float(entries[step]['gap']) / (leverage * 100))
+
+        if direction == 1:
+            up, down = tp, max(level for level in (sl, entry, liquidation) if level is not None)
+        else:
+            up, down = min(level for level in (sl, entry, liquidation) if level is not None), tp
+
+        j = first_cross(prices, i, up, down)
+        end = j if j >= 0 else n - 1
+
+        # 구간 펀딩비
+        funding_times = np.arange((ts[i] // FUNDING_INTERVAL_MS + 1) * FUNDING_INTERVAL_MS, ts[end], FUNDING_INTERVAL_MS)
+        if funding_times.size:
+            funding_prices = prices[np.minimum(np.searchsorted(ts, funding_times), n - 1)]
+            funding += float(np.sum(size * funding_prices)) * funding_rate * direction
+
+        if j < 0:
+            break
+
+        price = float(prices[j])
+        crossed_liquidation = price <= liquidation if direction == 1 else price >= liquidation
+        crossed_sl = price <= sl if direction == 1 else price >= sl
+        crossed_tp = price >= tp if direction == 1 else price <= tp
+
+        if crossed_liquidation and not crossed_sl:
+            pnl = -margin
+            liquidations += 1
+        elif crossed_tp or crossed_sl:
+            exit_price = fill_price(price, False)
+            pnl = max((exit_price - average) * size * direction, -margin)
+            fees += exit_price * size * fee_rate
+            fills += 1
+        else:
+            # 추가진입 후 같은 틱에서 다시 판단
+            price = fill_price(price, True)
+            amount = float(entries[step]['amount'])
+            size += amount * leverage / price
+            cost += amount * leverage
+            margin += amount
+            fees += amount * leverage * fee_rate
+            fills += 1
+            step += 1
+            i = j
+            continue
+
+        realized += pnl
+        if pnl > 0:
+            wins += 1
+        else:
+            losses += 1
+        equity = realized - fees - funding
+        equity_peak = max(equity_peak, equity)
+        max_drawdown = max(max_drawdown, equity_peak - equity)
+        size, cost, margin, step = 0.0, 0.0, 0.0, 0
+        if crossed_sl or crossed_liquidation:
+            break
+        i = j + 1
+
+    unrealized = 0.0
+    if size:
+        unrealized = (float(prices[-1]) - cost / size) * size * direction
+
+    return {
+        "leverage": setting['leverage'],
+        "addtional_entry": setting['addtional_entry'],
+        "profit_point": setting['profit_point'],
+        "loss_point": setting['loss_point'],
+        "pnl": realized - fees - funding,
+        "realized": realized,
+        "unrealized": unrealized,
+        "fees": fees,
+        "funding": funding,
+        "wins": wins,
+        "losses": losses,
+        "liquidations": liquidations,
+        "fills": fills,
+        "max_drawdown": max_drawdown,
+        "open_since": opened_at if size else None,
+    }
+
+
+# ------------------------------------------------------------------------------------------------
+# 파라미터 그리드
+# ------------------------------------------------------------------------------------------------
+
+def ladder(entries: list, gap=None, amount=None) -> list:
+    """gap / amount: 숫자면 추가진입(2차~) 전체에 적용, 리스트면 단계별 값"""
+    entries = copy.deepcopy(entries)
+    for name, value in (('gap', gap), ('amount', amount)):
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            for entry, item in zip(entries, value):
+                entry[name] = item
+        else:
+            for entry in entries[1:]:
+                entry[name] = value
+    return entries
+
+
+def grid(base: dict, leverage=(None,), gap=(None,), amount=(None,), profit_point=(None,), loss_point=(None,)) -> list:
+    settings = []
+    for lev, g, a, tp, sl in itertools.product(leverage, gap, amount, profit_point, loss_point):
+        setting = copy.deepcopy(base)
+        setting['addtional_entry'] = ladder(base['addtional_entry'], g, a)
+        for name, value in (('leverage', lev), ('profit_point', tp), ('loss_point', sl)):
+            if value is not None:
+                setting[name] = value
+        settings.append(setting)
+    return settings
+
+
+worker_ticks = None
+
+
+def init_worker(path: str):
+    # 워커마다 틱 파일을 memmap 으로 한 번만 연다 (파라미터마다 배열 복사 없음)
+    global worker_ticks
+    worker_ticks = load_ticks(path)
+
+
+def run_one(args) -> dict:
+    setting, options = args
+    return backtest(worker_ticks, setting, **options)
+
+
+def run_grid(ticks, settings: list, workers: int = None, chunksize: int = 16, **options) -> list:
+    """
+        ticks: 틱 파일 경로 또는 배열 (배열이면 임시 .npy 로 저장 후 워커에서 memmap)
+        :return: pnl 내림차순 결과
+    """
+    temp_path = None
+    if not isinstance(ticks, str):
+        fd, temp_path = tempfile.mkstemp(suffix='.npy')
+        os.close(fd)
+        np.save(temp_path, np.asarray(ticks, dtype=TICK_DTYPE))
+        ticks = temp_path
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(ticks,)) as executor:
+            results = list(executor.map(run_one, ((setting, options) for setting in settings), chunksize=chunksize))
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+    return sorted(results, key=lambda result: result['pnl'], reverse=True)
+
+
+def floats(values):
+    return [float(value) for value in values] if values else (None,)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SETTINGS 파라미터 그리드 백테스트")
+    parser.add_argument('position', choices=list(SETTINGS))
+    parser.add_argument('--ticks', help=".npy / .csv 틱 파일 (없으면 --bar 캔들 다운로드)")
+    parser.add_argument('--bar', default='1m')
+    parser.add_argument('--start', type=int, help="시작 ts(ms)")
+    parser.add_argument('--end', type=int, help="종료 ts(ms)")
+    parser.add_argument('--leverage', nargs='*')
+    parser.add_argument('--gap', nargs='*')
+    parser.add_argument('--amount', nargs='*')
+    parser.add_argument('--profit-point', nargs='*')
+    parser.add_argument('--loss-point', nargs='*')
+    parser.add_argument('--fee-rate', type=float, default=0.0006)
+    parser.add_argument('--funding-rate', type=float, default=0.0001)
+    parser.add_argument('--slippage-bps', type=float, default=1.0)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    base = SETTINGS[args.position]
+    ticks = args.ticks
+    if ticks is None:
+        candles = asyncio.run(download_candles(base['inst_id'], args.bar, args.start, args.end))
+        ticks = candles_to_ticks(candles)
+
+    settings = grid(base, floats(args.leverage), floats(args.gap), floats(args.amount),
+                    floats(args.profit_point), floats(args.loss_point))
+    print(f"{len(settings)}개 조합 실행")
+    results = run_grid(ticks, settings, workers=args.workers, fee_rate=args.fee_rate,
+                       funding_rate=args.funding_rate, slippage_bps=args.slippage_bps)
+    for result in results[:args.top]:
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
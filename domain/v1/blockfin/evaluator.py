@@ -0,0 +1,74 @@
+import numpy as np
+
+
+class PositionEvaluator:
+    """
+        추적 중인 전체 포지션의 ROI / 추가진입 / 익절 / 손절 판단을 numpy 배열로 한 번에 계산
+        - 포지션 1개 = 슬롯 1개 (배열 인덱스), 용량이 차면 2배로 확장
+        - 가격/포지션 갱신은 배열에 값만 쓰고, 판단은 evaluate() 한 번에 전체 계산
+    """
+    COLUMNS = ('mark', 'average', 'leverage', 'direction', 'next_gap', 'profit_point', 'loss_point')
+
+    def __init__(self, capacity: int = 64):
+        self.size = 0
+        self.capacity = capacity
+        for name in self.COLUMNS:
+            setattr(self, name, np.full(capacity, np.nan))
+        self.active = np.zeros(capacity, dtype=bool)
+        self.by_inst = {}
+
+    def grow(self):
+        self.capacity *= 2
+        for name in self.COLUMNS:
+            column = np.full(self.capacity, np.nan)
+            column[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, column)
+        active = np.zeros(self.capacity, dtype=bool)
+        active[:self.size] = self.active[:self.size]
+        self.active = active
+
+    def add(self, inst_id: str, position_side: str, profit_point: float, loss_point: float) -> int:
+        if self.size == self.capacity:
+            self.grow()
+        slot = self.size
+        self.size += 1
+        self.direction[slot] = 1 if position_side == 'long' else -1
+        self.profit_point[slot] = profit_point
+        self.loss_point[slot] = loss_point
+        self.by_inst[inst_id] = np.append(self.by_inst.get(inst_id, np.empty(0, dtype=np.intp)), slot)
+        return slot
+
+    def set_gap(self, slot: int, gap):
+        # 남은 추가진입이 없으면 nan -> 진입 마스크에서 제외
+        self.next_gap[slot] = np.nan if gap is None else gap
+
+    def set_active(self, slot: int, is_active: bool):
+        self.active[slot] = is_active
+
+    def update_position(self, slot: int, mark_price: float, average_price: float, leverage: float):
+        self.mark[slot] = mark_price
+        self.average[slot] = average_price
+        self.leverage[slot] = leverage
+
+    def update_price(self, inst_id: str, price: float):
+        slots = self.by_inst.get(inst_id)
+        if slots is not None:
+            self.mark[slots] = price
+
+    def roi(self) -> np.ndarray:
+        n = self.size
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (self.mark[:n] - self.average[:n]) / self.average[:n] * self.leverage[:n] * 100 * self.direction[:n]
+
+    def evaluate(self):
+        """
+            :return: roi, entry, take_profit, stop_loss (슬롯 순서 배열, 포지션 없는 슬롯은 roi nan / 마스크 False)
+        """
+        n = self.size
+        roi = self.roi()
+        with np.errstate(invalid='ignore'):
+            has_position = self.active[:n] & (self.average[:n] > 0)
+            entry = has_position & (roi < 0) & (-roi >= self.next_gap[:n])
+            take_profit = has_position & (roi >= self.profit_point[:n])
+            stop_loss = has_position & (roi <= -self.loss_point[:n])
+        return roi, entry, take_profit, stop_loss
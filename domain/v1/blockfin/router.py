@@ -1,20 +1,29 @@
 import asyncio
 from typing import Annotated
 
-import websockets
-
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Form, HTTPException
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Form, HTTPException, Depends, Request
 
 import time
-import requests
 import uuid, hmac, hashlib, base64
 import json
 
 from urllib.parse import urlencode
 
-from config.models.blockfin import LoginForm, BlockFinTrade, BlockFinLeverage
-from config.config import (BLOCKFIN_BASE_URL, BLOCKFIN_WS_BASE_URL, BLOCKFIN_API_KEY, BLOCKFIN_API_SECRET,
-                           BLOCKFIN_API_PASSPHRASE, BLOCKFIN_WS_PRIVATE_URL, symbol_obj)
+from core.hub import hub
+from core.order_book import order_books
+from core.price_cache import price_cache
+from core.instruments import instruments
+from core.transport import transport
+from core.cache import response_cache
+from core.accounts import accounts, Account, account_dependency
+from core.trace import tracer
+from core.logger import get_logger
+from domain.v1.blockfin.Blockfin import order_id_of
+from core.account_state import account_config
+from domain.v1.blockfin import strategy
+from config.models.blockfin import LoginForm, BlockFinTrade, BlockFinLeverage, StrategyControl
+from config.config import (BLOCKFIN_BASE_URL, BLOCKFIN_API_KEY, BLOCKFIN_API_SECRET, BLOCKFIN_API_PASSPHRASE,
+                           CACHE_TTL_ORDER_BOOK, CACHE_TTL_SYMBOLS, CACHE_TTL_AFFILIATES, MARKET_DATA_MODE)
 
 router = APIRouter(
     prefix='/api/v1/blockfin',
@@ -23,6 +32,8 @@ router = APIRouter(
 )
 
 register_waiting = {}
+stream_log = get_logger('stream.blockfin')
+private_log = get_logger('private.blockfin')
 
 def set_auth_headers(signature: str, timestamp: str, nonce: str) -> dict:
     return {
@@ -34,6 +45,14 @@ def set_auth_headers(signature: str, timestamp: str, nonce: str) -> dict:
     }
 
 
+current_account = account_dependency('blockfin')
+
+
+def succeeded(response_json) -> bool:
+    # 에러 응답은 캐시하지 않음
+    return isinstance(response_json, dict) and response_json.get('code') == '0'
+
+
 def generate_signature(method: str, request_path: str, query_params: str = None, body: dict = None) -> str:
     timestamp = str(int(time.time() * 1000))
     nonce = str(uuid.uuid4())
@@ -65,18 +84,13 @@ def generate_signature(method: str, request_path: str, query_params: str = None,
 
 
 @router.post('/validate')
-async def validate_key(login_data: Annotated[LoginForm, Form()]):
-    # 블록핀서버에서 uid, api_key, passphrase 검증
+async def validate_key(login_data: Annotated[LoginForm, Form()], request: Request):
+    # 블록핀서버에서 uid, api_key, passphrase 검증 (입력받은 키로 서명)
+    account = Account('blockfin', login_data.uid, login_data.api_key, login_data.secret_key, login_data.passphrase)
     request_path = '/api/v1/user/query-apikey'
-    timestamp, nonce, query_string, signature = generate_signature(method='GET', request_path=request_path)
-    headers = {
-        "ACCESS-KEY": login_data.api_key,
-        "ACCESS-SIGN": signature,
-        "ACCESS-TIMESTAMP": timestamp,
-        "ACCESS-NONCE": nonce,
-        "ACCESS-PASSPHRASE": login_data.passphrase
-    }
-    response_json = requests.get(url=f"{BLOCKFIN_BASE_URL}{request_path}?{query_string}", headers=headers).json()
+    timestamp, nonce, query_string, signature = await account.signer.generate_signature(method='GET', request_path=request_path)
+    headers = await account.signer.set_auth_headers(signature, timestamp, nonce)
+    response_json = await account.get(f"{BLOCKFIN_BASE_URL}{request_path}?{query_string}", headers=headers)
     uid = response_json['data']['uid']
 
     return_obj = {
@@ -88,6 +102,13 @@ async def validate_key(login_data: Annotated[LoginForm, Form()]):
 
     if login_data.uid == uid and response_json['msg'] == 'success':
         return_obj['valid'] = True
+        # 계정 등록 후 이 세션의 요청은 해당 계정으로 서명
+        accounts.add(account)
+        request.session['uid'] = uid
+        try:
+            await accounts.save(account)
+        except Exception as e:
+            print(f"계정 저장 실패: {e}")
 
     print(return_obj)
     return return_obj
@@ -104,16 +125,17 @@ async def login(login_data: Annotated[LoginForm, Form()], websocket: WebSocket):
 
 # 유저 선물계좌조회
 @router.get('/user/asset')
-async def user_asset():
+async def user_asset(account: Account = Depends(current_account)):
+    signer = account.signer
     query_params = {
         "accountType": "futures"
     }
     request_path = '/api/v1/asset/balances'
-    timestamp, nonce, query_string, signature = generate_signature(method='GET', request_path=request_path, query_params=query_params)
+    timestamp, nonce, query_string, signature = await signer.generate_signature(method='GET', request_path=request_path, query_params=query_params)
 
-    headers = set_auth_headers(signature, timestamp, nonce)
+    headers = await signer.set_auth_headers(signature, timestamp, nonce)
 
-    response_json = requests.get(url=f"{BLOCKFIN_BASE_URL}{request_path}?{query_string}", headers=headers).json()
+    response_json = await account.get(f"{BLOCKFIN_BASE_URL}{request_path}?{query_string}", headers=headers)
     print(response_json)
 
     if "data" in response_json:
@@ -123,165 +145,178 @@ async def user_asset():
 
 
 @router.get('/order/book')
-async def get_order_book(inst_id: str = None):
-    query_params = {
-        "instId": inst_id # BTC-USDT
-    }
-    request_path = '/api/v1/market/books'
+async def get_order_book(inst_id: str = None, depth: int = 20):
+    # 로컬 호가창에서 조회, 아직 동기화 전이면 REST 조회 (호가창 / 응답 캐시 / REST 모두 같은 심볼 표기로)
+    inst_id = inst_id.upper() if inst_id else inst_id
+    if inst_id and await instruments.fetch('blockfin', inst_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown instrument")
+    book = await order_books.top('blockfin', inst_id, depth) if inst_id else None
+    if book is not None:
+        return {"code": "0", "msg": "success", "data": [{"asks": book['asks'], "bids": book['bids'], "ts": book['ts']}]}
+
+    async def load():
+        query_params = {
+            "instId": inst_id # BTC-USDT
+        }
+        request_path = '/api/v1/market/books'
 
-    timestamp, nonce, query_string, signature = generate_signature(method='GET', request_path=request_path, query_params=query_params)
+        timestamp, nonce, query_string, signature = generate_signature(method='GET', request_path=request_path, query_params=query_params)
 
-    headers = set_auth_headers(signature, timestamp, nonce)
+        headers = set_auth_headers(signature, timestamp, nonce)
 
-    response_json = requests.get(url=f"{BLOCKFIN_BASE_URL}{request_path}?{query_string}", headers=headers).json()
-    print(response_json)
+        return await transport.get(f"{BLOCKFIN_BASE_URL}{request_path}?{query_string}", headers=headers)
 
-    return response_json
+    return await response_cache.response(('blockfin.order_book', inst_id), CACHE_TTL_ORDER_BOOK, load, succeeded)
 
 # 심볼정보조회
 @router.get('/symbols')
 async def get_symbols(inst_id: str = None):
-    query_params = {
-        "instId": inst_id  # BTC-USDT
-    }
-    request_path = '/api/v1/market/instruments'
+    async def load():
+        query_params = {
+            "instId": inst_id  # BTC-USDT
+        }
+        request_path = '/api/v1/market/instruments'
 
-    timestamp, nonce, query_string, signature = generate_signature(method='GET', request_path=request_path, query_params=query_params)
+        timestamp, nonce, query_string, signature = generate_signature(method='GET', request_path=request_path, query_params=query_params)
 
-    headers = set_auth_headers(signature, timestamp, nonce)
+        headers = set_auth_headers(signature, timestamp, nonce)
 
-    response_json = requests.get(url=f"{BLOCKFIN_BASE_URL}{request_path}?{query_string}", headers=headers).json()
+        return await transport.get(f"{BLOCKFIN_BASE_URL}{request_path}?{query_string}", headers=headers)
 
-    return response_json
+    return await response_cache.response(('blockfin.symbols', inst_id), CACHE_TTL_SYMBOLS, load, succeeded)
 
 
 @router.websocket('/ws/account/future')
-async def get_future(websocket: WebSocket):
+async def get_future(websocket: WebSocket, account: Account = Depends(current_account)):
     await websocket.accept()
 
-    method = "GET"
-    path = "/users/self/verify"
-    timestamp, nonce, query_string, signature = generate_signature(method, path)
-
-    login_msg = {
-        "op": "login",
-        "args": [{
-            "apiKey": BLOCKFIN_API_KEY.strip(),
-            "passphrase": BLOCKFIN_API_PASSPHRASE.strip(),
-            "timestamp": timestamp.strip(),
-            "sign": signature.strip(),
-            "nonce": nonce
-        }]
-    }
-
-    async with websockets.connect(BLOCKFIN_WS_PRIVATE_URL, ping_interval=30, ping_timeout=10) as blockfin_ws:
-        await blockfin_ws.send(json.dumps(login_msg))
-        login_resp = await blockfin_ws.recv()
-        print(f"LOGIN_RESP: {login_resp}")
-
-        if '"event":"login"' in login_resp and '"code":"0"' in login_resp:
-            print("Login success")
-            subscribe_msg = {
-                "op": "subscribe",
-                "args": [
-                    {
-                        "channel": "account"
-                    }
-                ]
-            }
-            await blockfin_ws.send(json.dumps(subscribe_msg))
-
-            # push 데이터 수신 루프
-            while True:
-                try:
-                    msg = await blockfin_ws.recv()
-                    data = json.loads(msg)
-                    print(data)
-                except Exception as e:
-                    print(f"Error in recv loop: {e}")
-                    break
+    # 계정 private 세션(로그인 1회)을 공유해서 account 채널 구독
+    session = account.session
+    if await session.login():
+        print("Login success")
+        try:
+            async with session.stream("account") as queue:
+                # push 데이터 수신 루프
+                while True:
+                    data = await queue.get()
+                    private_log.info("account %s", data)
+                    await websocket.send_json(data)
+        except WebSocketDisconnect as e:
+            print(f"클라이언트 연결 종료: {e}")
+    else:
+        print(f"LOGIN_RESP: {session.login_resp}")
+        await websocket.close()
 
 
 # 현재가 조회
 @router.websocket('/ws/future/currency')
 async def get_future_currency(websocket: WebSocket):
     await websocket.accept()
-    async with websockets.connect(BLOCKFIN_WS_BASE_URL, ping_interval=30, ping_timeout=10) as blockfin_ws:
-        subscribe_msg = {
-            "op": "subscribe",
-            "args": [
-                {
-                    "channel": "trades",
-                    "instId": "BTC-USDT"
-                }
-            ]
-        }
-        await blockfin_ws.send(json.dumps(subscribe_msg))
-        try:
+    try:
+        async with hub.stream('blockfin', 'trades', 'BTC-USDT') as subscription:
             while True:
-                msg = await blockfin_ws.recv()
-                print(msg)
-                await websocket.send_text(msg)
-        except websockets.exceptions.ConnectionClosed as e:
-            print(f"BLOCKFIN WS 연결 종료: {e}")
-        finally:
-            await websocket.close()
+                message = await subscription.get()
+                if message.data.get('data'):
+                    stream_log.info("trades", venue='blockfin', inst_id='BTC-USDT', last=message.data['data'][0].get('price'))
+                await websocket.send_text(message.raw)
+    except WebSocketDisconnect as e:
+        print(f"클라이언트 연결 종료: {e}")
 
 
 @router.get('/affiliates')
 async def get_affiliates():
-    request_path = '/api/v1/affiliate/basic'
+    async def load():
+        request_path = '/api/v1/affiliate/basic'
 
-    timestamp, nonce, query_string, signature = generate_signature(method='GET', request_path=request_path)
+        timestamp, nonce, query_string, signature = generate_signature(method='GET', request_path=request_path)
 
-    headers = set_auth_headers(signature, timestamp, nonce)
+        headers = set_auth_headers(signature, timestamp, nonce)
 
-    response_json = requests.get(url=f"{BLOCKFIN_BASE_URL}{request_path}", headers=headers).json()
-    print(response_json)  # {"code": "80006", "msg": "non exist affiliate" }
+        response_json = await transport.get(f"{BLOCKFIN_BASE_URL}{request_path}", headers=headers)
+        print(response_json)  # {"code": "80006", "msg": "non exist affiliate" }
+        return response_json
 
-    return response_json
+    return await response_cache.response(('blockfin.affiliates',), CACHE_TTL_AFFILIATES, load, succeeded)
 
 
 # TODO: 부분청산
 @router.post('/future/trade')
-async def future_trade(trade_model: BlockFinTrade):
+async def future_trade(trade_model: BlockFinTrade, account: Account = Depends(current_account)):
+    signer = account.signer
     # validate size
     inst_id = trade_model.inst_id.upper()
+    tracer.start('blockfin.future_trade', 'blockfin', inst_id, trade_model.side)
     input_size = trade_model.size
-    contract_value = float(symbol_obj[inst_id]['data'][0]['contractValue'])
-    lot_size = float(symbol_obj[inst_id]['data'][0]['lotSize'])
+    instrument = await instruments.fetch('blockfin', inst_id)
+    if instrument is None:
+        tracer.fail("Unknown instrument")
+        raise HTTPException(status_code=400, detail="Unknown instrument")
+    contract_value = instrument['contract_value']
+    lot_size = instrument['lot_size']
 
     if input_size / contract_value < lot_size:
+        tracer.fail("Requested size is Too Small")
         raise HTTPException(status_code=400, detail="Requested size is Too Small")
 
     req_size = str(input_size / contract_value)
     print(req_size)
     print(lot_size)
 
+    # 시장가 주문은 로컬 호가창으로 체결가능 수량/슬리피지 확인
+    book = order_books.get('blockfin', inst_id)
+    if book is None:
+        await order_books.ensure('blockfin', inst_id)
+    elif trade_model.order_type == 'market' and trade_model.side:
+        estimate = book.estimate_fill(trade_model.side, size=float(req_size))
+        print(f"예상 체결: {estimate}")
+        if not estimate['is_filled']:
+            tracer.fail("Insufficient order book depth")
+            raise HTTPException(status_code=400, detail="Insufficient order book depth")
+    tracer.mark('validate')
+
     # set position mode(one-way or hedge) 'net_mode' / 'long_short_mode'
-    position_mode_request_path = '/api/v1/account/set-position-mode'
-    body = dict(positionMode=trade_model.position_mode)
-    timestamp, nonce, query_string, signature = generate_signature(method='POST', request_path=position_mode_request_path,
-                                                                   query_params=None, body=body)
-    headers = set_auth_headers(signature, timestamp, nonce)
-    position_mode_response_json = requests.post(f"{BLOCKFIN_BASE_URL}{position_mode_request_path}", headers=headers, json=body).json()
-    print(f"position_mode 응답: {position_mode_response_json}")
+    async def set_position_mode():
+        position_mode_request_path = '/api/v1/account/set-position-mode'
+        body = dict(positionMode=trade_model.position_mode)
+        timestamp, nonce, query_string, signature = await signer.generate_signature(method='POST', request_path=position_mode_request_path,
+                                                                                    query_params=None, body=body)
+        headers = await signer.set_auth_headers(signature, timestamp, nonce)
+        position_mode_response_json = await account.post(f"{BLOCKFIN_BASE_URL}{position_mode_request_path}", headers=headers, json=body)
+        print(f"position_mode 응답: {position_mode_response_json}")
+        return position_mode_response_json.get('code') == '0', position_mode_response_json
 
     # set margin_mode 'cross' / 'isolated'
-    margin_mode_request_path = '/api/v1/account/set-margin-mode'
-    body = dict(marginMode=trade_model.margin_mode)
-    timestamp, nonce, query_string, signature = generate_signature(method='POST', request_path=margin_mode_request_path, query_params=None, body=body)
-    headers = set_auth_headers(signature, timestamp, nonce)
-    margin_mode_response_json = requests.post(url=f"{BLOCKFIN_BASE_URL}{margin_mode_request_path}", headers=headers, json=body).json()
-    print(f"margin_mode_response_json 응답: {margin_mode_response_json}")
+    async def set_margin_mode():
+        margin_mode_request_path = '/api/v1/account/set-margin-mode'
+        body = dict(marginMode=trade_model.margin_mode)
+        timestamp, nonce, query_string, signature = await signer.generate_signature(method='POST', request_path=margin_mode_request_path, query_params=None, body=body)
+        headers = await signer.set_auth_headers(signature, timestamp, nonce)
+        margin_mode_response_json = await account.post(f"{BLOCKFIN_BASE_URL}{margin_mode_request_path}", headers=headers, json=body)
+        print(f"margin_mode_response_json 응답: {margin_mode_response_json}")
+        return margin_mode_response_json.get('code') == '0', margin_mode_response_json
 
     # set leverage
-    leverage_request_path = '/api/v1/account/set-leverage'
-    body = dict(instId=inst_id, leverage=trade_model.leverage, marginMode=trade_model.margin_mode, positionSide=trade_model.position_side)
-    timestamp, nonce, query_string, signature = generate_signature(method='POST', request_path=leverage_request_path, query_params=None, body=body)
-    headers = set_auth_headers(signature, timestamp, nonce)
-    leverage_response_json = requests.post(url=f"{BLOCKFIN_BASE_URL}{leverage_request_path}", headers=headers, json=body).json()
-    print(f"leverage_response_json 응답: {leverage_response_json}")
+    async def set_leverage():
+        leverage_request_path = '/api/v1/account/set-leverage'
+        body = dict(instId=inst_id, leverage=trade_model.leverage, marginMode=trade_model.margin_mode, positionSide=trade_model.position_side)
+        timestamp, nonce, query_string, signature = await signer.generate_signature(method='POST', request_path=leverage_request_path, query_params=None, body=body)
+        headers = await signer.set_auth_headers(signature, timestamp, nonce)
+        leverage_response_json = await account.post(f"{BLOCKFIN_BASE_URL}{leverage_request_path}", headers=headers, json=body)
+        print(f"leverage_response_json 응답: {leverage_response_json}")
+        return leverage_response_json.get('code') == '0', leverage_response_json
+
+    # 계정 단위 설정(포지션모드, 마진모드) -> 심볼 단위 설정(레버리지) 순서, 캐시와 다른 값만 요청
+    await account_config.ensure(
+        account.key, None,
+        desired=dict(position_mode=trade_model.position_mode, margin_mode=trade_model.margin_mode),
+        setters=dict(position_mode=set_position_mode, margin_mode=set_margin_mode),
+    )
+    await account_config.ensure(
+        account.key, inst_id,
+        desired={f"leverage:{trade_model.position_side}": trade_model.leverage},
+        setters={f"leverage:{trade_model.position_side}": set_leverage},
+    )
+    tracer.mark('config')
 
     # place order
     request_path = '/api/v1/trade/order'
@@ -289,15 +324,25 @@ async def future_trade(trade_model: BlockFinTrade):
     body = dict(instId=inst_id, marginMode=trade_model.margin_mode, positionSide=trade_model.position_side, side=trade_model.side,
                 orderType=trade_model.order_type, price=trade_model.price, size=req_size)
 
-    timestamp, nonce, query_string, signature = generate_signature(method='POST', request_path=request_path, query_params=None, body=body)
+    timestamp, nonce, query_string, signature = await signer.generate_signature(method='POST', request_path=request_path, query_params=None, body=body)
+    tracer.mark('sign')
 
-    headers = set_auth_headers(signature, timestamp, nonce)
+    headers = await signer.set_auth_headers(signature, timestamp, nonce)
 
     print(f"timestamp: {timestamp}")
     print(f"{BLOCKFIN_BASE_URL}{request_path}")
     print(f"body: {body}")
 
-    response_json = requests.post(url=f"{BLOCKFIN_BASE_URL}{request_path}", headers=headers, json=body).json()
+    tracer.mark('send')
+    try:
+        response_json = await account.post(f"{BLOCKFIN_BASE_URL}{request_path}", headers=headers, json=body)
+    except Exception as e:
+        tracer.fail(str(e))
+        raise
+    tracer.ack(order_id_of(response_json), ok=response_json.get('code') == '0', error=response_json.get('msg'))
+    if response_json.get('code') != '0':
+        account_config.invalidate(account.key, None)
+        account_config.invalidate(account.key, inst_id)
 
     print(f"응답: {response_json}")
 
@@ -305,7 +350,8 @@ async def future_trade(trade_model: BlockFinTrade):
 
 
 @router.post('/set-leverage')
-async def set_leverage(leverage_model: BlockFinLeverage):
+async def set_leverage(leverage_model: BlockFinLeverage, account: Account = Depends(current_account)):
+    signer = account.signer
     request_path = '/api/v1/account/set-leverage'
     body = {
         "instId": leverage_model.inst_id,
@@ -313,70 +359,82 @@ async def set_leverage(leverage_model: BlockFinLeverage):
         "marginMode": leverage_model.margin_mode,
         "positionSide": leverage_model.position_side
     }
-    timestamp, nonce, query_string, signature = generate_signature(method='POST', request_path=request_path, query_params=None, body=body)
-    headers = set_auth_headers(signature, timestamp, nonce)
-    response_json = requests.post(f"{BLOCKFIN_BASE_URL}{request_path}", headers=headers, json=body).json()
+    timestamp, nonce, query_string, signature = await signer.generate_signature(method='POST', request_path=request_path, query_params=None, body=body)
+    headers = await signer.set_auth_headers(signature, timestamp, nonce)
+    response_json = await account.post(f"{BLOCKFIN_BASE_URL}{request_path}", headers=headers, json=body)
+    if response_json.get('code') == '0':
+        account_config.update(account.key, leverage_model.inst_id.upper(),
+                              **{f"leverage:{leverage_model.position_side}": leverage_model.leverage})
+    else:
+        account_config.invalidate(account.key, leverage_model.inst_id.upper())
     print(response_json)
 
 
 @router.post('/get_position_mode')
-async def get_position_mode():
+async def get_position_mode(account: Account = Depends(current_account)):
+    signer = account.signer
     request_path = '/api/v1/account/position-mode'
-    timestamp, nonce, query_string, signature = generate_signature(method='GET', request_path=request_path)
-    headers = set_auth_headers(signature, timestamp, nonce)
-    response_json = requests.get(f"{BLOCKFIN_BASE_URL}{request_path}", headers=headers).json()
+    timestamp, nonce, query_string, signature = await signer.generate_signature(method='GET', request_path=request_path)
+    headers = await signer.set_auth_headers(signature, timestamp, nonce)
+    response_json = await account.get(f"{BLOCKFIN_BASE_URL}{request_path}", headers=headers)
     print(response_json)
 
 
 @router.websocket('/ws/future/authenticate')
-async def blockfin_ws_login(websocket: WebSocket):
+async def blockfin_ws_login(websocket: WebSocket, account: Account = Depends(current_account)):
     await websocket.accept()
 
-    method = "GET"
-    path = "/users/self/verify"
-    timestamp, nonce, query_string, signature = generate_signature(method, path)
-
-    login_msg = {
-        "op": "login",
-        "args": [{
-            "apiKey": BLOCKFIN_API_KEY.strip(),
-            "passphrase": BLOCKFIN_API_PASSPHRASE.strip(),
-            "timestamp": timestamp.strip(),
-            "sign": signature.strip(),
-            "nonce": nonce
-        }]
-    }
-
     # TODO: ROI * 레버리지 반영할 것.
     # 포지션이 존재하는 심볼만 response됨.
-    async with websockets.connect(BLOCKFIN_WS_PRIVATE_URL) as blockfin_ws:
-        await blockfin_ws.send(json.dumps(login_msg))
-        login_resp = await blockfin_ws.recv()
-        print(f"LOGIN_RESP: {login_resp}")
-
-        if '"event":"login"' in login_resp and '"code":"0"' in login_resp:
-            print("✅ Login success, subscribing to positions...")
-            subscribe_msg = {
-                "op": "subscribe",
-                "args": [
-                    {
-                        "channel": "positions"
-                    }
-                ]
-            }
-            for symbol in ['BTC-USDT', 'ETH-USDT']:
-                subscribe_msg['args'][0]['instId'] = symbol
-                await blockfin_ws.send(json.dumps(subscribe_msg))
-
-            # push 데이터 수신 루프
-            while True:
-                try:
-                    msg = await blockfin_ws.recv()
-                    data = json.loads(msg)
-                    print(data)
-                    # await blockfin_ws.send(json.dumps(position_msg))
-                    # positions = await blockfin_ws.recv()
-                    # print(f"POSITIONS: {positions}")
-                except Exception as e:
-                    print(f"Error in recv loop: {e}")
-                    break
\ No newline at end of file
+    session = account.session
+    if await session.login():
+        print("✅ Login success, subscribing to positions...")
+        try:
+            async with session.stream("positions") as queue:
+                # push 데이터 수신 루프
+                while True:
+                    data = await queue.get()
+                    private_log.info("positions %s", data)
+                    if data.get('data'):
+                        account_config.update_from_blockfin_positions(account.key, data['data'])
+                        for position in data['data']:
+                            price_cache.update('blockfin', position['instId'], mark=position.get('markPrice'))
+                    await websocket.send_json(data)
+        except WebSocketDisconnect as e:
+            print(f"클라이언트 연결 종료: {e}")
+    else:
+        print(f"LOGIN_RESP: {session.login_resp}")
+        await websocket.close()
+
+
+def strategy_engine():
+    # shm 모드는 워커마다 엔진 / SETTINGS 사본이 생겨 같은 기본 계정으로 중복 주문할 수 있어 지원 안 함
+    if MARKET_DATA_MODE == 'shm':
+        raise HTTPException(status_code=501, detail="Strategy engine is not supported in MARKET_DATA_MODE=shm")
+    # lifespan 에서 생성되기 전(또는 종료 후)에는 사용 불가
+    if strategy.engine is None:
+        raise HTTPException(status_code=503, detail="Strategy engine is not running")
+    return strategy.engine
+
+
+@router.post('/strategy/start')
+async def start_strategy(control: StrategyControl, engine: strategy.StrategyEngine = Depends(strategy_engine)):
+    try:
+        return await engine.start(control.names)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"unknown strategy: {e}")
+    except ConnectionError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@router.post('/strategy/stop')
+async def stop_strategy(control: StrategyControl, engine: strategy.StrategyEngine = Depends(strategy_engine)):
+    try:
+        return engine.stop(control.names)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"unknown strategy: {e}")
+
+
+@router.get('/strategy/status')
+async def strategy_status(engine: strategy.StrategyEngine = Depends(strategy_engine)):
+    return engine.status()
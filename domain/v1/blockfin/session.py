@@ -0,0 +1,316 @@
+import json
+import asyncio
+
+from contextlib import asynccontextmanager
+
+import websockets
+
+from core.metrics import WS_RECONNECTS
+from core.hub import hub
+from core.feed import feed, PRIVATE_VENUE
+from core.trace import tracer
+from config.config import (BLOCKFIN_WS_PRIVATE_URL, BLOCKFIN_API_KEY, HUB_QUEUE_SIZE, HUB_RECONNECT_MAX_DELAY,
+                           PRIVATE_WS_MAX_SUBSCRIPTIONS, MARKET_DATA_MODE)
+
+
+# 로그인 필요/만료 에러코드
+AUTH_ERROR_CODES = {'60009', '60011'}
+# 주문 push 중 체결 상태
+FILL_STATES = {'filled', 'partially_filled'}
+
+
+class BlockFinPrivateSession:
+    """
+        계정당 블록핀 private websocket 1개
+        - 로그인 1회 후 account / positions / orders 채널을 한 연결로 구독
+        - 연결 끊김/로그인 만료 시 재접속 -> 재로그인 -> 재구독
+        - push는 구독자별 asyncio.Queue로 전달
+    """
+    def __init__(self, account, url: str = BLOCKFIN_WS_PRIVATE_URL):
+        self.account = account
+        self.url = url
+        self.subscribers = {}
+        self.ws = None
+        self.task = None
+        self.logged_in = asyncio.Event()
+        self.login_resp = None
+
+    async def login_msg(self) -> dict:
+        timestamp, nonce, query_string, signature = await self.account.generate_signature("GET", "/users/self/verify")
+        return {
+            "op": "login",
+            "args": [{
+                "apiKey": self.account.api_key,
+                "passphrase": self.account.passphrase,
+                "timestamp": timestamp,
+                "sign": signature,
+                "nonce": nonce
+            }]
+        }
+
+    @staticmethod
+    def subscribe_msg(op: str, keys) -> dict:
+        args = []
+        for channel, inst_id in keys:
+            arg = {"channel": channel}
+            if inst_id:
+                arg["instId"] = inst_id
+            args.append(arg)
+        return {"op": op, "args": args}
+
+    async def send(self, payload):
+        if self.ws is not None and self.logged_in.is_set():
+            try:
+                await self.ws.send(json.dumps(payload))
+            except websockets.exceptions.ConnectionClosed:
+                pass
+
+    def dispatch(self, data: dict):
+        channel = data['arg'].get('channel')
+        if channel == 'orders':
+            for order in data.get('data') or []:
+                if order.get('state') in FILL_STATES:
+                    tracer.fill('blockfin', order.get('orderId'))
+        for (sub_channel, inst_id), queues in tuple(self.subscribers.items()):
+            if sub_channel != channel:
+                continue
+            if inst_id:
+                # 심볼 구독자는 해당 심볼 데이터만
+                items = [item for item in data.get('data', []) if item.get('instId') == inst_id]
+                if not items and data['arg'].get('instId') != inst_id:
+                    continue
+                message = dict(data, data=items or data.get('data', []))
+            else:
+                message = data
+            for queue in tuple(queues):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(message)
+
+    async def handle(self, ws, raw: str):
+        if raw == 'pong':
+            return
+        data = json.loads(raw)
+        event = data.get('event')
+        if event == 'login':
+            self.login_resp = raw
+            if data.get('code') != '0':
+                raise ConnectionError(f"login failed: {raw}")
+            self.logged_in.set()
+            if self.subscribers:
+                await ws.send(json.dumps(self.subscribe_msg("subscribe", self.subscribers)))
+        elif event == 'error':
+            print(f"[blockfin private] error: {raw}")
+            # 로그인 만료 등으로 거부되면 재로그인
+            if data.get('code') in AUTH_ERROR_CODES or 'login' in data.get('msg', '').lower():
+                self.logged_in.clear()
+                await ws.send(json.dumps(await self.login_msg()))
+        elif 'arg' in data and 'data' in data:
+            self.dispatch(data)
+
+    async def keepalive(self, ws):
+        while True:
+            await asyncio.sleep(20)
+            await ws.send('ping')
+
+    async def run(self):
+        delay = 1
+        while True:
+            keepalive_task = None
+            try:
+                async with websockets.connect(self.url, ping_interval=30, ping_timeout=10) as ws:
+                    self.ws = ws
+                    await ws.send(json.dumps(await self.login_msg()))
+                    keepalive_task = asyncio.create_task(self.keepalive(ws))
+                    async for raw in ws:
+                        await self.handle(ws, raw)
+                        delay = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[blockfin private] 연결 종료: {e}")
+                WS_RECONNECTS.labels('blockfin_private').inc()
+            finally:
+                self.logged_in.clear()
+                self.ws = None
+                if keepalive_task is not None:
+                    keepalive_task.cancel()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, HUB_RECONNECT_MAX_DELAY)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def login(self, timeout: float = 10) -> bool:
+        self.start()
+        try:
+            await asyncio.wait_for(self.logged_in.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def subscribe(self, channel: str, inst_id: str = None, maxsize: int = HUB_QUEUE_SIZE) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize)
+        queues = self.subscribers.setdefault((channel, inst_id), set())
+        queues.add(queue)
+        if len(queues) == 1:
+            await self.send(self.subscribe_msg("subscribe", [(channel, inst_id)]))
+        self.start()
+        return queue
+
+    async def unsubscribe(self, queue: asyncio.Queue, channel: str, inst_id: str = None):
+        queues = self.subscribers.get((channel, inst_id))
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[(channel, inst_id)]
+            await self.send(self.subscribe_msg("unsubscribe", [(channel, inst_id)]))
+
+    @asynccontextmanager
+    async def stream(self, channel: str, inst_id: str = None, maxsize: int = HUB_QUEUE_SIZE):
+        queue = await self.subscribe(channel, inst_id, maxsize)
+        try:
+            yield queue
+        finally:
+            await self.unsubscribe(queue, channel, inst_id)
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+
+class PrivateSessionPool:
+    """
+        계정 1개의 private 연결 묶음 (BlockFinPrivateSession 과 같은 인터페이스)
+        - 연결당 구독 (channel, inst_id) 를 max_subscriptions 개까지, 넘치면 연결을 추가해서 분산
+        - 첫 연결은 로그인 확인용으로 유지, 추가 연결은 구독이 모두 빠지면 닫음
+    """
+    def __init__(self, account, url: str = BLOCKFIN_WS_PRIVATE_URL, max_subscriptions: int = PRIVATE_WS_MAX_SUBSCRIPTIONS):
+        self.account = account
+        self.url = url
+        self.max_subscriptions = max_subscriptions
+        self.shards = [BlockFinPrivateSession(account, url)]
+        self.assigned = {}  # (channel, inst_id) -> shard
+
+    @property
+    def login_resp(self):
+        return self.shards[0].login_resp
+
+    @property
+    def subscribers(self) -> dict:
+        subscribers = {}
+        for shard in self.shards:
+            subscribers.update(shard.subscribers)
+        return subscribers
+
+    async def login(self, timeout: float = 10) -> bool:
+        return await self.shards[0].login(timeout)
+
+    def shard_for(self, key: tuple) -> BlockFinPrivateSession:
+        shard = self.assigned.get(key)
+        if shard is None:
+            shard = next((shard for shard in self.shards if len(shard.subscribers) < self.max_subscriptions), None)
+            if shard is None:
+                shard = BlockFinPrivateSession(self.account, self.url)
+                self.shards.append(shard)
+            self.assigned[key] = shard
+        return shard
+
+    async def subscribe(self, channel: str, inst_id: str = None, maxsize: int = HUB_QUEUE_SIZE) -> asyncio.Queue:
+        return await self.shard_for((channel, inst_id)).subscribe(channel, inst_id, maxsize)
+
+    async def unsubscribe(self, queue: asyncio.Queue, channel: str, inst_id: str = None):
+        key = (channel, inst_id)
+        shard = self.assigned.get(key)
+        if shard is None:
+            return
+        await shard.unsubscribe(queue, channel, inst_id)
+        if key not in shard.subscribers:
+            del self.assigned[key]
+            if not shard.subscribers and shard is not self.shards[0]:
+                self.shards.remove(shard)
+                await shard.close()
+
+    @asynccontextmanager
+    async def stream(self, channel: str, inst_id: str = None, maxsize: int = HUB_QUEUE_SIZE):
+        queue = await self.subscribe(channel, inst_id, maxsize)
+        try:
+            yield queue
+        finally:
+            await self.unsubscribe(queue, channel, inst_id)
+
+    async def close(self):
+        await asyncio.gather(*(shard.close() for shard in self.shards))
+
+
+class RingPrivateSession:
+    """
+        shm 모드 워커의 기본 계정 private 세션
+        - 로그인/구독은 ingest 프로세스가 하고, push 는 공유메모리 링으로 받음
+        - 인터페이스는 PrivateSessionPool 과 같음 (queue 에는 push dict)
+    """
+    def __init__(self, account):
+        self.account = account
+        self.login_resp = 'ingest'
+        self.subscribers = {}
+
+    async def login(self, timeout: float = 10) -> bool:
+        try:
+            await asyncio.wait_for(feed.connected.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    @asynccontextmanager
+    async def stream(self, channel: str, inst_id: str = None, maxsize: int = HUB_QUEUE_SIZE):
+        queue = asyncio.Queue(maxsize)
+
+        def on_message(message):
+            if channel == 'orders':
+                for order in message.data.get('data') or []:
+                    if order.get('state') in FILL_STATES:
+                        tracer.fill('blockfin', order.get('orderId'))
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message.data)
+
+        subscription = await hub.subscribe(PRIVATE_VENUE, channel, inst_id, listener=on_message)
+        queues = self.subscribers.setdefault((channel, inst_id), set())
+        queues.add(queue)
+        try:
+            yield queue
+        finally:
+            queues.discard(queue)
+            if not queues:
+                self.subscribers.pop((channel, inst_id), None)
+            await hub.unsubscribe(subscription)
+
+    async def close(self):
+        pass
+
+
+sessions = {}
+
+
+def get_private_session(account) -> PrivateSessionPool:
+    session = sessions.get(account.api_key)
+    if session is None:
+        # 기본 계정 private 연결은 ingest 가 소유 (워커마다 로그인하지 않음)
+        shared = MARKET_DATA_MODE == 'shm' and account.api_key == BLOCKFIN_API_KEY
+        session = sessions[account.api_key] = RingPrivateSession(account) if shared else PrivateSessionPool(account)
+    return session
+
+
+async def release_private_session(api_key: str):
+    # 계정 eviction 시 연결 정리
+    session = sessions.pop(api_key, None)
+    if session is not None:
+        await session.close()
+
+
+async def close_private_sessions():
+    await asyncio.gather(*(session.close() for session in sessions.values()))
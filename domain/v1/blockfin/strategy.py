@@ -0,0 +1,353 @@
+import time
+import asyncio
+
+import numpy as np
+
+from domain.v1.blockfin.setting import SETTINGS
+from domain.v1.blockfin.evaluator import PositionEvaluator
+from domain.v1.blockfin.triggers import TriggerEngine
+from domain.v1.blockfin.Blockfin import BlockFinTrade
+from core.hub import hub
+from core.price_cache import price_cache
+from core.account_state import account_config
+from core.trace import tracer
+from core.accounts import accounts
+
+
+class Strategy:
+    """
+        SETTINGS 항목 1개 = 상태 객체 1개 (전용 소켓/루프 없음)
+        - 판단에 쓰는 값은 엔진의 PositionEvaluator 슬롯에 저장
+        - 주문은 별도 task 로 실행, 주문 중에는 중복 진입하지 않음
+    """
+    def __init__(self, name: str, setting: dict, trader: BlockFinTrade, evaluator: PositionEvaluator,
+                 triggers: TriggerEngine):
+        self.name = name
+        self.setting = setting
+        self.trader = trader
+        self.evaluator = evaluator
+        self.triggers = triggers
+        self.armed = {}
+        self.armed_at = None
+        self.size = None
+        self.exit_task = None
+        self.slot = evaluator.add(setting['inst_id'], setting['position_side'], setting['profit_point'], setting['loss_point'])
+        self.running = False
+        self.order_task = None
+        self.last_order = None
+        self.last_fill = None
+        self.last_error = None
+        self.updated_at = None
+
+    @property
+    def inst_id(self) -> str:
+        return self.setting['inst_id']
+
+    @property
+    def position_side(self) -> str:
+        return self.setting['position_side']
+
+    @property
+    def side(self) -> str:
+        # long_short_mode: long 진입 buy, short 진입 sell
+        return 'buy' if self.position_side == 'long' else 'sell'
+
+    @property
+    def is_active(self) -> bool:
+        return self.running and not self.setting['is_stop']
+
+    @property
+    def is_busy(self) -> bool:
+        return self.order_task is not None and not self.order_task.done()
+
+    def next_gap(self):
+        entries = self.setting['addtional_entry']
+        idx = self.setting['current_order_idx']
+        return entries[idx]['gap'] if idx < len(entries) else None
+
+    def sync(self):
+        # 추가진입 판단은 진입 이후 + 주문 진행 중이 아닐 때만
+        self.evaluator.set_gap(self.slot, self.next_gap())
+        self.evaluator.set_active(self.slot, self.is_active and self.setting['is_trading'] and not self.is_busy)
+
+    def start(self):
+        self.running = True
+        self.setting['is_stop'] = False
+        # 첫 진입 전이면 바로 1차 진입
+        if not self.setting['is_trading'] and self.setting['current_order_idx'] == 0:
+            self.submit()
+        self.sync()
+
+    def stop(self):
+        self.running = False
+        self.setting['is_stop'] = True
+        self.disarm()
+        self.sync()
+
+    def exit_prices(self, average_price: float, leverage: float) -> dict:
+        # ROI(%) 기준 익절/손절 -> 절대 가격
+        direction = 1 if self.position_side == 'long' else -1
+        return {
+            'take_profit': average_price * (1 + direction * self.setting['profit_point'] / (leverage * 100)),
+            'stop_loss': average_price * (1 - direction * self.setting['loss_point'] / (leverage * 100)),
+        }
+
+    def arm(self, average_price: float, leverage: float):
+        if self.armed and self.armed_at == (average_price, leverage):
+            return
+        self.disarm()
+        prices = self.exit_prices(average_price, leverage)
+        # long: 익절은 상향 돌파, 손절은 하향 돌파 / short 는 반대
+        up, down = ('take_profit', 'stop_loss') if self.position_side == 'long' else ('stop_loss', 'take_profit')
+        self.armed = {
+            up: self.triggers.add(self.inst_id, prices[up], 'up', self.on_trigger, name=f"{self.name}:{up}"),
+            down: self.triggers.add(self.inst_id, prices[down], 'down', self.on_trigger, name=f"{self.name}:{down}"),
+        }
+        self.armed_at = (average_price, leverage)
+
+    def disarm(self):
+        for trigger in self.armed.values():
+            self.triggers.cancel(trigger)
+        self.armed = {}
+        self.armed_at = None
+
+    def on_trigger(self, trigger):
+        kind = trigger.name.rsplit(':', 1)[1]
+        self.disarm()
+        if self.exit_task is None or self.exit_task.done():
+            self.exit_task = asyncio.create_task(self.exit(kind))
+
+    async def exit(self, kind: str):
+        setting = self.setting
+        side = 'sell' if self.position_side == 'long' else 'buy'
+        tracer.start(f"strategy.{kind}", 'blockfin', self.inst_id, side)
+        try:
+            response = await self.trader.place_order(self.inst_id, setting['margin_mode'], setting['leverage'],
+                                                     self.position_side, side, 'market', self.size, reduce_only=True)
+            self.last_order = response
+            print(f"[{self.name}] {kind} 응답: {response}")
+            if response.get('code') != '0':
+                self.last_error = response.get('msg')
+                return
+        except Exception as e:
+            tracer.fail(str(e))
+            self.last_error = str(e)
+            print(f"[{self.name}] {kind} 실패: {e}")
+            return
+
+        # 청산 완료 -> 진입 단계 초기화, 익절이면 다음 사이클 진입 / 손절이면 정지
+        setting['is_trading'] = False
+        setting['current_order_idx'] = 0
+        self.size = None
+        if kind == 'stop_loss':
+            self.stop()
+        elif self.is_active:
+            self.submit()
+        self.sync()
+
+    def submit(self):
+        if self.is_busy or self.next_gap() is None:
+            return
+        self.order_task = asyncio.create_task(self.enter())
+        self.order_task.add_done_callback(lambda _: self.sync())
+        self.sync()
+
+    async def enter(self):
+        setting = self.setting
+        tracer.start('strategy.entry', 'blockfin', self.inst_id, self.side)
+        try:
+            is_validate, req_size = await self.trader.validate_req_size(setting)
+            tracer.mark('validate')
+            if not is_validate:
+                self.last_error = f"requested size too small: {req_size}"
+                tracer.fail(self.last_error)
+                return
+            response = await self.trader.place_order(self.inst_id, setting['margin_mode'], setting['leverage'],
+                                                     self.position_side, self.side, setting['order_type'], req_size)
+            self.last_order = response
+            if response.get('code') == '0':
+                setting['is_trading'] = True
+                setting['current_order_idx'] += 1
+                self.last_error = None
+            else:
+                self.last_error = response.get('msg')
+            print(f"[{self.name}] 진입 응답: {response}")
+        except Exception as e:
+            tracer.fail(str(e))
+            self.last_error = str(e)
+            print(f"[{self.name}] 진입 실패: {e}")
+
+    def on_position(self, position: dict):
+        average_price, leverage = float(position['averagePrice']), float(position['leverage'])
+        self.evaluator.update_position(self.slot, float(position['markPrice']), average_price, leverage)
+        self.size = str(abs(float(position.get('positions') or 0)))
+        self.updated_at = time.time()
+
+        if self.is_active and float(self.size) > 0 and average_price > 0:
+            self.arm(average_price, leverage)
+        else:
+            self.disarm()
+
+    def status(self) -> dict:
+        roi = self.evaluator.roi()[self.slot]
+        return {
+            "name": self.name,
+            "inst_id": self.inst_id,
+            "position_side": self.position_side,
+            "is_trading": self.setting['is_trading'],
+            "is_stop": self.setting['is_stop'],
+            "running": self.running,
+            "current_order_idx": self.setting['current_order_idx'],
+            "next_gap": self.next_gap(),
+            "roi": None if np.isnan(roi) else float(roi),
+            "price": None if np.isnan(self.evaluator.mark[self.slot]) else float(self.evaluator.mark[self.slot]),
+            "is_ordering": self.is_busy,
+            "triggers": {kind: trigger.price for kind, trigger in self.armed.items()},
+            "last_order": self.last_order,
+            "last_fill": self.last_fill,
+            "last_error": self.last_error,
+            "updated_at": self.updated_at,
+        }
+
+
+class StrategyEngine:
+    """
+        전체 SETTINGS 전략을 이벤트 루프 하나에서 실행
+        - 계정 private 세션의 positions 구독 1개 + 심볼당 trades 허브 구독 1개를 모든 전략이 공유
+        - (instId, positionSide) 인덱스로 해당 전략 슬롯에만 값 기록
+        - 판단은 이벤트 배치마다 evaluate() 1회 (같은 루프 턴의 틱은 합쳐서 계산)
+    """
+    def __init__(self, trader: BlockFinTrade, settings: dict = SETTINGS):
+        self.trader = trader
+        self.evaluator = PositionEvaluator(capacity=max(len(settings), 1))
+        self.triggers = TriggerEngine()
+        self.strategies = {name: Strategy(name, setting, trader, self.evaluator, self.triggers)
+                           for name, setting in settings.items()}
+        self.slots = [None] * self.evaluator.size
+        for strategy in self.strategies.values():
+            self.slots[strategy.slot] = strategy
+        self.by_position = {}
+        self.subscriptions = {}
+        self.scheduled = False
+        self.task = None
+
+    def index(self):
+        self.by_position = {}
+        for strategy in self.strategies.values():
+            self.by_position.setdefault((strategy.inst_id, strategy.position_side), []).append(strategy)
+
+    def schedule(self):
+        if not self.scheduled:
+            self.scheduled = True
+            asyncio.get_running_loop().call_soon(self.evaluate)
+
+    def evaluate(self):
+        self.scheduled = False
+        roi, entry, _, _ = self.evaluator.evaluate()
+        for slot in np.flatnonzero(entry):
+            self.slots[slot].submit()
+
+    def listener(self, inst_id: str):
+        def on_message(message):
+            prices = [float(trade['price']) for trade in message.data['data']]
+            self.triggers.on_price(inst_id, max(prices), min(prices))
+            self.evaluator.update_price(inst_id, prices[-1])
+            self.schedule()
+        return on_message
+
+    async def watch_market(self, inst_id: str):
+        if inst_id in self.subscriptions:
+            return
+        await price_cache.ensure('blockfin', inst_id)
+        self.subscriptions[inst_id] = await hub.subscribe('blockfin', 'trades', inst_id, listener=self.listener(inst_id))
+
+    async def run(self):
+        await asyncio.gather(self.watch_positions(), self.watch_orders())
+
+    async def watch_positions(self):
+        session = self.trader.session
+        async with session.stream("positions") as queue:
+            while True:
+                message = await queue.get()
+                positions = message.get('data') or []
+                account_config.update_from_blockfin_positions(self.trader.account_key, positions)
+                for position in positions:
+                    inst_id = position.get('instId')
+                    if position.get('markPrice'):
+                        price_cache.update('blockfin', inst_id, mark=position['markPrice'])
+                    for strategy in self.by_position.get((inst_id, position.get('positionSide')), ()):
+                        try:
+                            strategy.on_position(position)
+                        except (KeyError, ValueError) as e:
+                            print(f"[{strategy.name}] 포지션 처리 실패: {e}")
+                self.schedule()
+
+    async def watch_orders(self):
+        # 체결 push (주문 trace 의 fill 구간은 private 세션 dispatch 에서 기록)
+        async with self.trader.session.stream("orders") as queue:
+            while True:
+                message = await queue.get()
+                for order in message.get('data') or []:
+                    for strategy in self.by_position.get((order.get('instId'), order.get('positionSide')), ()):
+                        strategy.last_fill = order
+
+    async def ensure_running(self):
+        if self.task is None or self.task.done():
+            if not await self.trader.websocket_login():
+                raise ConnectionError("blockfin private login failed")
+            self.index()
+            self.task = asyncio.create_task(self.run())
+
+    def select(self, names=None) -> list:
+        if not names:
+            return list(self.strategies.values())
+        unknown = [name for name in names if name not in self.strategies]
+        if unknown:
+            raise KeyError(", ".join(unknown))
+        return [self.strategies[name] for name in names]
+
+    async def start(self, names=None) -> list:
+        strategies = self.select(names)
+        await self.ensure_running()
+        await asyncio.gather(*(self.watch_market(inst_id) for inst_id in {s.inst_id for s in strategies}))
+        for strategy in strategies:
+            strategy.start()
+        return [strategy.status() for strategy in strategies]
+
+    def stop(self, names=None) -> list:
+        strategies = self.select(names)
+        for strategy in strategies:
+            strategy.stop()
+        return [strategy.status() for strategy in strategies]
+
+    def status(self, names=None) -> list:
+        return [strategy.status() for strategy in self.select(names)]
+
+    async def close(self):
+        for strategy in self.strategies.values():
+            strategy.stop()
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        for subscription in self.subscriptions.values():
+            await hub.unsubscribe(subscription)
+        self.subscriptions = {}
+
+
+# 기본 계정(config.env 키)의 전략 엔진, lifespan 에서 생성 (계정 레지스트리의 signer / private 세션 / REST 제한 사용)
+engine = None
+
+
+def start_engine() -> StrategyEngine:
+    global engine
+    if engine is None:
+        engine = StrategyEngine(BlockFinTrade(accounts.default('blockfin')))
+    return engine
+
+
+async def stop_engine():
+    global engine
+    if engine is not None:
+        await engine.close()
+        engine = None
@@ -0,0 +1,90 @@
+import heapq
+import itertools
+
+
+class Trigger:
+    __slots__ = ('id', 'inst_id', 'price', 'direction', 'callback', 'name', 'active')
+
+    def __init__(self, trigger_id: int, inst_id: str, price: float, direction: str, callback, name: str = None):
+        self.id = trigger_id
+        self.inst_id = inst_id
+        self.price = price
+        self.direction = direction  # up: 가격 >= price 시 발동, down: 가격 <= price 시 발동
+        self.callback = callback
+        self.name = name
+        self.active = True
+
+    def status(self) -> dict:
+        return {"id": self.id, "inst_id": self.inst_id, "price": self.price, "direction": self.direction, "name": self.name}
+
+
+class TriggerBook:
+    """
+        심볼 1개의 조건 가격 목록
+        - up: 최소 힙 (가장 낮은 상향 돌파 가격이 top), down: 최대 힙 (-price)
+        - 틱마다 top 만 비교해서 넘은 것만 pop -> O(log n + k)
+        - 취소는 active=False 표시만 하고 pop 될 때 버림
+    """
+    def __init__(self):
+        self.up = []
+        self.down = []
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, trigger: Trigger):
+        if trigger.direction == 'up':
+            heapq.heappush(self.up, (trigger.price, trigger.id, trigger))
+        else:
+            heapq.heappush(self.down, (-trigger.price, trigger.id, trigger))
+        self.count += 1
+
+    def cancel(self, trigger: Trigger):
+        if trigger.active:
+            trigger.active = False
+            self.count -= 1
+
+    def crossed(self, high: float, low: float) -> list:
+        fired = []
+        while self.up and (not self.up[0][2].active or self.up[0][0] <= high):
+            fired.append(heapq.heappop(self.up)[2])
+        while self.down and (not self.down[0][2].active or -self.down[0][0] >= low):
+            fired.append(heapq.heappop(self.down)[2])
+
+        fired = [trigger for trigger in fired if trigger.active]
+        for trigger in fired:
+            trigger.active = False
+        self.count -= len(fired)
+        return fired
+
+
+class TriggerEngine:
+    def __init__(self):
+        self.books = {}
+        self.ids = itertools.count(1)
+
+    def add(self, inst_id: str, price: float, direction: str, callback, name: str = None) -> Trigger:
+        trigger = Trigger(next(self.ids), inst_id, price, direction, callback, name)
+        self.books.setdefault(inst_id, TriggerBook()).add(trigger)
+        return trigger
+
+    def cancel(self, trigger: Trigger):
+        if trigger is not None:
+            self.books[trigger.inst_id].cancel(trigger)
+
+    def on_price(self, inst_id: str, high: float, low: float = None) -> list:
+        """high/low: 틱 배치의 최고/최저 체결가 (단일 가격이면 high 만)"""
+        book = self.books.get(inst_id)
+        if not book:
+            return []
+        fired = book.crossed(high, high if low is None else low)
+        for trigger in fired:
+            try:
+                trigger.callback(trigger)
+            except Exception as e:
+                print(f"[{trigger.name}] 트리거 처리 실패: {e}")
+        return fired
+
+    def status(self) -> dict:
+        return {inst_id: len(book) for inst_id, book in self.books.items()}
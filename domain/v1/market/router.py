@@ -0,0 +1,56 @@
+import asyncio
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, status
+
+from core.bbo import bbo, BboClient, normalize
+from config.config import BBO_MAX_SYMBOLS
+
+
+router = APIRouter(
+    prefix='/api/v1/market',
+    tags=['Market'],
+    include_in_schema=True,
+)
+
+
+def parse_symbols(symbols: str) -> list:
+    # "BTCUSDT,BTC-USDT,ETHUSDT_UMCBL" (거래소 표기 아무거나, 정규화 후 중복 제거)
+    parsed = list(dict.fromkeys(normalize(symbol.strip()) for symbol in symbols.split(',') if symbol.strip()))
+    if len(parsed) > BBO_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"Too many symbols (max {BBO_MAX_SYMBOLS})")
+    return parsed
+
+
+# 거래소 통합 BBO 스냅샷 (venue 별 호가 포함)
+@router.get('/bbo')
+async def get_bbo(symbols: str = 'BTC-USDT'):
+    snapshots = await asyncio.gather(*(bbo.snapshot(symbol) for symbol in parse_symbols(symbols)))
+    return {snapshot['symbol']: snapshot for snapshot in snapshots}
+
+
+# 거래소 통합 BBO 스트림: 접속 시 스냅샷 1번, 이후 venue 틱마다 통합 값 + 갱신된 venue 호가
+@router.websocket('/ws/bbo')
+async def stream_bbo(websocket: WebSocket, symbols: str = 'BTC-USDT'):
+    try:
+        parsed = parse_symbols(symbols)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+    await websocket.accept()
+    client = BboClient()
+    quotes = []
+    try:
+        for symbol in parsed:
+            consolidated = await bbo.acquire(symbol)
+            quotes.append(consolidated)
+            bbo.attach(client, consolidated)
+        while True:
+            for text in await client.get():
+                await websocket.send_text(text)
+    except WebSocketDisconnect:
+        print("클라이언트와 연결 끊김")
+    except RuntimeError as e:
+        print(f"클라이언트가 연결을 끊은 후 send 시도: {e}")
+    finally:
+        for consolidated in quotes:
+            bbo.detach(client, consolidated)
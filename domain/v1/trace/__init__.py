@@ -0,0 +1,6 @@
+import os
+import sys
+
+from .router import router
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
\ No newline at end of file
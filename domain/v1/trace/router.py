@@ -0,0 +1,38 @@
+from fastapi import APIRouter, HTTPException
+
+from core.trace import tracer
+
+
+router = APIRouter(
+    prefix='/api/v1/trace',
+    tags=['Trace'],
+    include_in_schema=True,
+)
+
+
+# 최근 주문 trace (최신순)
+@router.get('/orders')
+async def get_order_traces(limit: int = 100, source: str = None, exchange: str = None, inst_id: str = None,
+                           status: str = None):
+    return tracer.query(limit=min(limit, tracer.ring.maxlen), source=source, exchange=exchange, inst_id=inst_id,
+                        status=status)
+
+
+@router.get('/orders/{trace_id}')
+async def get_order_trace(trace_id: int):
+    trace = tracer.find(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (evicted or unknown)")
+    return trace.to_dict()
+
+
+# 구간별 p50/p99 (ring 기준)
+@router.get('/summary')
+async def get_trace_summary(source: str = None, exchange: str = None):
+    return {
+        "traces": len(tracer.ring),
+        "awaiting_fill": len(tracer.awaiting_fill),
+        "sink": tracer.sink,
+        "sink_dropped": tracer.dropped,
+        "stages": tracer.summary(source=source, exchange=exchange),
+    }
@@ -0,0 +1,15 @@
+import os
+
+# ingest 는 항상 업스트림에 직접 연결 (config import 전에 고정)
+os.environ['MARKET_DATA_MODE'] = 'local'
+
+import asyncio
+
+from ingest.server import IngestServer
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(IngestServer().run())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
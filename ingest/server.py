@@ -0,0 +1,136 @@
+import json
+import signal
+import asyncio
+
+from collections import Counter
+
+from core.hub import hub
+from core.ring import RingWriter
+from core.feed import PRIVATE_VENUE
+from core.instruments import instruments
+from core.recorder import recorder
+from core.transport import transport
+from core.accounts import accounts
+from core.logger import logs, get_logger
+from domain.v1.blockfin.session import close_private_sessions
+import domain.v1.blockfin.Blockfin  # noqa: F401 (blockfin 계정 factory 등록)
+from config.config import INGEST_CONTROL_HOST, INGEST_CONTROL_PORT
+
+
+log = get_logger('ingest')
+
+
+class IngestServer:
+    """
+        MARKET_DATA_MODE=shm 의 시세 수집 프로세스 (python -m ingest)
+        - 업스트림 websocket 은 이 프로세스만 연결 (hub 참조 카운트 그대로)
+        - 워커가 제어 소켓으로 보낸 구독 요청을 (venue, channel, inst_id) 별로 합산, 연결이 끊기면 그 워커 몫 해제
+        - 받은 메시지 raw 를 공유메모리 링에 그대로 기록
+        - blockfin_private: 기본 계정 private 채널 (positions / orders / account)
+        - 심볼 스냅샷 갱신과 틱 기록도 여기서만 실행
+    """
+    def __init__(self, host: str = INGEST_CONTROL_HOST, port: int = INGEST_CONTROL_PORT):
+        self.host = host
+        self.port = port
+        self.ring = None
+        self.refs = {}  # (venue, channel, inst_id) -> [참조 수, hub 구독 또는 private task]
+
+    def listener(self, venue: str, channel: str, inst_id: str):
+        key = self.ring.key_of(venue, channel, inst_id)
+        publish = self.ring.publish
+
+        def on_message(message):
+            publish(key, message.raw.encode())
+        return on_message
+
+    async def private_feed(self, channel: str, inst_id: str):
+        key = self.ring.key_of(PRIVATE_VENUE, channel, inst_id)
+        session = accounts.default('blockfin').session
+        if not await session.login():
+            log.error("blockfin private login failed", channel=channel)
+        async with session.stream(channel, inst_id) as queue:
+            while True:
+                data = await queue.get()
+                self.ring.publish(key, json.dumps(data).encode())
+
+    async def acquire(self, key: tuple):
+        entry = self.refs.get(key)
+        if entry is not None:
+            entry[0] += 1
+            return
+        venue, channel, inst_id = key
+        if venue == PRIVATE_VENUE:
+            handle = asyncio.create_task(self.private_feed(channel, inst_id))
+        else:
+            handle = await hub.subscribe(venue, channel, inst_id, listener=self.listener(venue, channel, inst_id))
+        self.refs[key] = [1, handle]
+        log.info("subscribe", venue=venue, channel=channel, inst_id=inst_id)
+
+    async def release(self, key: tuple, count: int = 1):
+        entry = self.refs.get(key)
+        if entry is None:
+            return
+        entry[0] -= count
+        if entry[0] > 0:
+            return
+        del self.refs[key]
+        handle = entry[1]
+        if isinstance(handle, asyncio.Task):
+            handle.cancel()
+            await asyncio.gather(handle, return_exceptions=True)
+        else:
+            await hub.unsubscribe(handle)
+        log.info("unsubscribe", venue=key[0], channel=key[1], inst_id=key[2])
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # 워커 1개 = 연결 1개, 줄 단위 JSON {"op", "venue", "channel", "inst_id"}
+        owned = Counter()
+        try:
+            async for line in reader:
+                try:
+                    request = json.loads(line)
+                    key = (request['venue'], request['channel'], request['inst_id'])
+                    if key[0] not in hub.venues and key[0] != PRIVATE_VENUE:
+                        raise KeyError(key[0])
+                except (ValueError, KeyError) as e:
+                    log.warning("bad control message", error=str(e))
+                    continue
+                op = request.get('op')
+                if op == 'subscribe':
+                    owned[key] += 1
+                    await self.acquire(key)
+                elif op == 'unsubscribe' and owned[key] > 0:
+                    owned[key] -= 1
+                    await self.release(key)
+                elif op == 'resubscribe' and key[0] != PRIVATE_VENUE:
+                    await hub.resubscribe(*key)
+        except ConnectionError:
+            pass
+        finally:
+            for key, count in owned.items():
+                if count:
+                    await self.release(key, count)
+            writer.close()
+
+    async def run(self):
+        logs.start()
+        # SIGTERM 에도 finally 정리(링 세그먼트 unlink)를 거치도록
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, asyncio.current_task().cancel)
+        self.ring = RingWriter()
+        await instruments.start()
+        await recorder.start()
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        log.info("ingest listening", host=self.host, port=self.port, ring=self.ring.name)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await recorder.stop()
+            await instruments.stop()
+            await close_private_sessions()
+            await hub.close()
+            await transport.close()
+            self.ring.close()
+            logs.stop()
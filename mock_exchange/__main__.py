@@ -0,0 +1,7 @@
+from uvicorn import run
+
+from config.config import MOCK_EXCHANGE_PORT
+
+
+if __name__ == '__main__':
+    run('mock_exchange.app:app', host='0.0.0.0', port=MOCK_EXCHANGE_PORT)
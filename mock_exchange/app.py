@@ -0,0 +1,81 @@
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from mock_exchange import binance, bitget, blockfin
+from mock_exchange.market import market, ledger
+from mock_exchange.faults import faults, ERRORS, RATE_LIMITS
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    market.start()
+    yield
+    await market.stop()
+
+
+app = FastAPI(title='CoinTrading mock exchange', version='0.0.1', lifespan=lifespan)
+
+
+@app.middleware('http')
+async def inject_faults(request: Request, call_next):
+    exchange = request.url.path.strip('/').split('/')[0]
+    if exchange not in ERRORS:
+        return await call_next(request)
+
+    await faults.delay()
+    headers = {}
+    if exchange == 'binance':
+        used_weight = faults.binance_weight(request.url.path)
+        if used_weight is None:
+            return JSONResponse(RATE_LIMITS[exchange], status_code=429,
+                                headers={"Retry-After": "60", "X-MBX-USED-WEIGHT-1M": str(faults.used_weight)})
+        headers["X-MBX-USED-WEIGHT-1M"] = str(used_weight)
+    if not faults.allow(exchange):
+        return JSONResponse(RATE_LIMITS[exchange], status_code=429, headers=dict(headers, **{"Retry-After": "1"}))
+    if faults.should_fail():
+        status, body = ERRORS[exchange]
+        return JSONResponse(body, status_code=status, headers=headers)
+
+    response = await call_next(request)
+    response.headers.update(headers)
+    return response
+
+
+@app.get('/mock/faults')
+async def get_faults():
+    return faults.as_dict()
+
+
+@app.post('/mock/faults')
+async def set_faults(request: Request):
+    faults.update(**await request.json())
+    return faults.as_dict()
+
+
+@app.get('/mock/state')
+async def state():
+    return {
+        "balance": ledger.balance,
+        "positions": [{"exchange": exchange, "symbol": symbol, "positionSide": position_side, **position}
+                      for (exchange, symbol, position_side), position in ledger.positions.items()],
+        "orders": len(ledger.orders),
+        "prices": {base: book.price for base, book in market.books.items()},
+    }
+
+
+@app.post('/mock/reset')
+async def reset():
+    ledger.positions.clear()
+    ledger.orders.clear()
+    ledger.balance = 100000.0
+    blockfin.account.update(position_mode="net_mode", margin_mode="cross", leverage={})
+    binance.leverages.clear()
+    binance.margin_types.clear()
+    return {"ok": True}
+
+
+app.include_router(binance.router)
+app.include_router(bitget.router)
+app.include_router(blockfin.router)
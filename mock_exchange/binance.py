@@ -0,0 +1,275 @@
+import json
+import uuid
+
+from fastapi import APIRouter, Request, WebSocket
+from fastapi.responses import JSONResponse
+
+from mock_exchange.market import market, ledger, now_ms, BASE_PRICES
+from mock_exchange.faults import faults, ERRORS
+from mock_exchange.stream import StreamConnection
+
+
+router = APIRouter(prefix='/binance', tags=['Mock Binance'])
+
+leverages = {}
+margin_types = {}
+
+
+def mandatory(params: dict, *names):
+    for name in names:
+        if not params.get(name):
+            return JSONResponse({"code": -1102, "msg": f"Mandatory parameter '{name}' was not sent, was empty/null, or malformed."},
+                                status_code=400)
+    return None
+
+
+def symbol_info(base: str) -> dict:
+    book = market.book(base)
+    return {
+        "symbol": f"{base}USDT",
+        "status": "TRADING",
+        "baseAsset": base,
+        "quoteAsset": "USDT",
+        "filters": [
+            {"filterType": "PRICE_FILTER", "tickSize": f"{book.tick_size:.10f}"},
+            {"filterType": "LOT_SIZE", "stepSize": "0.00001000", "minQty": "0.00001000"},
+            {"filterType": "MIN_NOTIONAL", "notional": "5"},
+        ],
+    }
+
+
+def order_response(order: dict, params: dict, exchange: str) -> dict:
+    response = {
+        "orderId": order['orderId'],
+        "symbol": order['symbol'],
+        "status": "FILLED",
+        "clientOrderId": params.get('newClientOrderId') or uuid.uuid4().hex[:22],
+        "price": params.get('price', "0"),
+        "origQty": str(order['quantity']),
+        "executedQty": str(order['quantity']),
+        "cummulativeQuoteQty": str(order['quantity'] * order['price']),
+        "type": params.get('type', 'MARKET').upper(),
+        "side": order['side'].upper(),
+        "updateTime": order['ts'],
+    }
+    if exchange == 'binance_future':
+        response.update(avgPrice=str(order['price']), positionSide=params.get('positionSide', 'BOTH').upper())
+    return response
+
+
+def place(params: dict, exchange: str):
+    error = mandatory(params, 'symbol', 'side', 'type', 'quantity')
+    if error is not None:
+        return error
+    symbol = params['symbol'].upper()
+    order = ledger.fill(exchange, symbol, params['side'], params.get('positionSide') if exchange == 'binance_future' else None,
+                        float(params['quantity']), price=float(params['price']) if params.get('price') else None,
+                        leverage=leverages.get(symbol, 20), margin_mode=margin_types.get(symbol, 'CROSSED'),
+                        reduce_only=str(params.get('reduceOnly', '')).lower() == 'true', order_type=params['type'])
+    return order_response(order, params, exchange)
+
+
+# -------------------------------------------------------------------------------------------
+# REST
+# -------------------------------------------------------------------------------------------
+
+@router.get('/api/v3/time')
+@router.get('/fapi/v1/time')
+async def server_time():
+    return {"serverTime": now_ms()}
+
+
+@router.get('/api/v3/exchangeInfo')
+@router.get('/fapi/v1/exchangeInfo')
+async def exchange_info():
+    return {"timezone": "UTC", "serverTime": now_ms(), "symbols": [symbol_info(base) for base in BASE_PRICES]}
+
+
+@router.get('/api/v3/depth')
+@router.get('/fapi/v1/depth')
+async def depth(symbol: str, limit: int = 100):
+    book = market.book(symbol)
+    bids, asks = book.top(limit)
+    return {
+        "lastUpdateId": book.update_id,
+        "bids": [[str(price), str(size)] for price, size in bids],
+        "asks": [[str(price), str(size)] for price, size in asks],
+    }
+
+
+@router.post('/api/v3/order')
+async def spot_order(request: Request):
+    return place(dict(request.query_params), 'binance_spot')
+
+
+@router.post('/fapi/v1/order')
+async def future_order(request: Request):
+    return place(dict(request.query_params), 'binance_future')
+
+
+@router.post('/fapi/v1/leverage')
+async def set_leverage(request: Request):
+    params = dict(request.query_params)
+    error = mandatory(params, 'symbol', 'leverage')
+    if error is not None:
+        return error
+    leverages[params['symbol'].upper()] = int(params['leverage'])
+    return {"leverage": int(params['leverage']), "maxNotionalValue": "1000000", "symbol": params['symbol'].upper()}
+
+
+@router.post('/fapi/v1/marginType')
+async def set_margin_type(request: Request):
+    params = dict(request.query_params)
+    error = mandatory(params, 'symbol', 'marginType')
+    if error is not None:
+        return error
+    symbol, margin_type = params['symbol'].upper(), params['marginType'].upper()
+    if margin_types.get(symbol) == margin_type:
+        return JSONResponse({"code": -4046, "msg": "No need to change margin type."}, status_code=400)
+    margin_types[symbol] = margin_type
+    return {"code": 200, "msg": "success"}
+
+
+@router.get('/fapi/v2/positionRisk')
+async def position_risk(symbol: str = None):
+    positions = []
+    for position_symbol, position_side, position in ledger.open_positions('binance_future'):
+        if symbol and symbol.upper() != position_symbol:
+            continue
+        mark_price = market.price(position_symbol)
+        direction = 1 if position_side == 'long' else -1
+        positions.append({
+            "symbol": position_symbol,
+            "positionAmt": str(position['size'] * direction),
+            "entryPrice": str(position['average']),
+            "markPrice": str(mark_price),
+            "unRealizedProfit": str((mark_price - position['average']) * position['size'] * direction),
+            "leverage": str(position['leverage']),
+            "marginType": position['margin_mode'].lower(),
+            "positionSide": position_side.upper(),
+            "updateTime": now_ms(),
+        })
+    return positions
+
+
+@router.get('/fapi/v1/allOrders')
+async def all_orders(symbol: str):
+    return [
+        {"orderId": order['orderId'], "symbol": order['symbol'], "status": "FILLED", "side": order['side'].upper(),
+         "positionSide": order['positionSide'].upper(), "avgPrice": str(order['price']),
+         "executedQty": str(order['quantity']), "time": order['ts']}
+        for order in ledger.orders if order['exchange'] == 'binance_future' and order['symbol'] == symbol.upper()
+    ]
+
+
+@router.post('/sapi/v1/capital/withdraw/apply')
+async def withdraw():
+    return {"id": uuid.uuid4().hex}
+
+
+# -------------------------------------------------------------------------------------------
+# 시세 websocket (raw: /ws, /fws, combined: /stream)
+# -------------------------------------------------------------------------------------------
+
+def events(inst_id: str, channel: str, is_future: bool) -> list:
+    book = market.book(inst_id)
+    symbol, ts = inst_id.upper(), now_ms()
+    trade = book.last_trade
+    if channel == 'ticker':
+        return [{"e": "24hrTicker", "E": ts, "s": symbol, "c": str(book.price), "Q": str(trade['size'] if trade else 0),
+                 "b": str(book.best_bid()), "a": str(book.best_ask())}]
+    if channel in ('trade', 'aggTrade') and trade:
+        return [{"e": channel, "E": ts, "s": symbol, "t" if channel == 'trade' else "a": trade['id'],
+                 "p": str(trade['price']), "q": str(trade['size']), "T": trade['ts'], "m": trade['side'] == 'sell'}]
+    if channel.startswith('depth'):
+        bids, asks = book.changes
+        # futures: pu 로 연속성 검사 (U 는 이전 u), spot: U == 이전 u + 1
+        first = book.update_id - 1 if is_future else book.update_id
+        event = {"e": "depthUpdate", "E": ts, "T": ts, "s": symbol, "U": first, "u": book.update_id,
+                 "b": [[str(price), str(size)] for price, size in bids],
+                 "a": [[str(price), str(size)] for price, size in asks]}
+        if is_future:
+            event["pu"] = book.update_id - 1
+        return [event]
+    if channel == 'bookTicker':
+        bid, ask = book.best_bid(), book.best_ask()
+        return [{"u": book.update_id, "s": symbol, "b": str(bid), "B": str(book.bids[bid]),
+                 "a": str(ask), "A": str(book.asks[ask]), "T": ts, "E": ts}]
+    if channel.startswith('markPrice'):
+        return [{"e": "markPriceUpdate", "E": ts, "s": symbol, "p": str(book.price), "r": "0.00010000", "T": ts}]
+    return []
+
+
+def stream_handler(is_combined: bool, is_future: bool):
+    def render(key):
+        inst_id, channel = key
+        messages = events(inst_id, channel, is_future)
+        if is_combined:
+            return [{"stream": f"{inst_id}@{channel}", "data": message} for message in messages]
+        return messages
+
+    async def handle(connection: StreamConnection, text: str) -> list:
+        request = json.loads(text)
+        keys = [tuple(param.split('@', 1)) for param in request.get('params', [])]
+        if request.get('method') == 'SUBSCRIBE':
+            connection.subscriptions.update(keys)
+        elif request.get('method') == 'UNSUBSCRIBE':
+            connection.subscriptions.difference_update(keys)
+        return [{"result": None, "id": request.get('id')}]
+
+    return handle, render
+
+
+@router.websocket('/ws')
+async def spot_stream(websocket: WebSocket):
+    await StreamConnection(websocket, *stream_handler(is_combined=False, is_future=False)).serve()
+
+
+@router.websocket('/fws')
+async def future_stream(websocket: WebSocket):
+    await StreamConnection(websocket, *stream_handler(is_combined=False, is_future=True)).serve()
+
+
+@router.websocket('/stream')
+async def combined_stream(websocket: WebSocket):
+    await StreamConnection(websocket, *stream_handler(is_combined=True, is_future=True)).serve()
+
+
+# -------------------------------------------------------------------------------------------
+# WebSocket API (주문)
+# -------------------------------------------------------------------------------------------
+
+def ws_api_handler(exchange: str):
+    async def handle(connection: StreamConnection, text: str) -> list:
+        request = json.loads(text)
+        request_id, method, params = request.get('id'), request.get('method'), request.get('params') or {}
+        await faults.delay()
+        if faults.should_fail():
+            status, body = ERRORS['binance']
+            return [{"id": request_id, "status": status, "error": body}]
+
+        if method == 'session.logon':
+            result = {"apiKey": params.get('apiKey'), "authorizedSince": now_ms(), "serverTime": now_ms()}
+        elif method == 'order.place':
+            result = place(params, exchange)
+            if isinstance(result, JSONResponse):
+                return [{"id": request_id, "status": 400, "error": json.loads(result.body)}]
+        elif method == 'time':
+            result = {"serverTime": now_ms()}
+        elif method == 'ping':
+            result = {}
+        else:
+            return [{"id": request_id, "status": 400, "error": {"code": -1100, "msg": f"Unknown method: {method}"}}]
+        return [{"id": request_id, "status": 200, "result": result}]
+
+    return handle, lambda key: []
+
+
+@router.websocket('/ws-api/v3')
+async def spot_ws_api(websocket: WebSocket):
+    await StreamConnection(websocket, *ws_api_handler('binance_spot')).serve()
+
+
+@router.websocket('/ws-fapi/v1')
+async def future_ws_api(websocket: WebSocket):
+    await StreamConnection(websocket, *ws_api_handler('binance_future')).serve()
@@ -0,0 +1,85 @@
+import json
+import math
+import uuid
+
+from fastapi import APIRouter, Request, WebSocket
+
+from mock_exchange.market import market, ledger, now_ms, BASE_PRICES
+from mock_exchange.stream import StreamConnection
+
+
+router = APIRouter(prefix='/bitget', tags=['Mock Bitget'])
+
+
+def ok(data) -> dict:
+    return {"code": "00000", "msg": "success", "requestTime": now_ms(), "data": data}
+
+
+@router.get('/public/time')
+async def server_time():
+    return ok({"serverTime": str(now_ms())})
+
+
+@router.get('/spot/public/symbols')
+async def symbols():
+    return ok([
+        {"symbol": f"{base}USDT", "baseCoin": base, "quoteCoin": "USDT", "status": "online",
+         "quantityPrecision": "6", "pricePrecision": str(max(0, -round(math.log10(market.book(base).tick_size)))),
+         "minTradeAmount": "0"}
+        for base in BASE_PRICES
+    ])
+
+
+@router.get('/spot/account/assets')
+async def assets():
+    return ok([{"coin": "USDT", "available": f"{ledger.balance:.2f}", "frozen": "0", "locked": "0", "uTime": str(now_ms())}])
+
+
+@router.post('/spot/trade/place-order')
+async def place_order(request: Request):
+    body = await request.json()
+    for name in ('symbol', 'side', 'orderType', 'size'):
+        if not body.get(name):
+            return {"code": "40019", "msg": f"Parameter {name} cannot be empty", "requestTime": now_ms(), "data": None}
+    order = ledger.fill('bitget_spot', body['symbol'].upper(), body['side'], None, float(body['size']),
+                        price=float(body['price']) if body.get('price') else None, order_type=body['orderType'])
+    return ok({"orderId": str(order['orderId']), "clientOid": body.get('clientOid') or uuid.uuid4().hex})
+
+
+@router.post('/spot/wallet/withdrawal')
+async def withdrawal():
+    return ok({"orderId": uuid.uuid4().hex, "clientOid": None})
+
+
+def render(key):
+    inst_type, channel, inst_id = key
+    if channel != 'ticker':
+        return []
+    book = market.book(inst_id)
+    return [{
+        "action": "snapshot",
+        "arg": {"instType": inst_type, "channel": channel, "instId": inst_id},
+        "data": [{"instId": inst_id, "lastPr": str(book.price), "bidPr": str(book.best_bid()), "askPr": str(book.best_ask()),
+                  "markPrice": str(book.price), "ts": str(now_ms())}],
+        "ts": now_ms(),
+    }]
+
+
+async def handle(connection: StreamConnection, text: str) -> list:
+    if text == 'ping':
+        return ['pong']
+    request = json.loads(text)
+    responses = []
+    for arg in request.get('args', []):
+        key = (arg.get('instType'), arg.get('channel'), arg.get('instId'))
+        if request.get('op') == 'subscribe':
+            connection.subscriptions.add(key)
+        elif request.get('op') == 'unsubscribe':
+            connection.subscriptions.discard(key)
+        responses.append({"event": request.get('op'), "arg": arg})
+    return responses
+
+
+@router.websocket('/ws')
+async def stream(websocket: WebSocket):
+    await StreamConnection(websocket, handle, render).serve()
@@ -0,0 +1,260 @@
+import json
+import uuid
+
+from fastapi import APIRouter, Request, WebSocket
+
+from mock_exchange.market import market, ledger, now_ms, base_of, BASE_PRICES
+from mock_exchange.stream import StreamConnection
+
+
+router = APIRouter(prefix='/blockfin', tags=['Mock Blockfin'])
+
+CONTRACT_VALUES = {'BTC': 0.001, 'ETH': 0.01}
+BARS = {'1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800, '1H': 3600, '4H': 14400, '1D': 86400}
+account = {"position_mode": "net_mode", "margin_mode": "cross", "leverage": {}}
+
+
+def ok(data, msg: str = "success") -> dict:
+    return {"code": "0", "msg": msg, "data": data}
+
+
+def error(code: str, msg: str) -> dict:
+    return {"code": code, "msg": msg, "data": None}
+
+
+def contract_value(inst_id: str) -> float:
+    return CONTRACT_VALUES.get(base_of(inst_id), 1)
+
+
+def instrument(base: str) -> dict:
+    inst_id = f"{base}-USDT"
+    return {
+        "instId": inst_id, "baseCurrency": base, "quoteCurrency": "USDT", "state": "live",
+        "contractValue": str(contract_value(inst_id)), "lotSize": "1", "minSize": "1",
+        "tickSize": f"{market.book(base).tick_size:.10f}".rstrip('0').rstrip('.'), "maxLeverage": "150",
+    }
+
+
+def position_data(inst_id: str = None) -> list:
+    positions = []
+    for symbol, position_side, position in ledger.open_positions('blockfin'):
+        if inst_id and symbol != inst_id:
+            continue
+        mark_price = market.price(symbol)
+        direction = 1 if position_side == 'long' else -1
+        contracts = position['size'] / contract_value(symbol)
+        positions.append({
+            "instId": symbol, "instType": "SWAP", "positionSide": position_side, "marginMode": position['margin_mode'],
+            "positions": f"{contracts:g}", "availablePositions": f"{contracts:g}",
+            "averagePrice": str(position['average']), "markPrice": str(mark_price),
+            "leverage": str(position['leverage']),
+            "unrealizedPnl": str((mark_price - position['average']) * position['size'] * direction),
+            "updateTime": str(now_ms()),
+        })
+    return positions
+
+
+def asset_data() -> list:
+    return [{"currency": "USDT", "balance": f"{ledger.balance:.2f}", "available": f"{ledger.balance:.2f}", "frozen": "0"}]
+
+
+# -------------------------------------------------------------------------------------------
+# REST
+# -------------------------------------------------------------------------------------------
+
+@router.get('/api/v1/market/instruments')
+async def instruments():
+    return ok([instrument(base) for base in BASE_PRICES])
+
+
+@router.get('/api/v1/market/books')
+async def books(instId: str, size: int = 20):
+    bids, asks = market.book(instId).top(size)
+    return ok([{"asks": [[str(price), str(amount)] for price, amount in asks],
+                "bids": [[str(price), str(amount)] for price, amount in bids],
+                "ts": str(now_ms())}])
+
+
+@router.get('/api/v1/market/candles')
+async def candles(instId: str, bar: str = '1m', after: int = None, limit: int = 100):
+    return ok(market.candles(instId, BARS.get(bar, 60) * 1000, end=after, limit=min(limit, 300)))
+
+
+@router.get('/api/v1/asset/balances')
+async def balances():
+    return ok(asset_data())
+
+
+@router.get('/api/v1/user/query-apikey')
+async def query_api_key(request: Request):
+    return ok({"uid": "mock-uid", "apiKey": request.headers.get('ACCESS-KEY'), "readOnly": 0, "permission": "read_write"})
+
+
+@router.get('/api/v1/affiliate/basic')
+async def affiliate_basic():
+    return ok({"uid": "mock-uid", "commissionRate": "0.3", "totalCommission": "0", "inviteeCount": 0})
+
+
+@router.get('/api/v1/account/position-mode')
+async def position_mode():
+    return ok({"positionMode": account['position_mode']})
+
+
+@router.post('/api/v1/account/set-position-mode')
+async def set_position_mode(request: Request):
+    body = await request.json()
+    account['position_mode'] = body.get('positionMode', account['position_mode'])
+    return ok({"positionMode": account['position_mode']})
+
+
+@router.post('/api/v1/account/set-margin-mode')
+async def set_margin_mode(request: Request):
+    body = await request.json()
+    account['margin_mode'] = body.get('marginMode', account['margin_mode'])
+    return ok({"marginMode": account['margin_mode']})
+
+
+@router.post('/api/v1/account/set-leverage')
+async def set_leverage(request: Request):
+    body = await request.json()
+    if not body.get('instId') or not body.get('leverage'):
+        return error("152001", "instId and leverage are required")
+    account['leverage'][(body['instId'], body.get('positionSide'))] = body['leverage']
+    return ok({"instId": body['instId'], "leverage": str(body['leverage']), "marginMode": body.get('marginMode'),
+               "positionSide": body.get('positionSide')})
+
+
+@router.post('/api/v1/trade/order')
+async def place_order(request: Request):
+    body = await request.json()
+    for name in ('instId', 'side', 'orderType', 'size'):
+        if not body.get(name):
+            return error("152002", f"{name} is required")
+    if account['position_mode'] == 'long_short_mode' and body.get('positionSide') not in ('long', 'short'):
+        return error("152003", "positionSide must be long or short in long_short_mode")
+
+    inst_id = body['instId']
+    order = ledger.fill('blockfin', inst_id, body['side'], body.get('positionSide'),
+                        float(body['size']) * contract_value(inst_id),
+                        price=float(body['price']) if body.get('price') else None,
+                        leverage=float(account['leverage'].get((inst_id, body.get('positionSide')), 3)),
+                        margin_mode=body.get('marginMode', account['margin_mode']),
+                        reduce_only=str(body.get('reduceOnly', '')).lower() == 'true', order_type=body['orderType'])
+    return ok({"orderId": str(order['orderId']), "clientOrderId": body.get('clientOrderId') or uuid.uuid4().hex})
+
+
+# -------------------------------------------------------------------------------------------
+# websocket
+# -------------------------------------------------------------------------------------------
+
+def public_render(key):
+    channel, inst_id = key
+    book = market.book(inst_id)
+    arg = {"channel": channel, "instId": inst_id}
+    if channel == 'trades' and book.last_trade:
+        trade = book.last_trade
+        return [{"arg": arg, "data": [{"instId": inst_id, "tradeId": str(trade['id']), "price": str(trade['price']),
+                                       "size": str(trade['size']), "side": trade['side'], "ts": str(trade['ts'])}]}]
+    if channel == 'tickers':
+        return [{"arg": arg, "data": [{"instId": inst_id, "last": str(book.price), "bidPrice": str(book.best_bid()),
+                                       "askPrice": str(book.best_ask()), "ts": str(now_ms())}]}]
+    if channel == 'books':
+        bids, asks = book.changes
+        return [{"arg": arg, "action": "update",
+                 "data": {"asks": [[str(price), str(size)] for price, size in asks],
+                          "bids": [[str(price), str(size)] for price, size in bids],
+                          "ts": str(now_ms()), "prevSeqId": book.update_id - 1, "seqId": book.update_id}}]
+    return []
+
+
+def books_snapshot(inst_id: str) -> dict:
+    book = market.book(inst_id)
+    bids, asks = book.top(400)
+    return {"arg": {"channel": "books", "instId": inst_id}, "action": "snapshot",
+            "data": {"asks": [[str(price), str(size)] for price, size in asks],
+                     "bids": [[str(price), str(size)] for price, size in bids],
+                     "ts": str(now_ms()), "prevSeqId": -1, "seqId": book.update_id}}
+
+
+def subscribe(connection: StreamConnection, request: dict) -> list:
+    responses = []
+    for arg in request.get('args', []):
+        key = (arg.get('channel'), arg.get('instId'))
+        if request['op'] == 'subscribe':
+            connection.subscriptions.add(key)
+            responses.append({"event": "subscribe", "arg": arg})
+            if key[0] == 'books':
+                responses.append(books_snapshot(key[1]))
+        else:
+            connection.subscriptions.discard(key)
+            responses.append({"event": "unsubscribe", "arg": arg})
+    return responses
+
+
+async def public_handle(connection: StreamConnection, text: str) -> list:
+    if text == 'ping':
+        return ['pong']
+    request = json.loads(text)
+    if request.get('op') in ('subscribe', 'unsubscribe'):
+        return subscribe(connection, request)
+    return [{"event": "error", "code": "60012", "msg": f"Invalid request: {text}"}]
+
+
+def private_render(key):
+    channel, inst_id = key
+    arg = {"channel": channel}
+    if inst_id:
+        arg["instId"] = inst_id
+    if channel == 'positions':
+        return [{"arg": arg, "data": position_data(inst_id)}]
+    if channel == 'account':
+        return [{"arg": arg, "data": {"totalEquity": f"{ledger.balance:.2f}", "details": asset_data(), "ts": str(now_ms())}}]
+    return []
+
+
+async def private_handle(connection: StreamConnection, text: str) -> list:
+    if text == 'ping':
+        return ['pong']
+    request = json.loads(text)
+    op = request.get('op')
+    if op == 'login':
+        args = (request.get('args') or [{}])[0]
+        if not all(args.get(name) for name in ('apiKey', 'passphrase', 'timestamp', 'sign')):
+            return [{"event": "error", "code": "60009", "msg": "Login failed."}]
+        if not connection.state.get('logged_in'):
+            connection.state['logged_in'] = True
+
+            # 체결 시 orders / positions 즉시 push
+            def on_fill(exchange: str):
+                if exchange != 'blockfin':
+                    return
+                order = ledger.orders[-1]
+                for channel, inst_id in tuple(connection.subscriptions):
+                    if channel == 'orders' and inst_id in (None, order['symbol']):
+                        connection.put({"arg": {"channel": "orders"}, "data": [{
+                            "instId": order['symbol'], "orderId": str(order['orderId']), "side": order['side'],
+                            "positionSide": order['positionSide'], "averagePrice": str(order['price']),
+                            "filledSize": f"{order['quantity'] / contract_value(order['symbol']):g}",
+                            "state": "filled", "updateTime": str(order['ts'])}]})
+                    elif channel == 'positions':
+                        for message in private_render((channel, inst_id)):
+                            connection.put(message)
+
+            ledger.listeners.add(on_fill)
+            connection.cleanups.append(lambda: ledger.listeners.discard(on_fill))
+        return [{"event": "login", "code": "0", "msg": ""}]
+    if op in ('subscribe', 'unsubscribe'):
+        if not connection.state.get('logged_in'):
+            return [{"event": "error", "code": "60011", "msg": "Please log in"}]
+        return subscribe(connection, request)
+    return [{"event": "error", "code": "60012", "msg": f"Invalid request: {text}"}]
+
+
+@router.websocket('/ws/public')
+async def public_stream(websocket: WebSocket):
+    await StreamConnection(websocket, public_handle, public_render).serve()
+
+
+@router.websocket('/ws/private')
+async def private_stream(websocket: WebSocket):
+    await StreamConnection(websocket, private_handle, private_render).serve()
@@ -0,0 +1,111 @@
+import time
+import random
+import asyncio
+
+from config.config import (MOCK_LATENCY_MS, MOCK_JITTER_MS, MOCK_ERROR_RATE, MOCK_RATE_LIMIT,
+                           MOCK_BINANCE_WEIGHT_LIMIT, MOCK_WS_DROP_RATE)
+
+
+# 거래소별 에러 응답 (status, body)
+ERRORS = {
+    'binance': (503, {"code": -1001, "msg": "Internal error; unable to process your request. Please try again."}),
+    'bitget': (500, {"code": "40725", "msg": "service return an error", "data": None}),
+    'blockfin': (500, {"code": "50001", "msg": "Service temporarily unavailable", "data": None}),
+}
+RATE_LIMITS = {
+    'binance': {"code": -1003, "msg": "Too many requests; current limit is exceeded."},
+    'bitget': {"code": "429", "msg": "Too Many Requests", "data": None},
+    'blockfin': {"code": "429", "msg": "Too Many Requests", "data": None},
+}
+
+# 바이낸스 엔드포인트 weight (없으면 1)
+BINANCE_WEIGHTS = {
+    '/api/v3/exchangeInfo': 20,
+    '/api/v3/depth': 50,
+    '/fapi/v1/depth': 20,
+    '/fapi/v2/positionRisk': 5,
+    '/fapi/v1/allOrders': 5,
+}
+
+
+class TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated_at = time.monotonic()
+
+    def take(self) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class Faults:
+    """
+        응답 지연 / 에러 주입 / 요청 제한 설정 (GET/POST /mock/faults 로 실행 중 변경)
+        - rate_limit: 거래소별 초당 요청 수 (0 이면 제한 없음)
+        - binance_weight_limit: 바이낸스 분당 weight, 응답 헤더 X-MBX-USED-WEIGHT-1M
+    """
+    def __init__(self):
+        self.latency_ms = MOCK_LATENCY_MS
+        self.jitter_ms = MOCK_JITTER_MS
+        self.error_rate = MOCK_ERROR_RATE
+        self.rate_limit = MOCK_RATE_LIMIT
+        self.binance_weight_limit = MOCK_BINANCE_WEIGHT_LIMIT
+        self.ws_drop_rate = MOCK_WS_DROP_RATE
+        self.buckets = {}
+        self.weight_minute = None
+        self.used_weight = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "error_rate": self.error_rate,
+            "rate_limit": self.rate_limit,
+            "binance_weight_limit": self.binance_weight_limit,
+            "ws_drop_rate": self.ws_drop_rate,
+        }
+
+    def update(self, **values):
+        for name, value in values.items():
+            if value is not None and name in self.as_dict():
+                setattr(self, name, type(getattr(self, name))(value))
+        self.buckets = {}
+
+    async def delay(self):
+        delay_ms = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+    def should_drop(self) -> bool:
+        return self.ws_drop_rate > 0 and random.random() < self.ws_drop_rate
+
+    def allow(self, exchange: str) -> bool:
+        bucket = self.buckets.get(exchange)
+        if bucket is None:
+            bucket = self.buckets[exchange] = TokenBucket(self.rate_limit)
+        return bucket.take()
+
+    def binance_weight(self, path: str) -> int:
+        # 분 단위 weight 누적, 한도 초과 시 None
+        minute = int(time.time() // 60)
+        if minute != self.weight_minute:
+            self.weight_minute, self.used_weight = minute, 0
+        weight = next((value for suffix, value in BINANCE_WEIGHTS.items() if path.endswith(suffix)), 1)
+        if self.binance_weight_limit and self.used_weight + weight > self.binance_weight_limit:
+            return None
+        self.used_weight += weight
+        return self.used_weight
+
+
+faults = Faults()
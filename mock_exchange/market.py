@@ -0,0 +1,214 @@
+import math
+import time
+import random
+import asyncio
+import itertools
+
+from config.config import MOCK_TICK_INTERVAL
+
+
+# 기준 자산 초기가격 (모르는 심볼은 100)
+BASE_PRICES = {'BTC': 60000.0, 'ETH': 3000.0, 'SOL': 150.0, 'XRP': 0.6, 'DOGE': 0.15}
+QUOTES = ('USDT', 'USDC', 'USD')
+BOOK_DEPTH = 50
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def base_of(symbol: str) -> str:
+    # BTC-USDT, BTCUSDT, btcusdt, POPCATPERP_CMCBL -> BTC / POPCAT
+    symbol = symbol.upper().split('_')[0].replace('-', '').replace('PERP', '')
+    for quote in QUOTES:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)]
+    return symbol
+
+
+def tick_size_of(price: float) -> float:
+    return 10 ** (math.floor(math.log10(price)) - 4)
+
+
+class Book:
+    """심볼 1개의 모의 시세 (랜덤워크 가격 + 호가 + 체결)"""
+    def __init__(self, base: str):
+        self.base = base
+        self.price = BASE_PRICES.get(base, 100.0)
+        self.tick_size = tick_size_of(self.price)
+        self.update_id = 1
+        self.bids = {}
+        self.asks = {}
+        self.changes = ([], [])
+        self.last_trade = None
+        self.rebuild()
+
+    def round(self, price: float) -> float:
+        return round(round(price / self.tick_size) * self.tick_size, 10)
+
+    def rebuild(self):
+        spread = self.tick_size
+        bids = {self.round(self.price - spread * (i + 1)): round(random.uniform(0.1, 5), 4) for i in range(BOOK_DEPTH)}
+        asks = {self.round(self.price + spread * (i + 1)): round(random.uniform(0.1, 5), 4) for i in range(BOOK_DEPTH)}
+        # 이전 호가와 달라진 가격만 변경분 (사라진 가격은 수량 0)
+        bid_changes = [[price, size] for price, size in bids.items() if self.bids.get(price) != size]
+        bid_changes += [[price, 0] for price in self.bids if price not in bids]
+        ask_changes = [[price, size] for price, size in asks.items() if self.asks.get(price) != size]
+        ask_changes += [[price, 0] for price in self.asks if price not in asks]
+        self.bids, self.asks, self.changes = bids, asks, (bid_changes, ask_changes)
+
+    def step(self, volatility: float = 0.0005):
+        self.price = max(self.tick_size, self.price * math.exp(random.gauss(0, volatility)))
+        self.rebuild()
+        self.update_id += 1
+        side = random.choice(('buy', 'sell'))
+        self.last_trade = {
+            "id": next(trade_ids),
+            "price": self.round(self.price),
+            "size": round(random.uniform(0.001, 1), 4),
+            "side": side,
+            "ts": now_ms(),
+        }
+
+    def best_bid(self) -> float:
+        return max(self.bids)
+
+    def best_ask(self) -> float:
+        return min(self.asks)
+
+    def top(self, depth: int = 20) -> tuple:
+        bids = sorted(self.bids.items(), reverse=True)[:depth]
+        asks = sorted(self.asks.items())[:depth]
+        return [list(level) for level in bids], [list(level) for level in asks]
+
+
+trade_ids = itertools.count(1)
+
+
+class Market:
+    """
+        거래소 공통 모의 시세
+        - 심볼은 기준 자산 단위로 공유 (BTCUSDT / BTC-USDT 같은 가격)
+        - MOCK_TICK_INTERVAL 마다 전 심볼 갱신 후 리스너 호출
+    """
+    def __init__(self, interval: float = MOCK_TICK_INTERVAL):
+        self.interval = interval
+        self.books = {}
+        self.listeners = set()
+        self.task = None
+
+    def book(self, symbol: str) -> Book:
+        base = base_of(symbol)
+        book = self.books.get(base)
+        if book is None:
+            book = self.books[base] = Book(base)
+        return book
+
+    def price(self, symbol: str) -> float:
+        return self.book(symbol).price
+
+    def candles(self, symbol: str, bar_ms: int = 60 * 1000, end: int = None, limit: int = 100) -> list:
+        """현재가에서 거꾸로 만든 캔들 (최신순), end 기준으로 결정적"""
+        book = self.book(symbol)
+        end = (end or now_ms()) // bar_ms * bar_ms
+        price = book.price
+        candles = []
+        for i in range(limit):
+            ts = end - bar_ms * (i + 1)
+            rng = random.Random(f"{book.base}:{ts}")
+            close = price
+            open_ = close * math.exp(rng.gauss(0, 0.001))
+            high = max(open_, close) * (1 + abs(rng.gauss(0, 0.0005)))
+            low = min(open_, close) * (1 - abs(rng.gauss(0, 0.0005)))
+            candles.append([str(ts), *(f"{book.round(value)}" for value in (open_, high, low, close)),
+                            f"{rng.uniform(1, 100):.4f}"])
+            price = open_
+        return candles
+
+    def subscribe(self, listener):
+        self.listeners.add(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.discard(listener)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            for book in tuple(self.books.values()):
+                book.step()
+            for listener in tuple(self.listeners):
+                try:
+                    listener()
+                except Exception as e:
+                    print(f"[mock] 시세 리스너 실패: {e}")
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+
+class Ledger:
+    """
+        거래소/계정 공통 모의 포지션 원장 (시장가 즉시 체결)
+        - key: (거래소, 심볼, positionSide)
+    """
+    def __init__(self, market: Market):
+        self.market = market
+        self.positions = {}
+        self.orders = []
+        self.settings = {}
+        self.balance = 100000.0
+        self.listeners = set()
+        self.order_ids = itertools.count(1000000)
+
+    def fill(self, exchange: str, symbol: str, side: str, position_side: str, quantity: float,
+             price: float = None, leverage: float = 1, margin_mode: str = 'cross', reduce_only: bool = False,
+             order_type: str = 'market') -> dict:
+        book = self.market.book(symbol)
+        side = side.lower()
+        if price is None or order_type.lower() == 'market':
+            price = book.best_ask() if side == 'buy' else book.best_bid()
+        position_side = (position_side or ('long' if side == 'buy' else 'short')).lower()
+        if position_side in ('both', 'net'):
+            position_side = 'long' if side == 'buy' else 'short'
+
+        key = (exchange, symbol, position_side)
+        position = self.positions.setdefault(key, {"size": 0.0, "average": 0.0, "leverage": leverage, "margin_mode": margin_mode})
+        opening = (side == 'buy') == (position_side == 'long')
+        if opening and not reduce_only:
+            total = position['size'] + quantity
+            position['average'] = (position['average'] * position['size'] + price * quantity) / total
+            position['size'] = total
+        else:
+            quantity = min(quantity, position['size'])
+            direction = 1 if position_side == 'long' else -1
+            self.balance += (price - position['average']) * quantity * direction
+            position['size'] -= quantity
+            if position['size'] <= 0:
+                del self.positions[key]
+        position['leverage'] = leverage
+        position['margin_mode'] = margin_mode
+
+        order = {
+            "orderId": next(self.order_ids), "exchange": exchange, "symbol": symbol, "side": side,
+            "positionSide": position_side, "price": price, "quantity": quantity, "ts": now_ms(),
+        }
+        self.orders.append(order)
+        del self.orders[:-1000]
+        for listener in tuple(self.listeners):
+            listener(exchange)
+        return order
+
+    def open_positions(self, exchange: str) -> list:
+        return [(symbol, position_side, position) for (venue, symbol, position_side), position in self.positions.items()
+                if venue == exchange]
+
+
+market = Market()
+ledger = Ledger(market)
@@ -0,0 +1,66 @@
+import json
+import asyncio
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from mock_exchange.market import market
+from mock_exchange.faults import faults
+
+
+class StreamConnection:
+    """
+        모의 websocket 연결 1개
+        - handle(text): 클라이언트 메시지 -> 즉시 응답 목록
+        - render(key): 구독 키 -> 틱마다 보낼 메시지 목록
+        - 시세 틱마다 구독 키 전부 render 해서 전송 (느린 클라이언트는 오래된 메시지 버림)
+        - ws_drop_rate 확률로 틱마다 연결 끊기 (재접속 테스트)
+    """
+    def __init__(self, websocket: WebSocket, handle, render, maxsize: int = 1024):
+        self.websocket = websocket
+        self.handle = handle
+        self.render = render
+        self.subscriptions = set()
+        self.state = {}
+        self.cleanups = []
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message if isinstance(message, str) else json.dumps(message))
+
+    def on_tick(self):
+        if faults.should_drop():
+            self.subscriptions.clear()
+            if self.queue.full():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return
+        for key in tuple(self.subscriptions):
+            for message in self.render(key):
+                self.put(message)
+
+    async def writer(self):
+        while True:
+            message = await self.queue.get()
+            if message is None:
+                await self.websocket.close(code=1011)
+                return
+            await self.websocket.send_text(message)
+
+    async def serve(self):
+        await self.websocket.accept()
+        market.subscribe(self.on_tick)
+        writer = asyncio.create_task(self.writer())
+        try:
+            while True:
+                text = await self.websocket.receive_text()
+                for message in await self.handle(self, text):
+                    self.put(message)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            market.unsubscribe(self.on_tick)
+            for cleanup in self.cleanups:
+                cleanup()
+            writer.cancel()
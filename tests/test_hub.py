@@ -0,0 +1,35 @@
+import asyncio
+
+from core.hub import Upstream, Venue, Subscription
+
+
+def upstream(connections: list) -> Upstream:
+    venue = Venue('test', 'ws://test', lambda keys: {}, lambda keys: {}, lambda data: None)
+    result = Upstream(venue)
+
+    async def run():
+        # 실제 접속 대신 연결 1개 = 취소될 때까지 대기
+        connections.append(asyncio.current_task())
+        await asyncio.Event().wait()
+    result.run = run
+    return result
+
+
+def test_subscribe_during_close_keeps_connection():
+    async def scenario():
+        connections = []
+        source = upstream(connections)
+        first = Subscription('test', 'ticker', 'BTC', listener=print)
+        await source.add(first)
+        await asyncio.sleep(0)
+        closing = asyncio.create_task(source.remove(first))
+        await asyncio.sleep(0)
+        # close() 가 이전 task 취소를 기다리는 중에 새 구독 진입
+        await source.add(Subscription('test', 'ticker', 'ETH', listener=print))
+        await closing
+        await asyncio.sleep(0)
+        assert len(connections) == 2
+        assert connections[0].cancelled()
+        assert source.task is connections[1] and not source.task.done()
+        await source.close()
+    asyncio.run(scenario())
@@ -0,0 +1,90 @@
+import json
+import asyncio
+
+import pytest
+
+from ingest import server as module
+from ingest.server import IngestServer
+
+
+class Writer:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Ring:
+    @staticmethod
+    def key_of(venue, channel, inst_id):
+        return (venue, channel, inst_id)
+
+    def publish(self, key, raw):
+        pass
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    subscribed = []
+
+    async def fake_subscribe(venue, channel, inst_id, listener=None):
+        subscribed.append((venue, channel, inst_id))
+        return (venue, channel, inst_id)
+
+    async def fake_unsubscribe(subscription):
+        subscribed.remove(subscription)
+    monkeypatch.setattr(module.hub, 'subscribe', fake_subscribe)
+    monkeypatch.setattr(module.hub, 'unsubscribe', fake_unsubscribe)
+    return subscribed
+
+
+def worker(*requests) -> asyncio.StreamReader:
+    # 워커 제어 연결 1개: 요청 줄들을 보낸 뒤 연결 종료(EOF)
+    reader = asyncio.StreamReader()
+    for op, inst_id in requests:
+        reader.feed_data(json.dumps({"op": op, "venue": 'blockfin', "channel": 'trades', "inst_id": inst_id}).encode() + b'\n')
+    return reader
+
+
+def test_disconnect_releases_only_that_workers_refs(upstream):
+    async def scenario():
+        ingest = IngestServer()
+        ingest.ring = Ring()
+        first, second = worker(('subscribe', 'BTC-USDT'), ('subscribe', 'BTC-USDT')), worker(('subscribe', 'BTC-USDT'))
+        first_writer = Writer()
+        first_task = asyncio.create_task(ingest.handle(first, first_writer))
+        second_task = asyncio.create_task(ingest.handle(second, Writer()))
+        await asyncio.sleep(0.01)
+        key = ('blockfin', 'trades', 'BTC-USDT')
+        assert ingest.refs[key][0] == 3 and upstream == [key]
+
+        first.feed_eof()
+        await first_task
+        assert first_writer.closed
+        assert ingest.refs[key][0] == 1 and upstream == [key]
+
+        second.feed_eof()
+        await second_task
+        assert key not in ingest.refs and upstream == []
+    asyncio.run(scenario())
+
+
+def test_unsubscribe_beyond_owned_is_ignored(upstream):
+    async def scenario():
+        ingest = IngestServer()
+        ingest.ring = Ring()
+        other = worker(('subscribe', 'ETH-USDT'))
+        other_task = asyncio.create_task(ingest.handle(other, Writer()))
+        await asyncio.sleep(0.01)
+        # 구독한 적 없는 워커의 unsubscribe 는 다른 워커 몫을 해제하지 않음
+        stray = worker(('unsubscribe', 'ETH-USDT'), ('subscribe', 'BTC-USDT'), ('unsubscribe', 'BTC-USDT'),
+                       ('unsubscribe', 'BTC-USDT'))
+        stray.feed_eof()
+        await ingest.handle(stray, Writer())
+        assert ingest.refs[('blockfin', 'trades', 'ETH-USDT')][0] == 1
+        assert ('blockfin', 'trades', 'BTC-USDT') not in ingest.refs
+        other.feed_eof()
+        await other_task
+        assert upstream == []
+    asyncio.run(scenario())
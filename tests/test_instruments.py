@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from core import instruments as module
+from core.instruments import InstrumentRegistry, instrument
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [instrument('blockfin', 'BTC-USDT')]
+    monkeypatch.setitem(module.LOADERS, 'blockfin', load)
+    return calls
+
+
+def registry(miss_ttl: float) -> InstrumentRegistry:
+    return InstrumentRegistry(snapshot_path='/nonexistent/instruments.json', miss_ttl=miss_ttl, shared=False)
+
+
+def test_unknown_symbol_refreshes_once_per_miss_ttl(loads):
+    async def scenario():
+        instruments = registry(60)
+        # 동시에 들어온 조회는 진행 중인 재조회 1번을 같이 기다림
+        results = await asyncio.gather(*(instruments.fetch('blockfin', symbol) for symbol in ('BTC-USDT', 'NOPE', 'NOPE')))
+        assert results[0]['symbol'] == 'BTC-USDT' and results[1:] == [None, None]
+        assert await instruments.fetch('blockfin', 'NOPE') is None
+        assert await instruments.fetch('blockfin', 'BTC-USDT') is not None
+    asyncio.run(scenario())
+    assert len(loads) == 1
+
+
+def test_unknown_symbol_refreshes_again_after_miss_ttl(loads):
+    async def scenario():
+        instruments = registry(0)
+        await instruments.fetch('blockfin', 'NOPE')
+        await instruments.fetch('blockfin', 'NOPE')
+    asyncio.run(scenario())
+    assert len(loads) == 2
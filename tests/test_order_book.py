@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from core import order_book
+from core.order_book import OrderBook, BinanceBookFeed
+
+
+class Message:
+    def __init__(self, data: dict):
+        self.data = data
+
+
+def spot_event(first: int, last: int, price: float = 100.0) -> dict:
+    return {'U': first, 'u': last, 'b': [[str(price), '1']], 'a': [[str(price + 1), '1']]}
+
+
+def future_event(first: int, last: int, previous: int, price: float = 100.0) -> dict:
+    return {'U': first, 'u': last, 'pu': previous, 'b': [[str(price), '1']], 'a': [[str(price + 1), '1']]}
+
+
+@pytest.fixture(autouse=True)
+def snapshot(monkeypatch):
+    async def fake_get(url):
+        return {'lastUpdateId': 100, 'bids': [['99', '1']], 'asks': [['101', '1']]}
+    monkeypatch.setattr(order_book.transport, 'get', fake_get)
+
+
+def run_feed(is_future: bool, buffered: list, live: list) -> BinanceBookFeed:
+    # snapshot lastUpdateId = 100, 재동기화 task 가 돌기 전 상태를 확인하도록 루프를 양보하지 않음
+    async def scenario():
+        feed = BinanceBookFeed(OrderBook('binance_future' if is_future else 'binance_spot', 'btcusdt'), is_future)
+        feed.buffer = list(buffered)
+        await feed.sync()
+        for event in live:
+            feed.on_message(Message(event))
+        feed.ready, feed.resynced = feed.book.ready.is_set(), feed.syncing is not None
+        return feed
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize('is_future', [False, True])
+def test_only_stale_buffer_waits_for_spanning_event(is_future):
+    if is_future:
+        feed = run_feed(True, [future_event(90, 95, 89), future_event(96, 99, 95)],
+                        [future_event(99, 103, 99), future_event(104, 106, 103)])
+    else:
+        feed = run_feed(False, [spot_event(90, 95), spot_event(96, 100)], [spot_event(99, 103), spot_event(104, 106)])
+    assert feed.ready and not feed.resynced
+    assert feed.book.sequence == 106
+
+
+def test_stale_buffer_not_ready_before_spanning_event():
+    feed = run_feed(False, [spot_event(90, 95)], [])
+    assert not feed.ready and feed.awaiting
+
+
+def test_buffer_with_spanning_event_is_ready():
+    feed = run_feed(False, [spot_event(90, 95), spot_event(98, 102), spot_event(103, 104)], [])
+    assert feed.ready and not feed.resynced
+    assert feed.book.sequence == 104
+
+
+def test_gap_after_snapshot_resyncs():
+    gap = spot_event(105, 110)
+    feed = run_feed(False, [spot_event(90, 95)], [gap])
+    assert not feed.ready and not feed.awaiting
+    assert feed.book.sequence is None and feed.buffer == [gap]
+
+
+def test_idle_books_are_evicted_and_unsubscribed(monkeypatch):
+    subscribed = set()
+
+    async def fake_subscribe(venue, channel, inst_id, listener=None):
+        subscribed.add(inst_id)
+        return inst_id
+
+    async def fake_unsubscribe(subscription):
+        subscribed.discard(subscription)
+    monkeypatch.setattr(order_book.hub, 'subscribe', fake_subscribe)
+    monkeypatch.setattr(order_book.hub, 'unsubscribe', fake_unsubscribe)
+
+    async def scenario():
+        books = order_book.OrderBookManager(idle_timeout=60)
+        await books.ensure('blockfin', 'BTC-USDT')
+        await books.ensure('blockfin', 'ETH-USDT')
+        books.last_used[('blockfin', 'ETH-USDT')] -= 120
+        assert await books.evict() == 1
+        assert set(books.books) == {('blockfin', 'BTC-USDT')} and subscribed == {'BTC-USDT'}
+        await books.close()
+        assert not books.books and not subscribed
+    asyncio.run(scenario())
+
+
+def test_failed_snapshot_backs_off_and_bounds_buffer(monkeypatch):
+    calls = []
+
+    async def failing_get(url):
+        calls.append(url)
+        raise ConnectionError("snapshot down")
+
+    async def no_sleep(delay):
+        pass
+    monkeypatch.setattr(order_book.transport, 'get', failing_get)
+    monkeypatch.setattr(order_book.asyncio, 'sleep', no_sleep)
+
+    async def scenario():
+        feed = BinanceBookFeed(OrderBook('binance_spot', 'btcusdt'), False, retries=3, buffer_size=5, max_delay=60)
+        feed.on_message(Message(spot_event(1, 1)))
+        await feed.syncing
+        # 재시도 소진 후 max_delay 동안은 이벤트가 와도 snapshot 요청 안 함
+        for sequence in range(2, 20):
+            feed.on_message(Message(spot_event(sequence, sequence)))
+        assert feed.syncing.done()
+        return feed
+
+    feed = asyncio.run(scenario())
+    assert len(calls) == 3
+    assert [event['u'] for event in feed.buffer] == [15, 16, 17, 18, 19]
+
+
+def test_price_levels_keep_best_first():
+    bids, asks = order_book.PriceLevels(descending=True), order_book.PriceLevels()
+    for price in (99.0, 101.0, 100.0):
+        bids.set(price, 1.0)
+        asks.set(price, 2.0)
+    bids.set(101.0, 0)
+    asks.set(102.0, 0)  # 없는 가격 삭제는 무시
+    assert bids.top(5) == [[100.0, 1.0], [99.0, 1.0]] and bids.best() == (100.0, 1.0)
+    assert asks.top(2) == [[99.0, 2.0], [100.0, 2.0]] and len(asks) == 3
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from core import price_cache as module
+from core.price_cache import PriceCache, FEEDS
+
+
+@pytest.fixture(autouse=True)
+def subscribe(monkeypatch):
+    calls = []
+
+    async def fake_subscribe(venue, channel, inst_id, listener=None):
+        await asyncio.sleep(0.01)
+        calls.append((venue, channel, inst_id))
+        return (venue, channel, inst_id)
+    monkeypatch.setattr(module.hub, 'subscribe', fake_subscribe)
+    return calls
+
+
+def test_concurrent_ensure_subscribes_once(subscribe):
+    async def scenario():
+        cache = PriceCache()
+        await asyncio.gather(*(cache.ensure('blockfin', 'BTC-USDT') for _ in range(5)))
+        return cache
+    cache = asyncio.run(scenario())
+    assert len(subscribe) == len(FEEDS['blockfin'])
+    assert len(cache.subscriptions[('blockfin', 'BTC-USDT')]) == len(FEEDS['blockfin'])
+
+
+def test_last_price_falls_back_to_last_known_value():
+    async def scenario():
+        cache = PriceCache()
+        cache.update('blockfin', 'BTC-USDT', last='100')
+        cache.prices[('blockfin', 'BTC-USDT')]['last_ts'] -= 10_000
+        return await cache.last_price('blockfin', 'BTC-USDT', max_age_ms=1000, timeout=0.05)
+    assert asyncio.run(scenario()) == 100.0
+
+
+def test_last_price_without_any_value_times_out():
+    async def scenario():
+        await PriceCache().last_price('blockfin', 'BTC-USDT', timeout=0.05)
+    with pytest.raises(TimeoutError):
+        asyncio.run(scenario())
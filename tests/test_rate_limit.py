@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from core.rate_limit import ExchangeScheduler, RateLimited, ORDER, QUERY
+
+
+def scheduler() -> ExchangeScheduler:
+    # weight 1000/60s, key 당 주문 1건/10s
+    return ExchangeScheduler('test', [(1000, 60)], [(1, 10)], reserve=0.0)
+
+
+def test_exhausted_key_does_not_block_other_keys_or_queries():
+    async def scenario():
+        limits = scheduler()
+        await limits.acquire(ORDER, 1, 'A', True)
+        blocked = asyncio.create_task(limits.acquire(ORDER, 1, 'A', True, max_wait=0.5))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(limits.acquire(ORDER, 1, 'B', True), 0.2)
+        await asyncio.wait_for(limits.acquire(QUERY, 1, 'A', False), 0.2)
+        with pytest.raises(RateLimited):
+            await blocked
+    asyncio.run(scenario())
+
+
+def test_weight_is_head_of_line():
+    async def scenario():
+        limits = scheduler()
+        await limits.acquire(QUERY, 999, '', False)
+        first = asyncio.create_task(limits.acquire(QUERY, 5, '', False, max_wait=0.2))
+        await asyncio.sleep(0)
+        # 뒤에 온 작은 조회가 앞 요청을 추월하지 않음
+        with pytest.raises(RateLimited):
+            await limits.acquire(QUERY, 1, '', False, max_wait=0.2)
+        with pytest.raises(RateLimited):
+            await first
+    asyncio.run(scenario())
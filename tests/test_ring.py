@@ -0,0 +1,86 @@
+import uuid
+
+import pytest
+
+from core import ring as module
+from core.ring import RingWriter, RingReader, HEADER_SIZE, SEQ
+
+
+@pytest.fixture
+def writer():
+    writer = RingWriter(name=f"test_ring_{uuid.uuid4().hex[:8]}", slots=8, slot_size=128)
+    yield writer
+    writer.close()
+
+
+@pytest.fixture
+def reader(writer):
+    reader = RingReader(writer.name)
+    yield reader
+    reader.close()
+
+
+def publish(writer: RingWriter, count: int, start: int = 0):
+    key = writer.key_of('blockfin', 'trades', 'BTC-USDT')
+    for idx in range(start, start + count):
+        assert writer.publish(key, f'{{"n": {idx}}}'.encode())
+
+
+def numbers(messages: list) -> list:
+    return [int(raw.split(': ')[1].rstrip('}')) for _, _, _, raw in messages]
+
+
+def test_wrap_around_keeps_order(writer, reader):
+    # 슬롯 8개를 여러 바퀴 돌아도 따라 읽는 reader 는 빠짐없이 순서대로
+    received = []
+    for batch in range(5):
+        publish(writer, 5, start=batch * 5)
+        received += reader.read()
+    assert numbers(received) == list(range(25))
+    assert received[0][:3] == ('blockfin', 'trades', 'BTC-USDT')
+    assert reader.dropped == 0
+
+
+def test_overrun_skips_and_counts_dropped(writer, reader):
+    publish(writer, 20)
+    received = reader.read()
+    # writer 가 쓰는 중일 수 있는 슬롯 1개를 비워두고 최근 slots - 1 개만
+    assert numbers(received) == list(range(13, 20))
+    assert reader.dropped == 13
+    assert reader.lag() == 0
+
+
+def test_oversized_frame_is_rejected(writer, reader):
+    key = writer.key_of('blockfin', 'trades', 'BTC-USDT')
+    assert not writer.publish(key, b'x' * writer.capacity)
+    assert writer.oversized == 1
+    publish(writer, 1)
+    assert numbers(reader.read()) == [0]
+
+
+def test_slot_being_rewritten_is_dropped(writer, reader):
+    publish(writer, 3)
+    # writer 가 2번째 메시지 슬롯을 다시 쓰기 시작한 상태 (슬롯 seq 무효화)
+    SEQ.pack_into(writer.buf, HEADER_SIZE + (2 % writer.slots) * writer.slot_size, 0)
+    assert numbers(reader.read()) == [0, 2]
+    assert reader.dropped == 1
+
+
+def test_torn_read_is_rejected(writer, reader, monkeypatch):
+    publish(writer, 2)
+    offset = HEADER_SIZE + (1 % writer.slots) * writer.slot_size
+    length = module.LENGTH
+
+    class TornLength:
+        # 본문을 복사하는 사이 writer 가 같은 슬롯을 다음 바퀴 seq 로 덮어씀
+        size = length.size
+
+        @staticmethod
+        def unpack_from(buf, at):
+            result = length.unpack_from(buf, at)
+            if at == offset + SEQ.size:
+                SEQ.pack_into(buf, offset, 1 + writer.slots)
+            return result
+    monkeypatch.setattr(module, 'LENGTH', TornLength)
+    assert numbers(reader.read()) == [1]
+    assert reader.dropped == 1
@@ -0,0 +1,42 @@
+import os
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app as module
+
+
+@pytest.fixture
+def secret_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'data' / 'session_secret')
+    monkeypatch.setattr(module, 'SESSION_SECRET_PATH', path)
+    monkeypatch.setattr(module, 'SESSION_SECRET_KEY', None)
+    return path
+
+
+def test_concurrent_workers_share_one_key(secret_path):
+    # 워커들이 동시에 떠도 모두 같은 키, 임시 파일은 남지 않음
+    barrier = threading.Barrier(16)
+
+    def start():
+        barrier.wait()
+        return module.session_secret(shared=True)
+
+    with ThreadPoolExecutor(16) as pool:
+        keys = set(pool.map(lambda _: start(), range(16)))
+    assert len(keys) == 1 and len(keys.pop()) == 64
+    assert os.listdir(os.path.dirname(secret_path)) == ['session_secret']
+
+
+def test_empty_file_from_crash_is_replaced(secret_path):
+    os.makedirs(os.path.dirname(secret_path))
+    open(secret_path, 'w').close()
+    key = module.session_secret(shared=True)
+    assert len(key) == 64 and module.session_secret(shared=True) == key
+
+
+def test_local_mode_does_not_touch_file(secret_path):
+    assert module.session_secret(shared=False) != module.session_secret(shared=False)
+    assert not os.path.exists(os.path.dirname(secret_path))
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from domain.v1.binance.ws_api import BinanceWsApi, BinanceWsApiUnavailable, BinanceWsApiAckLost
+
+
+class SilentSocket:
+    # 요청은 받지만 응답은 보내지 않음
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, payload: str):
+        self.sent.append(payload)
+
+
+def client(timeout: float = 0.05) -> BinanceWsApi:
+    api = BinanceWsApi('test', 'ws://test', clock='binance_spot', api_key='key', secret='secret',
+                       private_key_path=None, timeout=timeout)
+    api.ws = SilentSocket()
+    api.connected.set()
+    return api
+
+
+def test_lost_ack_reports_client_order_id():
+    async def scenario():
+        with pytest.raises(BinanceWsApiAckLost) as error:
+            await client().place_order({"symbol": "BTCUSDT", "newClientOrderId": "abc"})
+        return error.value
+    assert asyncio.run(scenario()).client_order_id == 'abc'
+
+
+def test_connection_closed_after_send_is_ack_lost():
+    async def scenario():
+        api = client(timeout=1)
+        order = asyncio.create_task(api.place_order({"symbol": "BTCUSDT"}))
+        await asyncio.sleep(0)
+        for future in api.pending.values():
+            future.set_exception(ConnectionError("closed"))
+        with pytest.raises(BinanceWsApiAckLost) as error:
+            await order
+        assert error.value.client_order_id
+    asyncio.run(scenario())
+
+
+def test_not_connected_is_unavailable():
+    async def scenario():
+        api = client()
+        api.connected.clear()
+        api.url = None  # 재접속 task 시작 안 함
+        with pytest.raises(BinanceWsApiUnavailable):
+            await api.place_order({"symbol": "BTCUSDT"})
+    asyncio.run(scenario())